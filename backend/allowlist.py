@@ -0,0 +1,211 @@
+"""
+Danh sách địa chỉ được phép ký (allowlist) lưu dạng nhị phân gọn
+File gồm header, Bloom filter tùy chọn và các bản ghi 20 byte đã sắp xếp;
+tra cứu qua mmap + tìm kiếm nhị phân, không tạo đối tượng Python cho từng địa chỉ
+"""
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WALLOW01"
+# magic, số địa chỉ, số byte Bloom filter, số hàm băm Bloom, dự phòng
+HEADER = struct.Struct("<8sQQII")
+RECORD_SIZE = 20
+DEFAULT_BLOOM_BITS = 10
+# Khoảng thời gian tối thiểu giữa hai lần kiểm tra file thay đổi
+RELOAD_INTERVAL = 1.0
+
+
+def parse_address(address: str) -> bytes:
+    """Chuyển địa chỉ hex (có hoặc không 0x, không phân biệt hoa/thường) thành 20 byte"""
+    address = address.strip()
+    if address[:2].lower() == "0x":
+        address = address[2:]
+    if len(address) != RECORD_SIZE * 2:
+        raise ValueError(f"Địa chỉ phải có 40 ký tự hex: {address}")
+    return bytes.fromhex(address)
+
+
+def _bloom_positions(address: bytes, hashes: int, bits: int):
+    # Địa chỉ là đầu ra keccak nên đã phân bố đều, dùng trực tiếp làm hai hàm băm (double hashing)
+    h1 = int.from_bytes(address[:8], "little")
+    h2 = int.from_bytes(address[8:16], "little") | 1
+    for i in range(hashes):
+        yield (h1 + i * h2) % bits
+
+
+def build_allowlist(addresses: Iterable[str], path: str, bloom_bits: int = DEFAULT_BLOOM_BITS) -> int:
+    """
+    Biên dịch danh sách địa chỉ thành file allowlist.
+
+    Args:
+        addresses: các địa chỉ hex, trùng lặp được loại bỏ
+        bloom_bits: số bit Bloom filter mỗi địa chỉ (0 để bỏ Bloom filter)
+
+    Returns:
+        int: số địa chỉ (đã loại trùng) được ghi
+    """
+    records = sorted({parse_address(address) for address in addresses})
+    count = len(records)
+
+    bloom = bytearray()
+    hashes = 0
+    if bloom_bits > 0 and count:
+        bits = max(64, count * bloom_bits + 7) // 8 * 8
+        hashes = max(1, round(bloom_bits * math.log(2)))
+        bloom = bytearray(bits // 8)
+        for record in records:
+            for position in _bloom_positions(record, hashes, bits):
+                bloom[position >> 3] |= 1 << (position & 7)
+
+    # Ghi vào file tạm rồi đổi tên để server đang mmap không đọc phải file dở dang
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, count, len(bloom), hashes, 0))
+        f.write(bloom)
+        f.write(b"".join(records))
+    os.replace(tmp_path, path)
+    return count
+
+
+class _Snapshot(NamedTuple):
+    data: object
+    count: int
+    bloom_offset: int
+    bloom_bits: int
+    bloom_hashes: int
+    records_offset: int
+    stat_key: tuple
+
+
+class Allowlist:
+    """
+    Allowlist đã biên dịch, mmap từ file và tự nạp lại khi file thay đổi.
+
+    Mỗi lần nạp tạo một snapshot mới rồi thay thế nguyên khối và đóng mmap
+    của snapshot cũ; luồng đang tra cứu trên snapshot vừa bị đóng tra lại trên
+    snapshot mới. File mới hỏng thì giữ snapshot cũ cho tới khi file đổi lần nữa.
+    """
+
+    def __init__(self, path: str, reload_interval: float = RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._snapshot = self._load()
+        # stat của file lần nạp lại gần nhất bị lỗi, để không thử lại (và log lại) mỗi chu kỳ
+        self._failed_key = None
+
+    def __len__(self) -> int:
+        return self._snapshot.count
+
+    def __contains__(self, address) -> bool:
+        return self.contains(address)
+
+    @property
+    def has_bloom(self) -> bool:
+        return self._snapshot.bloom_bits > 0
+
+    def contains(self, address) -> bool:
+        """Kiểm tra địa chỉ (hex hoặc 20 byte) có trong allowlist"""
+        self.maybe_reload()
+        address_bytes = address if isinstance(address, bytes) else parse_address(address)
+        while True:
+            snapshot = self._snapshot
+            try:
+                return self._lookup(snapshot, address_bytes)
+            except ValueError:
+                # mmap bị đóng vì snapshot vừa được thay trong lúc tra cứu
+                if snapshot is self._snapshot:
+                    raise
+
+    @staticmethod
+    def _lookup(snapshot: _Snapshot, address_bytes: bytes) -> bool:
+        data = snapshot.data
+
+        if snapshot.bloom_bits:
+            for position in _bloom_positions(address_bytes, snapshot.bloom_hashes, snapshot.bloom_bits):
+                if not data[snapshot.bloom_offset + (position >> 3)] & (1 << (position & 7)):
+                    return False
+
+        low, high = 0, snapshot.count
+        base = snapshot.records_offset
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + middle * RECORD_SIZE
+            record = data[offset:offset + RECORD_SIZE]
+            if record < address_bytes:
+                low = middle + 1
+            elif record > address_bytes:
+                high = middle
+            else:
+                return True
+        return False
+
+    def maybe_reload(self) -> bool:
+        """Nạp lại nếu file đổi (kiểm tra tối đa mỗi `reload_interval` giây)"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return False
+            self._last_check = now
+            try:
+                stat_key = self._stat_key()
+            except OSError:
+                # File đang bị thay thế hoặc tạm thời không có: giữ bản cũ
+                return False
+            if stat_key in (self._snapshot.stat_key, self._failed_key):
+                return False
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError) as e:
+                self._failed_key = stat_key
+                logger.warning("Không nạp lại được allowlist %s, giữ bản cũ (%d địa chỉ): %s",
+                               self.path, self._snapshot.count, e)
+                return False
+            previous, self._snapshot = self._snapshot, snapshot
+            self._failed_key = None
+            previous.data.close()
+            return True
+
+    def _stat_key(self) -> tuple:
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _load(self) -> _Snapshot:
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            stat_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if stat.st_size < HEADER.size:
+                raise ValueError(f"File allowlist không hợp lệ: {self.path}")
+            # mmap vẫn dùng được sau khi đóng file
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, bloom_bytes, bloom_hashes, _ = HEADER.unpack_from(data, 0)
+        records_offset = HEADER.size + bloom_bytes
+        if magic != MAGIC or len(data) != records_offset + count * RECORD_SIZE:
+            data.close()
+            raise ValueError(f"File allowlist không hợp lệ: {self.path}")
+        return _Snapshot(
+            data=data,
+            count=count,
+            bloom_offset=HEADER.size,
+            bloom_bits=bloom_bytes * 8,
+            bloom_hashes=bloom_hashes,
+            records_offset=records_offset,
+            stat_key=stat_key,
+        )
+
+
+def load_allowlist(path: Optional[str]) -> Optional[Allowlist]:
+    """Mở allowlist nếu có đường dẫn, ngược lại trả None"""
+    return Allowlist(path) if path else None
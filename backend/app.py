@@ -2,15 +2,85 @@
 API Ví Ethereum
 Cung cấp các REST API cho các thao tác với ví
 """
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Iterable, List, Optional, Union
 from eth_utils import to_checksum_address
 
-from wallet_core import WalletCore
+from wallet_core import HASH_CHUNK_SIZE, WalletCore
+from allowlist import load_allowlist
+from hd import DEFAULT_PATH, mnemonic_to_seed, parse_path
+from keystore import DEFAULT_UNLOCK_TTL, KDF_SCRYPT, SessionLocked, new_session_token
+from keypair_pool import DEFAULT_POOL_WORKERS, KeypairPool
+from nonce_store import DEFAULT_MAX_NONCES, DEFAULT_NONCE_TTL, DEFAULT_SHARDS, NonceStore, SQLiteNoncePersistence
+from siwe import SiweError, SiweMessage, parse_domains
+from transactions import parse_payments, template_from_dict
+from executor import CryptoExecutor, ExecutorSaturated
+from metrics import REGISTRY, WS_CONNECTIONS, WS_FRAMES, WS_IN_FLIGHT, MetricsMiddleware, observe_core
+from profiling import ProfilingMiddleware, RequestProfiler
+from results import address_matches
+from parallel import (
+    DEFAULT_CHUNK_SIZE,
+    chunked,
+    default_workers,
+    derive_chunk,
+    derive_items,
+    derive_tasks,
+    ordered_imap,
+    sign_chunk,
+    sign_items,
+    sign_tx_chunk,
+    sign_tx_items,
+    sign_tx_tasks,
+    sign_typed_chunk,
+    sign_typed_items,
+    verify_attestation_items,
+    verify_typed_chunk,
+)
+from ws_protocol import (
+    DEFAULT_MAX_IN_FLIGHT,
+    ENCODING_JSON,
+    ENCODING_MSGPACK,
+    FrameError,
+    decode,
+    encode,
+    error_frame,
+    msgpack_available,
+    parse_request,
+    result_frame,
+)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Khởi động/dừng executor và process pool cùng vòng đời ứng dụng"""
+    start_executor()
+    try:
+        yield
+    finally:
+        shutdown_pools()
+        nonce_store.close()
+        if keypair_pool is not None:
+            keypair_pool.close()
+
 
-app = FastAPI(title="API Ví Ethereum", version="1.0.0")
+app = FastAPI(title="API Ví Ethereum", version="1.0.0", lifespan=lifespan)
+logger = logging.getLogger("uvicorn.error")
+# Log INFO của các module backend (ví dụ EC backend được chọn lúc tạo WalletCore) cùng định dạng với uvicorn;
+# không làm gì nếu ứng dụng nhúng API đã cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
 
 # Bật CORS cho frontend React
 app.add_middleware(
@@ -21,7 +91,139 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-wallet_core = WalletCore()
+# Tắt metrics bằng WALLET_METRICS=0
+METRICS_ENABLED = os.environ.get("WALLET_METRICS", "1") != "0"
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Profile theo yêu cầu (WALLET_PROFILING=1): header X-Wallet-Profile hoặc lấy mẫu
+# WALLET_PROFILE_SAMPLE_RATE; kết quả gộp ở /api/admin/profile, cần X-Wallet-Admin-Token
+# nếu đặt WALLET_ADMIN_TOKEN
+ADMIN_TOKEN = os.environ.get("WALLET_ADMIN_TOKEN") or None
+profiler = RequestProfiler(
+    enabled=os.environ.get("WALLET_PROFILING", "0") == "1",
+    sample_rate=float(os.environ.get("WALLET_PROFILE_SAMPLE_RATE", 0)),
+)
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Token phiên mở khóa keystore của yêu cầu HTTP / kết nối WebSocket hiện tại (header X-Wallet-Session)
+SESSION_HEADER = b"x-wallet-session"
+_session_token: ContextVar[Optional[str]] = ContextVar("wallet_session_token", default=None)
+
+
+class SessionTokenMiddleware:
+    """ASGI middleware đọc X-Wallet-Session cho cả HTTP và WebSocket (mọi frame của kết nối dùng chung token)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        token = next((value.decode("latin-1") for name, value in scope["headers"] if name == SESSION_HEADER), None)
+        reset = _session_token.set(token or None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _session_token.reset(reset)
+
+
+app.add_middleware(SessionTokenMiddleware)
+
+wallet_core = WalletCore(observer=observe_core if METRICS_ENABLED else None)
+
+# Executor riêng cho tác vụ mật mã, giữ event loop rảnh cho các route nhẹ
+crypto_executor = CryptoExecutor(
+    wallet_core,
+    kind=os.environ.get("WALLET_EXECUTOR", "thread"),
+    workers=int(os.environ.get("WALLET_EXECUTOR_WORKERS", default_workers())),
+    queue_size=int(os.environ.get("WALLET_EXECUTOR_QUEUE", 64)),
+    retry_after=int(os.environ.get("WALLET_RETRY_AFTER", 1)),
+)
+
+# Allowlist địa chỉ người ký (file do `wallet allowlist build` tạo), tự nạp lại khi file đổi
+allowlist = load_allowlist(os.environ.get("WALLET_ALLOWLIST"))
+
+# Cấu hình ký hàng loạt qua process pool
+BATCH_WORKERS = int(os.environ.get("WALLET_BATCH_WORKERS", default_workers()))
+BATCH_CHUNK_SIZE = int(os.environ.get("WALLET_BATCH_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+BATCH_MAX_ITEMS = int(os.environ.get("WALLET_BATCH_MAX_ITEMS", 100_000))
+# Luồng NDJSON đã bắt đầu gửi thì lô kế tiếp chờ executor có chỗ, thử lại sau mỗi khoảng này (giây)
+STREAM_RETRY_DELAY = 0.05
+
+# Số tiến trình uvicorn (`--workers` đặt biến này cho các worker)
+API_WORKERS = int(os.environ.get("WALLET_API_WORKERS", 1))
+
+# Nonce đăng nhập SIWE: WALLET_SIWE_DB giữ nonce qua lần khởi động lại (SQLite, ghi sau);
+# với nhiều worker, file này là kho dùng chung (gom ghi theo lô, xóa nguyên tử khi dùng nonce)
+_siwe_db = os.environ.get("WALLET_SIWE_DB")
+nonce_store = NonceStore(
+    ttl=float(os.environ.get("WALLET_SIWE_NONCE_TTL", DEFAULT_NONCE_TTL)),
+    max_size=int(os.environ.get("WALLET_SIWE_MAX_NONCES", DEFAULT_MAX_NONCES)),
+    shards=int(os.environ.get("WALLET_SIWE_SHARDS", DEFAULT_SHARDS)),
+    persistence=SQLiteNoncePersistence(_siwe_db, shared=API_WORKERS > 1) if _siwe_db else None,
+)
+# Domain do máy chủ này kiểm soát (phân tách bằng dấu phẩy); thông điệp SIWE phải nêu một trong số đó.
+# Bỏ trống thì /api/siwe/verify từ chối mọi lượt đăng nhập
+SIWE_DOMAINS = parse_domains(os.environ.get("WALLET_SIWE_DOMAIN"))
+
+# Pool cặp khóa sinh sẵn cho /api/wallet/generate (WALLET_KEYPOOL_SIZE=0 để tắt);
+# chỉ nằm trong bộ nhớ của tiến trình này và bị xóa khi tắt ứng dụng
+_keypool_size = int(os.environ.get("WALLET_KEYPOOL_SIZE", 0))
+keypair_pool = KeypairPool(
+    wallet_core.generate_raw_keypair,
+    high=_keypool_size,
+    low=int(os.environ["WALLET_KEYPOOL_LOW"]) if os.environ.get("WALLET_KEYPOOL_LOW") else None,
+    workers=int(os.environ.get("WALLET_KEYPOOL_WORKERS", DEFAULT_POOL_WORKERS)),
+) if _keypool_size > 0 else None
+
+# Số frame một kết nối WebSocket được xử lý cùng lúc; đủ số này thì ngừng đọc frame mới
+WS_MAX_IN_FLIGHT = int(os.environ.get("WALLET_WS_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT))
+
+_batch_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_batch_pool() -> ProcessPoolExecutor:
+    """Khởi tạo process pool khi có yêu cầu ký hàng loạt đầu tiên"""
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = ProcessPoolExecutor(
+            max_workers=BATCH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _batch_pool
+
+
+def start_executor():
+    crypto_executor.start()
+    logger.info(
+        "Crypto executor: %s, %d worker, hàng đợi %d",
+        crypto_executor.kind, crypto_executor.workers, crypto_executor.queue_size,
+    )
+    if allowlist is not None:
+        logger.info("Allowlist: %s (%d địa chỉ)", allowlist.path, len(allowlist))
+    if API_WORKERS > 1 and SIWE_DOMAINS and not nonce_store.persistence.shared:
+        logger.error(
+            "%d worker nhưng chưa đặt WALLET_SIWE_DB: nonce SIWE phát ở worker này sẽ không dùng được ở worker khác",
+            API_WORKERS,
+        )
+    if not SIWE_DOMAINS:
+        logger.warning("Chưa đặt WALLET_SIWE_DOMAIN: /api/siwe/verify sẽ từ chối mọi lượt đăng nhập")
+    if keypair_pool is not None:
+        keypair_pool.start()
+        logger.info(
+            "Pool cặp khóa: %d-%d cặp, %d thread nạp",
+            keypair_pool.low, keypair_pool.high, keypair_pool.workers,
+        )
+
+
+def shutdown_pools():
+    global _batch_pool
+    crypto_executor.shutdown()
+    if _batch_pool is not None:
+        _batch_pool.shutdown(cancel_futures=True)
+        _batch_pool = None
 
 
 class KeyPairResponse(BaseModel):
@@ -32,7 +234,9 @@ class KeyPairResponse(BaseModel):
 
 class SignRequest(BaseModel):
     message: str
-    private_key: str
+    private_key: Optional[str] = None
+    # Ký bằng khóa đã mở qua /api/keystore/unlock thay cho private_key
+    address: Optional[str] = None
     personal: bool = True
 
 
@@ -47,12 +251,49 @@ class SignResponse(BaseModel):
     is_low_s: bool
 
 
+class SignFileResponse(BaseModel):
+    signature: str
+    filename: Optional[str] = None
+    size: int
+    address: str
+    message_hash: str
+    v: int
+    r: str
+    s: str
+    is_low_s: bool
+
+
+class SignBatchRequest(BaseModel):
+    items: List[SignRequest]
+
+
+class KeystoreCreateRequest(BaseModel):
+    password: str
+    # Bỏ trống để sinh khóa mới
+    private_key: Optional[str] = None
+    kdf: str = KDF_SCRYPT
+
+
+class KeystoreUnlockRequest(BaseModel):
+    keystore: dict
+    password: str
+    ttl: float = DEFAULT_UNLOCK_TTL
+
+
+class KeystoreLockRequest(BaseModel):
+    # Bỏ trống để khóa tất cả phiên của token
+    address: Optional[str] = None
+
+
 class VerifyRequest(BaseModel):
     message: str
     signature: str
     public_key: Optional[str] = None
     address: Optional[str] = None
     personal: bool = True
+    strict: bool = False
+    require_low_s: bool = False
+    allowlist: bool = False
 
 
 class VerifyResponse(BaseModel):
@@ -60,104 +301,1022 @@ class VerifyResponse(BaseModel):
     address: Optional[str] = None
     message_hash: Optional[str] = None
     match_expected: Optional[bool] = None
+    allowlisted: Optional[bool] = None
+
+
+class SignTypedDataRequest(BaseModel):
+    # EIP-712: {"types", "primaryType", "domain", "message"}
+    typed_data: dict
+    private_key: Optional[str] = None
+    address: Optional[str] = None
+
+
+class SignTypedDataResponse(BaseModel):
+    signature: str
+    primary_type: str
+    address: str
+    message_hash: str
+    v: int
+    r: str
+    s: str
+    is_low_s: bool
+
+
+class SignTypedDataBatchRequest(BaseModel):
+    items: List[SignTypedDataRequest]
+
+
+class VerifyTypedDataRequest(BaseModel):
+    typed_data: dict
+    signature: str
+    public_key: Optional[str] = None
+    address: Optional[str] = None
+    strict: bool = False
+    require_low_s: bool = False
+    allowlist: bool = False
+
+
+class VerifyTypedDataBatchRequest(BaseModel):
+    items: List[VerifyTypedDataRequest]
+
+
+class DeriveRequest(BaseModel):
+    # Đúng một trong hai: cụm từ BIP-39 hoặc seed hex
+    mnemonic: Optional[str] = None
+    seed: Optional[str] = None
+    passphrase: str = ""
+    # Nút cha; địa chỉ thứ i nằm tại {path}/i
+    path: str = DEFAULT_PATH
+    start: int = 0
+    count: int = 1
+    include_private_key: bool = False
+
+
+class PaymentItem(BaseModel):
+    to: str
+    # Wei dạng số, hex hoặc kèm đơn vị ("0.5 ether")
+    value: Union[int, str] = 0
+    data: Optional[str] = None
+
+
+class SignTransactionsRequest(BaseModel):
+    items: List[PaymentItem]
+    private_key: Optional[str] = None
+    address: Optional[str] = None
+    # Nonce của mục đầu; các mục sau tăng dần theo thứ tự
+    start_nonce: int
+    chain_id: int
+    # "eip1559" (mặc định) hoặc "legacy"; bỏ trống thì legacy khi chỉ có gas_price
+    type: Optional[str] = None
+    gas: Optional[Union[int, str]] = None
+    max_fee_per_gas: Optional[Union[int, str]] = None
+    max_priority_fee_per_gas: Optional[Union[int, str]] = None
+    gas_price: Optional[Union[int, str]] = None
+    access_list: Optional[list] = None
+
+
+class AttestRequest(BaseModel):
+    messages: List[str]
+    private_key: Optional[str] = None
+    address: Optional[str] = None
+    personal: bool = True
+
+
+class VerifyAttestationRequest(BaseModel):
+    message: str
+    # Bằng chứng của thông điệp trong lô cùng gốc và chữ ký gốc của lô
+    index: int
+    count: int
+    proof: str
+    root: str
+    signature: str
+    # Người ký gốc mong đợi
+    address: Optional[str] = None
+    personal: bool = True
+    require_low_s: bool = False
+
+
+class VerifyAttestationBatchRequest(BaseModel):
+    items: List[VerifyAttestationRequest]
+
+
+class SiweParseRequest(BaseModel):
+    message: str
+
+
+class SiweVerifyRequest(BaseModel):
+    message: str
+    signature: str
+
+
+class ProfileSettingsRequest(BaseModel):
+    # Tỉ lệ yêu cầu được profile ngoài các yêu cầu có header (0 = chỉ theo header)
+    sample_rate: Optional[float] = None
+    # Xóa kết quả đã gộp
+    reset: bool = False
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+REGISTRY.callback_gauge(
+    "wallet_executor_queue_depth",
+    "Số tác vụ mật mã đang chờ worker rảnh",
+    lambda: crypto_executor.queue_depth,
+)
+REGISTRY.callback_gauge(
+    "wallet_executor_in_flight",
+    "Số tác vụ mật mã đã nhận (đang chạy + đang chờ)",
+    lambda: crypto_executor.in_flight,
+)
+REGISTRY.callback_gauge(
+    "wallet_executor_rejected",
+    "Tổng số tác vụ bị từ chối vì hàng đợi đầy",
+    lambda: crypto_executor.rejected,
+)
+REGISTRY.callback_gauge(
+    "wallet_allowlist_entries",
+    "Số địa chỉ trong allowlist đang nạp",
+    lambda: len(allowlist) if allowlist is not None else None,
+)
+REGISTRY.callback_gauge(
+    "wallet_unlocked_keys",
+    "Số địa chỉ đang mở khóa từ keystore",
+    lambda: len(wallet_core.unlocked_sessions()),
+)
+REGISTRY.callback_gauge(
+    "wallet_key_cache_entries",
+    "Số khóa riêng đang được cache trong WalletCore",
+    lambda: wallet_core.key_cache_stats()["size"],
+)
+REGISTRY.callback_gauge(
+    "wallet_typed_data_schema_cache_entries",
+    "Số schema EIP-712 đã biên dịch đang được cache trong tiến trình API",
+    lambda: wallet_core.typed_data_cache_stats()["schemas"]["size"],
+)
+REGISTRY.callback_gauge(
+    "wallet_attestation_cache_entries",
+    "Số gốc lô đã ký được nhớ người ký trong tiến trình API",
+    lambda: wallet_core.attestation_cache_stats()["size"],
+)
+REGISTRY.callback_gauge(
+    "wallet_keypool_size",
+    "Số cặp khóa sinh sẵn đang chờ trong pool",
+    lambda: len(keypair_pool) if keypair_pool is not None else None,
+)
+REGISTRY.callback_gauge(
+    "wallet_keypool_served",
+    "Tổng số cặp khóa đã trao từ pool",
+    lambda: keypair_pool.served if keypair_pool is not None else None,
+)
+REGISTRY.callback_gauge(
+    "wallet_keypool_misses",
+    "Tổng số lần pool cạn phải sinh khóa tại chỗ",
+    lambda: keypair_pool.misses if keypair_pool is not None else None,
+)
+REGISTRY.callback_gauge(
+    "wallet_keypool_generated",
+    "Tổng số cặp khóa thread nền đã sinh vào pool",
+    lambda: keypair_pool.generated if keypair_pool is not None else None,
+)
+REGISTRY.callback_gauge(
+    "wallet_keypool_refill_rate",
+    "Tốc độ nạp pool (cặp/giây) của lần nạp gần nhất",
+    lambda: keypair_pool.refill_rate if keypair_pool is not None else None,
+)
+REGISTRY.callback_gauge(
+    "wallet_siwe_nonces",
+    "Số nonce SIWE đã phát, chưa dùng trong tiến trình API",
+    lambda: len(nonce_store),
+)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics dạng văn bản Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "API Ví Ethereum", "version": "1.0.0"}
 
 
 @app.post("/api/wallet/generate", response_model=KeyPairResponse)
-def generate_wallet():
+async def generate_wallet():
     """Tạo ví Ethereum mới (khóa riêng, khóa công khai, địa chỉ)"""
     try:
-        private_key, public_key, address = wallet_core.generate_keypair()
+        keypair = keypair_pool.take() if keypair_pool is not None else None
+        if keypair is None:
+            keypair = await crypto_executor.run_core("generate_keypair")
+        private_key, public_key, address = keypair
         return KeyPairResponse(
             private_key=private_key,
             public_key=public_key,
             address=address
         )
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _require_session() -> str:
+    token = _session_token.get()
+    if token is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Cần header X-Wallet-Session (token trả về từ /api/keystore/unlock)",
+        )
+    return token
+
+
+def _authorize_addresses(addresses: Iterable[Optional[str]]) -> None:
+    """Ký theo `address` chỉ dành cho người giữ token của phiên mở khóa địa chỉ đó"""
+    addresses = {address for address in addresses if address}
+    if not addresses:
+        return
+    token = _require_session()
+    for address in addresses:
+        try:
+            wallet_core.authorize_address(address, token)
+        except SessionLocked as e:
+            raise HTTPException(status_code=403, detail=str(e))
+
+
 @app.post("/api/wallet/sign", response_model=SignResponse)
-def sign_message(request: SignRequest):
+async def sign_message(request: SignRequest):
     """Ký một thông điệp bằng khóa riêng"""
+    if bool(request.private_key) == bool(request.address):
+        raise HTTPException(status_code=400, detail="Cần đúng một trong hai: private_key hoặc address")
+    _authorize_addresses([request.address])
     try:
-        result = wallet_core.sign_message(request.message, request.private_key, request.personal)
-        return SignResponse(
-            signature=result["signature"],
-            message=request.message,
-            address=result["address"],
-            message_hash=result["message_hash"],
-            v=result["v"],
-            r=result["r"],
-            s=result["s"],
-            is_low_s=result["is_low_s"],
+        if request.address:
+            result = await crypto_executor.run_core_local(
+                "sign_message_with_address", request.message, request.address, request.personal
+            )
+        else:
+            result = await crypto_executor.run_core(
+                "sign_message", request.message, request.private_key, request.personal
+            )
+        return SignResponse(message=request.message, **result)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _ndjson_lines(results: Iterable[dict]) -> str:
+    return "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+
+
+async def _stream_local_chunks(fn, chunks: Iterable, render=_ndjson_lines) -> StreamingResponse:
+    """
+    NDJSON từ `render(fn(wallet_core, chunk))` chạy qua crypto executor cho từng lô, theo thứ tự.
+
+    Lô đầu chạy trước khi trả response nên executor đầy thì client nhận 503 + Retry-After;
+    khi đã bắt đầu gửi, các lô sau chờ executor có chỗ thay vì cắt ngang luồng.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    head = await crypto_executor.run_local(fn, first) if first is not None else None
+
+    async def stream():
+        if head is None:
+            return
+        yield render(head)
+        for chunk in chunks:
+            while True:
+                try:
+                    results = await crypto_executor.run_local(fn, chunk)
+                    break
+                except ExecutorSaturated:
+                    await asyncio.sleep(STREAM_RETRY_DELAY)
+            yield render(results)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/wallet/sign/batch")
+async def sign_batch(request: SignBatchRequest):
+    """
+    Ký nhiều thông điệp trên process pool, trả về NDJSON theo đúng thứ tự.
+
+    Mỗi dòng là một kết quả ký (cùng trường với /api/wallet/sign, thêm `index`)
+    hoặc `{"index", "error"}` nếu mục đó lỗi. Lô có mục ký theo `address`
+    (khóa đã mở khóa) được ký trong tiến trình API qua crypto executor.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BATCH_MAX_ITEMS} mục mỗi yêu cầu",
+        )
+    items = [
+        (index, item.message, item.private_key, item.personal, item.address)
+        for index, item in enumerate(request.items)
+    ]
+    _authorize_addresses(item.address for item in request.items)
+    chunks = chunked(items, BATCH_CHUNK_SIZE)
+    if any(item.address for item in request.items):
+        # Khóa đã mở chỉ có trong tiến trình API nên ký tại chỗ thay vì qua process pool
+        return await _stream_local_chunks(sign_items, chunks)
+
+    def stream():
+        for results in ordered_imap(get_batch_pool(), sign_chunk, chunks, max_pending=BATCH_WORKERS * 2):
+            yield _ndjson_lines(results)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/wallet/sign/tx/batch")
+async def sign_transactions_batch(request: SignTransactionsRequest):
+    """
+    Ký một đợt giao dịch cùng người gửi (EIP-1559 hoặc legacy EIP-155), trả NDJSON theo đúng thứ tự.
+
+    Mọi mục được kiểm tra trước khi ký nên nonce gán liền mạch từ `start_nonce`, không có lỗ
+    do mục hỏng. Mỗi dòng: {index, nonce, from, to, value, hash, raw_transaction}.
+    Ký theo `address` (khóa đã mở khóa) chạy trong tiến trình API qua crypto executor.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BATCH_MAX_ITEMS} mục mỗi yêu cầu",
+        )
+    if bool(request.private_key) == bool(request.address):
+        raise HTTPException(status_code=400, detail="Cần đúng một trong hai: private_key hoặc address")
+    _authorize_addresses([request.address])
+    try:
+        if request.start_nonce < 0:
+            raise ValueError("start_nonce không được âm")
+        template = template_from_dict(request.model_dump(exclude={"items", "private_key", "address", "start_nonce"}))
+        payments = parse_payments(item.model_dump() for item in request.items)
+        if request.private_key:
+            await crypto_executor.run_core_local("private_key_to_address", request.private_key)
+            private_key = request.private_key
+            key = bytes.fromhex(private_key[2:] if private_key.startswith("0x") else private_key)
+        else:
+            key = request.address
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tasks = sign_tx_tasks(template, key, payments, request.start_nonce, "ndjson", BATCH_CHUNK_SIZE)
+    if request.address or len(payments) <= BATCH_CHUNK_SIZE:
+        # Khóa đã mở chỉ có trong tiến trình API; một lô thì ký tại chỗ, không qua process pool
+        return await _stream_local_chunks(sign_tx_items, tasks, render=str)
+
+    def stream():
+        yield from ordered_imap(get_batch_pool(), sign_tx_chunk, tasks, max_pending=BATCH_WORKERS * 2)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/wallet/attest")
+async def attest_messages(request: AttestRequest):
+    """
+    Ký lô thông điệp bằng một chữ ký trên gốc cây Merkle các hash thông điệp.
+
+    Trả {root, signature, address, count, proofs: [{index, message_hash, proof}]}; mỗi thông điệp
+    xác thực được độc lập qua /api/wallet/verify/attestation với bằng chứng của nó cùng gốc và chữ ký.
+    """
+    if len(request.messages) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BATCH_MAX_ITEMS} mục mỗi yêu cầu",
         )
+    if bool(request.private_key) == bool(request.address):
+        raise HTTPException(status_code=400, detail="Cần đúng một trong hai: private_key hoặc address")
+    _authorize_addresses([request.address])
+    try:
+        if request.address:
+            return await crypto_executor.run_core_local(
+                "attest_messages_with_address", request.messages, request.address, request.personal
+            )
+        return await crypto_executor.run_core("attest_messages", request.messages, request.private_key, request.personal)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _attestation_item(index: int, item: VerifyAttestationRequest) -> tuple:
+    return index, item.model_dump(exclude={"require_low_s"}), item.require_low_s
+
+
+@app.post("/api/wallet/verify/attestation", response_model=VerifyResponse)
+async def verify_attestation(request: VerifyAttestationRequest):
+    """
+    Xác thực thông điệp thuộc lô đã ký: bằng chứng dẫn tới gốc và chữ ký gốc hợp lệ.
+
+    Chạy trong tiến trình API, nơi cache người ký theo gốc được dùng chung.
+    """
+    try:
+        (result,) = await crypto_executor.run_local(verify_attestation_items, [_attestation_item(0, request)])
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    result.pop("index")
+    return VerifyResponse(**result)
+
+
+@app.post("/api/wallet/verify/attestation/batch")
+async def verify_attestation_batch(request: VerifyAttestationBatchRequest):
+    """
+    Xác thực nhiều bằng chứng lô, trả NDJSON theo đúng thứ tự.
+
+    Chạy trong tiến trình API qua crypto executor: phần việc chính chỉ là băm keccak theo bằng
+    chứng và mỗi gốc chỉ khôi phục người ký một lần. Mỗi dòng có `index`, `valid`, `address`,
+    `message_hash` (và `match_expected` nếu có `address`).
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BATCH_MAX_ITEMS} mục mỗi yêu cầu",
+        )
+    items = [_attestation_item(index, item) for index, item in enumerate(request.items)]
+    return await _stream_local_chunks(verify_attestation_items, chunked(items, BATCH_CHUNK_SIZE))
 
 
 @app.post("/api/wallet/verify", response_model=VerifyResponse)
-def verify_signature(request: VerifyRequest):
+async def verify_signature(request: VerifyRequest):
     """Xác thực chữ ký"""
     try:
         personal = request.personal
         match_expected = None
         
         if request.public_key:
-            valid, recovered_address, message_hash = wallet_core.verify_signature_with_public_key(
+            valid, recovered_address, message_hash = await crypto_executor.run_core(
+                "verify_signature_with_public_key",
                 request.message,
                 request.signature,
                 request.public_key,
                 personal,
             )
         else:
-            valid, recovered_address, message_hash = wallet_core.verify_signature(
+            valid, recovered_address, message_hash = await crypto_executor.run_core(
+                "verify_signature",
                 request.message,
                 request.signature,
                 personal,
+                strict=request.strict,
+                require_low_s=request.require_low_s,
             )
         
         if request.address:
-            expected = request.address
-            if not expected.startswith("0x"):
-                expected = f"0x{expected}"
-            try:
-                expected_checksum = to_checksum_address(expected)
-            except Exception:
-                expected_checksum = expected
-            if recovered_address:
-                match_expected = recovered_address.lower() == expected_checksum.lower()
-                if not match_expected:
-                    valid = False
-            else:
-                match_expected = False
-                valid = False
+            match_expected = address_matches(recovered_address, request.address)
+            valid = valid and match_expected
+        
+        allowlisted = None
+        if request.allowlist:
+            allowlisted = _check_allowlist(recovered_address)
+            valid = valid and allowlisted
         
         return VerifyResponse(
             valid=valid,
             address=recovered_address,
             message_hash=message_hash,
             match_expected=match_expected,
+            allowlisted=allowlisted,
         )
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/wallet/sign/file", response_model=SignFileResponse)
+async def sign_file(
+    file: UploadFile = File(...),
+    private_key: Optional[str] = Form(None),
+    address: Optional[str] = Form(None),
+    personal: bool = Form(True),
+):
+    """Ký nội dung file tải lên; file được băm dạng luồng, không nạp cả file vào bộ nhớ"""
+    if bool(private_key) == bool(address):
+        raise HTTPException(status_code=400, detail="Cần đúng một trong hai: private_key hoặc address")
+    _authorize_addresses([address])
+    try:
+        size, message_hash = await _hash_upload(file, personal)
+        if address:
+            result = await crypto_executor.run_core_local("sign_message_hash_with_address", message_hash, address)
+        else:
+            result = await crypto_executor.run_core("sign_message_hash", message_hash, private_key)
+        return SignFileResponse(filename=file.filename, size=size, **result)
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/wallet/verify/file", response_model=VerifyResponse)
+async def verify_file(
+    file: UploadFile = File(...),
+    signature: str = Form(...),
+    address: Optional[str] = Form(None),
+    public_key: Optional[str] = Form(None),
+    personal: bool = Form(True),
+    strict: bool = Form(False),
+    require_low_s: bool = Form(False),
+    use_allowlist: bool = Form(False, alias="allowlist"),
+):
+    """Xác thực chữ ký trên nội dung file tải lên"""
+    try:
+        _, message_hash = await _hash_upload(file, personal)
+        if public_key:
+            valid, recovered_address, message_hash = await crypto_executor.run_core(
+                "verify_message_hash_with_public_key", message_hash, signature, public_key
+            )
+        else:
+            valid, recovered_address, message_hash = await crypto_executor.run_core(
+                "verify_message_hash", message_hash, signature, strict=strict, require_low_s=require_low_s
+            )
+
+        match_expected = None
+        if address:
+            match_expected = address_matches(recovered_address, address)
+            valid = valid and match_expected
+
+        allowlisted = None
+        if use_allowlist:
+            allowlisted = _check_allowlist(recovered_address)
+            valid = valid and allowlisted
+
+        return VerifyResponse(
+            valid=valid,
+            address=recovered_address,
+            message_hash=message_hash,
+            match_expected=match_expected,
+            allowlisted=allowlisted,
+        )
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/wallet/sign/typed", response_model=SignTypedDataResponse)
+async def sign_typed_data(request: SignTypedDataRequest):
+    """Ký typed data EIP-712 (`eth_signTypedData_v4`) bằng khóa riêng hoặc khóa đã mở"""
+    if bool(request.private_key) == bool(request.address):
+        raise HTTPException(status_code=400, detail="Cần đúng một trong hai: private_key hoặc address")
+    _authorize_addresses([request.address])
+    try:
+        if request.address:
+            result = await crypto_executor.run_core_local(
+                "sign_typed_data_with_address", request.typed_data, request.address
+            )
+        else:
+            result = await crypto_executor.run_core("sign_typed_data", request.typed_data, request.private_key)
+        return SignTypedDataResponse(primary_type=request.typed_data.get("primaryType"), **result)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/wallet/sign/typed/batch")
+async def sign_typed_data_batch(request: SignTypedDataBatchRequest):
+    """
+    Ký nhiều typed data EIP-712, trả về NDJSON theo đúng thứ tự (giống /api/wallet/sign/batch).
+
+    Mỗi worker giữ cache schema/domain riêng nên các mục cùng schema trong một lô
+    chỉ biên dịch schema một lần.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BATCH_MAX_ITEMS} mục mỗi yêu cầu",
+        )
+    items = [
+        (index, item.typed_data, item.private_key, item.address)
+        for index, item in enumerate(request.items)
+    ]
+    _authorize_addresses(item.address for item in request.items)
+    chunks = chunked(items, BATCH_CHUNK_SIZE)
+    if any(item.address for item in request.items):
+        # Khóa đã mở chỉ có trong tiến trình API nên ký tại chỗ thay vì qua process pool
+        return await _stream_local_chunks(sign_typed_items, chunks)
+
+    def stream():
+        for results in ordered_imap(get_batch_pool(), sign_typed_chunk, chunks, max_pending=BATCH_WORKERS * 2):
+            yield _ndjson_lines(results)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/wallet/verify/typed", response_model=VerifyResponse)
+async def verify_typed_data(request: VerifyTypedDataRequest):
+    """Xác thực chữ ký EIP-712"""
+    try:
+        if request.public_key:
+            valid, recovered_address, message_hash = await crypto_executor.run_core(
+                "verify_typed_data_with_public_key", request.typed_data, request.signature, request.public_key
+            )
+        else:
+            valid, recovered_address, message_hash = await crypto_executor.run_core(
+                "verify_typed_data",
+                request.typed_data,
+                request.signature,
+                strict=request.strict,
+                require_low_s=request.require_low_s,
+            )
+
+        match_expected = None
+        if request.address:
+            match_expected = address_matches(recovered_address, request.address)
+            valid = valid and match_expected
+
+        allowlisted = None
+        if request.allowlist:
+            allowlisted = _check_allowlist(recovered_address)
+            valid = valid and allowlisted
+
+        return VerifyResponse(
+            valid=valid,
+            address=recovered_address,
+            message_hash=message_hash,
+            match_expected=match_expected,
+            allowlisted=allowlisted,
+        )
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/wallet/verify/typed/batch")
+def verify_typed_data_batch(request: VerifyTypedDataBatchRequest):
+    """
+    Xác thực nhiều chữ ký EIP-712 trên process pool, trả về NDJSON theo đúng thứ tự.
+
+    Mỗi dòng có `index`, `valid`, `address`, `message_hash` (và `match_expected`,
+    `allowlisted` nếu được yêu cầu) hoặc `error` nếu mục đó lỗi.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BATCH_MAX_ITEMS} mục mỗi yêu cầu",
+        )
+    if allowlist is None and any(item.allowlist for item in request.items):
+        raise HTTPException(status_code=400, detail="Server chưa cấu hình allowlist (WALLET_ALLOWLIST)")
+    items = [
+        (index, item.typed_data, item.signature, item.public_key, item.address, item.strict, item.require_low_s)
+        for index, item in enumerate(request.items)
+    ]
+
+    def stream():
+        chunks = chunked(items, BATCH_CHUNK_SIZE)
+        for results in ordered_imap(get_batch_pool(), verify_typed_chunk, chunks, max_pending=BATCH_WORKERS * 2):
+            for result in results:
+                # Allowlist nằm trong tiến trình API nên đối chiếu sau khi worker trả kết quả
+                if request.items[result["index"]].allowlist and "error" not in result:
+                    result["allowlisted"] = _check_allowlist(result["address"])
+                    result["valid"] = result["valid"] and result["allowlisted"]
+            yield "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/wallet/derive")
+async def derive_addresses(request: DeriveRequest):
+    """
+    Dẫn xuất địa chỉ HD {path}/start .. {path}/start+count-1, trả NDJSON theo thứ tự chỉ số.
+
+    Dải lớn được chia lô cho process pool; mỗi worker cache nút cha nên chỉ
+    làm việc ở cấp cuối. Mỗi dòng: {index, path, address, public_key, private_key?}.
+    """
+    if bool(request.mnemonic) == bool(request.seed):
+        raise HTTPException(status_code=400, detail="Cần đúng một trong hai: mnemonic hoặc seed")
+    if request.count < 1 or request.count > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"count phải từ 1 đến {BATCH_MAX_ITEMS}")
+    try:
+        parse_path(request.path)
+        indices = range(request.start, request.start + request.count)
+        if indices.start < 0 or indices.stop > 2 ** 31:
+            raise ValueError("Chỉ số phải nằm trong [0, 2^31)")
+        if request.mnemonic:
+            # PBKDF2 2048 vòng: chạy qua executor, không chặn event loop
+            seed = await crypto_executor.run_local(
+                lambda _core: mnemonic_to_seed(request.mnemonic, request.passphrase)
+            )
+        else:
+            seed = bytes.fromhex(request.seed[2:] if request.seed.startswith("0x") else request.seed)
+    except ExecutorSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tasks = derive_tasks(seed, request.path, indices, "ndjson", request.include_private_key, BATCH_CHUNK_SIZE)
+    if request.count <= BATCH_CHUNK_SIZE:
+        # Một lô: dẫn xuất tại chỗ, cache HD của wallet_core giữ nút cha cho lần gọi sau
+        return await _stream_local_chunks(derive_items, tasks, render=str)
+
+    def stream():
+        yield from ordered_imap(get_batch_pool(), derive_chunk, tasks, max_pending=BATCH_WORKERS * 2)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/siwe/nonce")
+async def siwe_nonce():
+    """Phát nonce dùng một lần cho thông điệp Sign-In with Ethereum"""
+    return {"nonce": nonce_store.issue(), "expires_in": nonce_store.ttl}
+
+
+@app.post("/api/siwe/parse")
+async def siwe_parse(request: SiweParseRequest):
+    """Phân tích thông điệp EIP-4361, trả các trường hoặc lỗi cú pháp"""
+    try:
+        return SiweMessage.parse(request.message).to_dict()
+    except SiweError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/siwe/verify")
+async def siwe_verify(request: SiweVerifyRequest):
+    """
+    Xác thực đăng nhập: cú pháp, người ký (personal_sign), domain, thời hạn rồi mới tiêu thụ nonce.
+
+    Nonce chỉ bị dùng khi mọi kiểm tra khác đã qua, nên chữ ký rác không đốt được nonce hợp lệ.
+    Thông điệp sai cú pháp trả 400; kiểm tra không qua trả valid=false kèm error. Domain so với
+    WALLET_SIWE_DOMAIN của máy chủ, chưa cấu hình thì trả 503.
+    """
+    if not SIWE_DOMAINS:
+        raise HTTPException(status_code=503, detail="Máy chủ chưa cấu hình WALLET_SIWE_DOMAIN, không xác thực đăng nhập")
+    try:
+        message = SiweMessage.parse(request.message)
+    except SiweError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        _, recovered_address, _ = await crypto_executor.run_core(
+            "verify_signature", request.message, request.signature
+        )
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    error = None
+    try:
+        message.check(recovered_address, SIWE_DOMAINS)
+        if not nonce_store.consume(message.nonce):
+            raise SiweError("Nonce không hợp lệ, đã dùng hoặc đã hết hạn")
+    except SiweError as e:
+        error = str(e)
+    return {"valid": error is None, "address": recovered_address, "error": error, "message": message.to_dict()}
+
+
+@app.post("/api/keystore/create")
+async def create_keystore(request: KeystoreCreateRequest):
+    """Mã hóa khóa riêng (hoặc khóa mới sinh) thành keystore V3"""
+    try:
+        private_key = request.private_key
+        if not private_key:
+            private_key, _, _ = await crypto_executor.run_core("generate_keypair")
+        keystore = await crypto_executor.run_core("create_keystore", private_key, request.password, request.kdf)
+        return {"address": to_checksum_address(keystore["address"]), "keystore": keystore}
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/keystore/unlock")
+async def unlock_keystore(request: KeystoreUnlockRequest):
+    """
+    Giải mã keystore một lần, giữ khóa trong bộ nhớ `ttl` giây để ký theo địa chỉ.
+
+    Trả `session_token`: mọi yêu cầu ký theo địa chỉ này, `lock` và `sessions` phải gửi kèm
+    header X-Wallet-Session; mở khóa lại cùng địa chỉ cấp token mới và vô hiệu token cũ.
+    """
+    token = new_session_token()
+    try:
+        address = await crypto_executor.run_core_local(
+            "unlock_keystore", request.keystore, request.password, request.ttl, token
+        )
+        return {"address": address, "expires_in": request.ttl, "session_token": token}
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/keystore/lock")
+async def lock_keystore(request: KeystoreLockRequest):
+    """Khóa lại một địa chỉ hoặc tất cả phiên của token trong X-Wallet-Session"""
+    return {"locked": wallet_core.lock(request.address, _require_session())}
+
+
+@app.get("/api/keystore/sessions")
+async def keystore_sessions():
+    """Các địa chỉ đang mở khóa bằng token trong X-Wallet-Session và số giây còn lại"""
+    return {"sessions": wallet_core.unlocked_sessions(_require_session())}
+
+
+def _check_admin(request: Request):
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling chưa bật (WALLET_PROFILING=1)")
+    if ADMIN_TOKEN is not None and request.headers.get("x-wallet-admin-token") != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Sai hoặc thiếu X-Wallet-Admin-Token")
+
+
+@app.get("/api/admin/profile")
+async def get_profile(request: Request, sort: str = "cumulative", limit: int = 30, format: str = "json"):
+    """
+    Profile gộp của các yêu cầu đã chọn: `format=json` (theo route + hàm đứng đầu),
+    `text` (bảng pstats) hoặc `pstats` (file .prof cho pstats/snakeviz)
+    """
+    _check_admin(request)
+    try:
+        if format == "pstats":
+            return Response(
+                profiler.dump(),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="wallet-api.prof"'},
+            )
+        if format == "text":
+            return PlainTextResponse(profiler.text(sort, limit))
+        if format != "json":
+            raise ValueError("format phải là json, text hoặc pstats")
+        return profiler.report(sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/admin/profile")
+async def update_profile(request: Request, settings: ProfileSettingsRequest):
+    """Đổi tỉ lệ lấy mẫu và/hoặc xóa kết quả đã gộp, không cần khởi động lại"""
+    _check_admin(request)
+    if settings.sample_rate is not None:
+        try:
+            profiler.sample_rate = settings.sample_rate
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if settings.reset:
+        profiler.reset()
+    return {"enabled": profiler.enabled, "sample_rate": profiler.sample_rate, "requests": profiler.requests}
+
+
+# op trên kênh WebSocket -> (route REST tương ứng, model params); kết quả và lỗi giống hệt REST
+_WS_HANDLERS = {
+    "generate": (generate_wallet, None),
+    "sign": (sign_message, SignRequest),
+    "verify": (verify_signature, VerifyRequest),
+    "sign_typed": (sign_typed_data, SignTypedDataRequest),
+    "verify_typed": (verify_typed_data, VerifyTypedDataRequest),
+}
+
+
+async def _ws_dispatch(op: str, params: dict) -> dict:
+    handler, model = _WS_HANDLERS[op]
+    response = await (handler(model(**params)) if model is not None else handler())
+    return response.model_dump()
+
+
+@app.websocket("/api/ws")
+async def wallet_channel(websocket: WebSocket):
+    """
+    Kênh WebSocket cho yêu cầu ký/xác thực/tạo ví gửi liên tiếp (xem ws_protocol.py).
+
+    Mỗi frame chạy thành một task riêng qua cùng executor với REST và được trả lời ngay khi xong,
+    nên phản hồi có thể về khác thứ tự gửi (ghép bằng `id`). Mỗi kết nối xử lý tối đa
+    WALLET_WS_MAX_IN_FLIGHT frame cùng lúc; đủ số đó thì ngừng đọc frame mới cho tới khi có
+    frame xong, áp lực ngược về client qua TCP thay vì xếp hàng vô hạn trong bộ nhớ.
+    """
+    await websocket.accept()
+    WS_CONNECTIONS.inc()
+    slots = asyncio.Semaphore(WS_MAX_IN_FLIGHT)
+    send_lock = asyncio.Lock()
+    tasks = set()
+
+    async def reply(frame: dict, encoding: str):
+        data = encode(frame, encoding)
+        async with send_lock:
+            if encoding == ENCODING_MSGPACK:
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data)
+
+    async def handle(frame_id, op: str, params: dict, encoding: str):
+        status = 200
+        try:
+            try:
+                frame = result_frame(frame_id, await _ws_dispatch(op, params))
+            except ExecutorSaturated as e:
+                status = 503
+                frame = error_frame(frame_id, status, str(e), e.retry_after)
+            except HTTPException as e:
+                status = e.status_code
+                frame = error_frame(frame_id, status, e.detail)
+            except ValidationError as e:
+                status = 422
+                frame = error_frame(frame_id, status, json.loads(e.json(include_url=False)))
+            except Exception as e:
+                status = 500
+                frame = error_frame(frame_id, status, str(e))
+            await reply(frame, encoding)
+        finally:
+            WS_FRAMES.inc((op, str(status)))
+            WS_IN_FLIGHT.dec()
+            slots.release()
+
+    try:
+        while True:
+            await slots.acquire()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("text")
+            encoding = ENCODING_JSON
+            if data is None:
+                data = message.get("bytes") or b""
+                encoding = ENCODING_MSGPACK
+            try:
+                frame_id, op, params = parse_request(decode(data))
+            except FrameError as e:
+                slots.release()
+                WS_FRAMES.inc(("invalid", str(e.status)))
+                await reply(error_frame(e.id, e.status, str(e)), encoding if msgpack_available() else ENCODING_JSON)
+                continue
+            WS_IN_FLIGHT.inc()
+            task = asyncio.create_task(handle(frame_id, op, params, encoding))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Client đã đi: bỏ các frame chưa xong (tác vụ đã vào executor vẫn chạy hết)
+        for task in list(tasks):
+            task.cancel()
+        WS_CONNECTIONS.dec()
+
+
+async def _hash_upload(upload: UploadFile, personal: bool):
+    """Băm file tải lên theo từng khối trong threadpool, trả về (kích thước, hash)"""
+    f = upload.file
+    size = upload.size
+    if size is None:
+        size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    chunks = iter(lambda: f.read(HASH_CHUNK_SIZE), b"")
+    message_hash = await run_in_threadpool(wallet_core.hash_stream, chunks, size, personal)
+    return size, message_hash
+
+
+def _check_allowlist(recovered_address: Optional[str]) -> bool:
+    """Địa chỉ khôi phục có trong allowlist của server không"""
+    if allowlist is None:
+        raise ValueError("Server chưa cấu hình allowlist (WALLET_ALLOWLIST)")
+    return bool(recovered_address) and allowlist.contains(recovered_address)
+
+
 @app.get("/api/wallet/address/{private_key}")
-def get_address_from_private_key(private_key: str):
+async def get_address_from_private_key(private_key: str):
     """Lấy địa chỉ Ethereum từ khóa riêng"""
     try:
-        address = wallet_core.private_key_to_address(private_key)
+        address = await crypto_executor.run_core("private_key_to_address", private_key)
         return {"address": address}
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    parser = argparse.ArgumentParser(description="Chạy API Ví Ethereum")
+    parser.add_argument("--host", default=os.environ.get("WALLET_API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("WALLET_API_PORT", 8000)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WALLET_API_WORKERS", 1)),
+        help="Số tiến trình uvicorn (mỗi tiến trình có executor riêng)",
+    )
+    args = parser.parse_args()
+    
+    # Chỉ cần kho nonce dùng chung khi bật SIWE; không đặt WALLET_SIWE_DOMAIN thì /api/siwe/verify luôn từ chối
+    if args.workers > 1 and parse_domains(os.environ.get("WALLET_SIWE_DOMAIN")) and not os.environ.get("WALLET_SIWE_DB"):
+        parser.error("--workers > 1 với WALLET_SIWE_DOMAIN cần WALLET_SIWE_DB (kho nonce SIWE dùng chung giữa các worker)")
+    
+    if args.workers > 1:
+        # Worker kế thừa biến môi trường: kho nonce SQLite chạy ở chế độ dùng chung
+        os.environ["WALLET_API_WORKERS"] = str(args.workers)
+        # Nhiều tiến trình cần import string để uvicorn tự khởi tạo app trong từng worker
+        uvicorn.run(
+            "app:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+        )
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
 
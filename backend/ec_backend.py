@@ -0,0 +1,187 @@
+"""
+Backend đường cong elliptic secp256k1
+Chọn giữa bản Python thuần và bản native (coincurve/libsecp256k1)
+"""
+import logging
+import os
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from eth_keys import KeyAPI, keys
+from eth_keys.backends import CoinCurveECCBackend, NativeECCBackend
+from eth_keys.backends.base import BaseECCBackend
+from eth_keys.backends.native.ecdsa import private_key_to_public_key
+
+from batch_recover import recover_public_keys
+from fixed_base import FixedBaseECCBackend, get_generator_table
+
+logger = logging.getLogger(__name__)
+
+# Biến môi trường để ép dùng một backend: auto | coincurve | python
+BACKEND_ENV_VAR = "WALLET_EC_BACKEND"
+
+
+class ECBackend:
+    """
+    Lớp cơ sở cho backend ECDSA.
+
+    Mọi khóa/chữ ký do backend tạo ra đều gắn với cùng một đối tượng
+    `eth_keys` backend, nên ký, khôi phục và xác thực chạy trên cùng cài đặt.
+    """
+
+    name = "base"
+    ecc_backend_class: Type[BaseECCBackend] = BaseECCBackend
+
+    def __init__(self):
+        self.ecc = self.ecc_backend_class()
+        self.keys = KeyAPI(backend=self.ecc)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def private_key(self, private_key_bytes: bytes) -> keys.PrivateKey:
+        return keys.PrivateKey(private_key_bytes, backend=self.ecc)
+
+    def public_key(self, public_key_bytes: bytes) -> keys.PublicKey:
+        return keys.PublicKey(public_key_bytes, backend=self.ecc)
+
+    def signature(self, signature_bytes: bytes) -> keys.Signature:
+        return keys.Signature(signature_bytes, backend=self.ecc)
+
+    def public_key_bytes(self, private_key_bytes: bytes) -> bytes:
+        """Dẫn xuất khóa công khai 64 byte (lớp con dùng đường tắt không qua eth_keys)"""
+        return self.private_key(private_key_bytes).public_key.to_bytes()
+
+    def signer(self, private_key: keys.PrivateKey) -> Callable[[bytes], bytes]:
+        """Hàm ký hash 32 byte -> chữ ký 65 byte (r ‖ s ‖ v) cho nhiều lần ký cùng khóa"""
+        return lambda message_hash: private_key.sign_msg_hash(message_hash).to_bytes()
+
+    def recover_batch(
+        self,
+        message_hashes: Sequence[bytes],
+        signatures: Sequence[bytes],
+    ) -> List[Tuple[Optional[bytes], Optional[str]]]:
+        """
+        Khôi phục khóa công khai cho một lô chữ ký 65 byte.
+
+        Returns:
+            list: theo thứ tự đầu vào, (khóa công khai 64 byte, None) hoặc (None, lỗi)
+        """
+        if len(message_hashes) != len(signatures):
+            raise ValueError("Số hash và số chữ ký phải bằng nhau")
+        results = []
+        for message_hash, signature_bytes in zip(message_hashes, signatures):
+            try:
+                public_key = self.signature(signature_bytes).recover_public_key_from_msg_hash(message_hash)
+                results.append((public_key.to_bytes(), None))
+            except Exception as e:
+                results.append((None, str(e) or type(e).__name__))
+        return results
+
+
+class PythonBackend(ECBackend):
+    """
+    Cài đặt thuần Python của eth_keys (luôn khả dụng).
+
+    Mặc định nhân điểm sinh bằng bảng fixed-base (xem `fixed_base`);
+    WALLET_EC_WINDOW=0 quay về đúng NativeECCBackend gốc.
+    """
+
+    name = "python"
+    ecc_backend_class = NativeECCBackend
+
+    def __init__(self, window: Optional[int] = None):
+        self.table = get_generator_table(window)
+        self.ecc = FixedBaseECCBackend(self.table) if self.table is not None else NativeECCBackend()
+        self.keys = KeyAPI(backend=self.ecc)
+
+    @property
+    def window(self) -> int:
+        return self.table.window if self.table is not None else 0
+
+    def public_key_bytes(self, private_key_bytes: bytes) -> bytes:
+        if self.table is not None:
+            return self.ecc.public_key_bytes(private_key_bytes)
+        return private_key_to_public_key(private_key_bytes)
+
+    def recover_batch(
+        self,
+        message_hashes: Sequence[bytes],
+        signatures: Sequence[bytes],
+    ) -> List[Tuple[Optional[bytes], Optional[str]]]:
+        """Khôi phục cả lô bằng `batch_recover` (nghịch đảo gộp, GLV + wNAF) thay cho vòng lặp từng chữ ký"""
+        return recover_public_keys(message_hashes, signatures)
+
+
+class CoinCurveBackend(ECBackend):
+    """Cài đặt native qua coincurve (libsecp256k1); `recover_batch` gọi libsecp256k1 cho từng chữ ký"""
+
+    name = "coincurve"
+    ecc_backend_class = CoinCurveECCBackend
+
+    def __init__(self):
+        super().__init__()
+        import coincurve
+        self._from_secret = coincurve.PublicKey.from_secret
+        self._private_key_class = coincurve.PrivateKey
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import coincurve  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def public_key_bytes(self, private_key_bytes: bytes) -> bytes:
+        return self._from_secret(private_key_bytes).format(compressed=False)[1:]
+
+    def signer(self, private_key: keys.PrivateKey) -> Callable[[bytes], bytes]:
+        # eth_keys dựng lại khóa libsecp256k1 (kèm khóa công khai) ở mỗi lần ký; giữ một khóa cho cả loạt
+        return partial(self._private_key_class(private_key.to_bytes()).sign_recoverable, hasher=None)
+
+
+BACKENDS: Dict[str, Type[ECBackend]] = {
+    CoinCurveBackend.name: CoinCurveBackend,
+    PythonBackend.name: PythonBackend,
+}
+
+# Thứ tự ưu tiên khi tự chọn: nhanh nhất trước
+PREFERENCE = (CoinCurveBackend.name, PythonBackend.name)
+
+
+def available_backends() -> list:
+    """Danh sách tên backend có thể dùng trên máy hiện tại"""
+    return [name for name in PREFERENCE if BACKENDS[name].is_available()]
+
+
+def load_backend(name: Optional[str] = None) -> ECBackend:
+    """
+    Khởi tạo backend theo tên, biến môi trường hoặc tự chọn.
+
+    Args:
+        name: "coincurve", "python" hoặc "auto"/None (đọc WALLET_EC_BACKEND,
+              mặc định chọn backend nhanh nhất đang có)
+
+    Raises:
+        ValueError: tên backend không hợp lệ
+        RuntimeError: backend được yêu cầu không khả dụng
+    """
+    if name is None:
+        name = os.environ.get(BACKEND_ENV_VAR, "auto")
+    name = name.strip().lower()
+
+    if name == "auto":
+        name = available_backends()[0]
+    elif name not in BACKENDS:
+        raise ValueError(
+            f"EC backend không hợp lệ: {name} (chọn một trong: auto, {', '.join(PREFERENCE)})"
+        )
+    elif not BACKENDS[name].is_available():
+        raise RuntimeError(f"EC backend '{name}' không khả dụng trên máy này")
+
+    backend = BACKENDS[name]()
+    window = getattr(backend, "window", None)
+    logger.info("EC backend đang dùng: %s%s", backend.name, f" (bảng fixed-base cửa sổ {window})" if window else "")
+    return backend
@@ -0,0 +1,173 @@
+"""
+Executor riêng cho tác vụ mật mã của API
+Số worker và độ dài hàng đợi có giới hạn; đầy thì từ chối ngay thay vì xếp hàng vô hạn
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from wallet_core import WalletCore
+from parallel import call_core, call_core_observed, default_workers
+from profiling import profiled
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class ExecutorSaturated(Exception):
+    """Hàng đợi executor đã đầy, client nên thử lại sau `retry_after` giây"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Máy chủ đang quá tải, vui lòng thử lại sau")
+        self.retry_after = retry_after
+
+
+class CryptoExecutor:
+    """
+    Chạy các phương thức WalletCore trên thread pool hoặc process pool.
+
+    Tối đa `workers` tác vụ chạy cùng lúc và `queue_size` tác vụ chờ; tác vụ
+    vượt quá sức chứa bị từ chối bằng `ExecutorSaturated` để API trả 503.
+    Tác vụ chạy trong tiến trình API được profile khi yêu cầu gửi nó được chọn
+    (xem profiling.py); tác vụ gửi sang process pool thì không, nhưng thời gian
+    từng bước trong worker vẫn được gửi về observer của `core`.
+    """
+
+    def __init__(
+        self,
+        core: WalletCore,
+        kind: str = "thread",
+        workers: Optional[int] = None,
+        queue_size: int = 64,
+        retry_after: int = 1,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Loại executor không hợp lệ: {kind} (chọn thread hoặc process)")
+        self.core = core
+        self.kind = kind
+        self.workers = workers or default_workers()
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.rejected = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._local_pool = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def in_flight(self) -> int:
+        """Số tác vụ đã nhận (đang chạy + đang chờ)"""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Số tác vụ đang chờ worker rảnh"""
+        return max(0, self._pending - self.workers)
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crypto")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._local_pool is not None:
+            self._local_pool.shutdown(wait=False, cancel_futures=True)
+            self._local_pool = None
+
+    def submit_core(self, method: str, *args: Any, **kwargs: Any) -> Future:
+        """Gửi một lời gọi `WalletCore.<method>`; ném ExecutorSaturated nếu đã đầy"""
+        self.start()
+        if self.kind == "process":
+            if self.core.observer is None:
+                return self._submit(self._pool, call_core, method, args, kwargs)
+            return self._observed(self._submit(self._pool, call_core_observed, method, args, kwargs))
+        return self._submit(self._pool, profiled(getattr(self.core, method)), *args, **kwargs)
+
+    def submit_core_local(self, method: str, *args: Any, **kwargs: Any) -> Future:
+        """
+        Như `submit_core` nhưng luôn chạy trên `self.core` của tiến trình API.
+
+        Dùng cho thao tác cần trạng thái của tiến trình này (ví dụ khóa đã
+        mở bằng keystore); ở chế độ process chạy trên thread pool phụ,
+        vẫn tính chung sức chứa với các tác vụ khác.
+        """
+        return self._submit(self._local(), profiled(getattr(self.core, method)), *args, **kwargs)
+
+    def submit_local(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        Chạy `fn(self.core, *args, **kwargs)` trong tiến trình API, cùng sức chứa như `submit_core_local`.
+
+        Dùng cho các hàm xử lý lô của parallel.py (nhận WalletCore làm tham số đầu).
+        """
+        return self._submit(self._local(), profiled(fn), self.core, *args, **kwargs)
+
+    async def run_core(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Chạy `WalletCore.<method>` mà không chặn event loop"""
+        return await asyncio.wrap_future(self.submit_core(method, *args, **kwargs))
+
+    async def run_core_local(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Chạy `WalletCore.<method>` trong tiến trình API mà không chặn event loop"""
+        return await asyncio.wrap_future(self.submit_core_local(method, *args, **kwargs))
+
+    async def run_local(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Chạy `fn(self.core, ...)` trong tiến trình API mà không chặn event loop"""
+        return await asyncio.wrap_future(self.submit_local(fn, *args, **kwargs))
+
+    def _local(self):
+        """Pool cho tác vụ phải chạy trên `self.core`; ở chế độ process là thread pool phụ"""
+        self.start()
+        if self.kind != "process":
+            return self._pool
+        with self._lock:
+            if self._local_pool is None:
+                self._local_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crypto-local")
+        return self._local_pool
+
+    def _observed(self, future: Future) -> Future:
+        """Future kết quả của `call_core_observed`; thời gian từng bước trong worker được báo cho `self.core.observer`"""
+        result = Future()
+
+        def done(future: Future) -> None:
+            try:
+                value, spans = future.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            for operation, seconds in spans:
+                self.core.observer(operation, seconds)
+            result.set_result(value)
+
+        future.add_done_callback(done)
+        return result
+
+    def _submit(self, pool, fn, *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(self.retry_after)
+            self._pending += 1
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
@@ -0,0 +1,300 @@
+"""
+Nhân điểm sinh G bằng bảng tính sẵn (fixed-base comb) cho backend Python thuần
+Bảng gồm d·2^(w·i)·G cho mọi cửa sổ w bit, nên k·G chỉ cần ~256/w phép cộng, không phép nhân đôi
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+from eth_keys.backends.native.ecdsa import deterministic_generate_k, encode_raw_public_key
+from eth_keys.backends.native.jacobian import (
+    is_identity,
+    jacobian_add,
+    jacobian_double,
+    jacobian_multiply,
+)
+from eth_keys.backends.native.main import NativeECCBackend
+from eth_keys.constants import SECPK1_B as B, SECPK1_G as G, SECPK1_N as N, SECPK1_P as P
+from eth_keys.datatypes import NonRecoverableSignature, PublicKey, Signature
+from eth_keys.exceptions import BadSignature
+
+# Biến môi trường: độ rộng cửa sổ (0 để tắt bảng) và file cache bảng
+WINDOW_ENV_VAR = "WALLET_EC_WINDOW"
+TABLE_CACHE_ENV_VAR = "WALLET_EC_TABLE_CACHE"
+DEFAULT_WINDOW = 8
+MAX_WINDOW = 16
+
+MAGIC = b"WALGTAB1"
+# magic, độ rộng cửa sổ, dự phòng, BLAKE2b của phần điểm
+HEADER = struct.Struct("<8sII32s")
+POINT_SIZE = 64
+
+IDENTITY = (0, 0, 1)
+
+Jacobian = Tuple[int, int, int]
+
+
+class GeneratorTable:
+    """
+    Bảng bội số của G theo cửa sổ `window` bit.
+
+    Hàng i chứa d·2^(window·i)·G với d = 1 .. 2^window - 1, lưu dạng affine
+    (x, y) 64 byte liên tiếp trong một buffer (bytes hoặc mmap), chỉ giải mã
+    điểm khi dùng. Bộ nhớ ~ 64 · ceil(256/w) · (2^w - 1) byte: w=4 ~ 60 KiB,
+    w=8 ~ 510 KiB, w=12 ~ 5.5 MiB, w=16 ~ 64 MiB.
+    """
+
+    def __init__(self, window: int, points):
+        self.window = window
+        self.rows = -(-256 // window)
+        self.row_size = (1 << window) - 1
+        self._points = points
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._points)
+
+    @classmethod
+    def build(cls, window: int) -> "GeneratorTable":
+        """Tính bảng trong bộ nhớ; chuẩn hóa affine toàn bộ bằng một phép nghịch đảo (Montgomery)"""
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f"Độ rộng cửa sổ phải trong khoảng 1..{MAX_WINDOW}")
+        rows = -(-256 // window)
+        row_size = (1 << window) - 1
+
+        points = []
+        base = (G[0], G[1], 1)
+        for _ in range(rows):
+            point = base
+            points.append(point)
+            for _ in range(row_size - 1):
+                point = jacobian_add(point, base)
+                points.append(point)
+            # Cơ sở của hàng kế tiếp: 2^w · base = (2^w - 1) · base + base
+            base = jacobian_add(point, base)
+
+        # Batch inversion: prefix[i] = z0·z1·…·z(i-1)
+        prefix = [1] * (len(points) + 1)
+        for i, point in enumerate(points):
+            prefix[i + 1] = prefix[i] * point[2] % P
+        inverse = pow(prefix[-1], -1, P)
+        buffer = bytearray(len(points) * POINT_SIZE)
+        for i in range(len(points) - 1, -1, -1):
+            x, y, z = points[i]
+            z_inv = inverse * prefix[i] % P
+            inverse = inverse * z % P
+            z_inv2 = z_inv * z_inv % P
+            offset = i * POINT_SIZE
+            buffer[offset:offset + 32] = (x * z_inv2 % P).to_bytes(32, "big")
+            buffer[offset + 32:offset + 64] = (y * z_inv2 * z_inv % P).to_bytes(32, "big")
+        return cls(window, bytes(buffer))
+
+    @classmethod
+    def load(cls, path: str, window: int) -> "GeneratorTable":
+        """Mở bảng đã lưu bằng mmap; ném ValueError nếu file sai cửa sổ hoặc hỏng"""
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, stored_window, _, digest = HEADER.unpack_from(data, 0) if len(data) >= HEADER.size else (b"", 0, 0, b"")
+        expected_size = HEADER.size + -(-256 // window) * ((1 << window) - 1) * POINT_SIZE
+        valid = magic == MAGIC and stored_window == window and len(data) == expected_size
+        if valid:
+            # Điểm sai trong bảng sẽ sinh khóa/chữ ký sai nên luôn kiểm tra toàn vẹn
+            with memoryview(data) as view, view[HEADER.size:] as points:
+                valid = hashlib.blake2b(points, digest_size=32).digest() == digest
+        if not valid:
+            data.close()
+            raise ValueError(f"File bảng không khớp cửa sổ {window} hoặc bị hỏng: {path}")
+
+        table = cls(window, memoryview(data)[HEADER.size:])
+        if table.point(0, 1) != G:
+            raise ValueError(f"File bảng bị hỏng: {path}")
+        return table
+
+    def save(self, path: str) -> None:
+        """Ghi bảng ra file (ghi file tạm rồi đổi tên)"""
+        digest = hashlib.blake2b(self._points, digest_size=32).digest()
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.window, 0, digest))
+            f.write(self._points)
+        os.replace(tmp_path, path)
+
+    def point(self, row: int, digit: int) -> Tuple[int, int]:
+        offset = (row * self.row_size + digit - 1) * POINT_SIZE
+        points = self._points
+        return (
+            int.from_bytes(points[offset:offset + 32], "big"),
+            int.from_bytes(points[offset + 32:offset + 64], "big"),
+        )
+
+    def multiply_jacobian(self, k: int) -> Jacobian:
+        """k·G dạng Jacobian (IDENTITY nếu k ≡ 0 mod n)"""
+        k %= N
+        window = self.window
+        mask = self.row_size
+        points = self._points
+        from_bytes = int.from_bytes
+
+        X = Y = Z = 0
+        offset_base = -POINT_SIZE
+        while k:
+            digit = k & mask
+            if digit:
+                offset = offset_base + digit * POINT_SIZE
+                x2 = from_bytes(points[offset:offset + 32], "big")
+                y2 = from_bytes(points[offset + 32:offset + 64], "big")
+                if not Z:
+                    X, Y, Z = x2, y2, 1
+                else:
+                    # Cộng hỗn hợp Jacobian + affine (Z2 = 1)
+                    Z_sq = Z * Z % P
+                    H = (x2 * Z_sq - X) % P
+                    R = (y2 * Z_sq * Z - Y) % P
+                    if not H:
+                        if R:
+                            X = Y = Z = 0
+                        else:
+                            X, Y, Z = jacobian_double((X, Y, Z))
+                    else:
+                        H_sq = H * H % P
+                        H_cu = H * H_sq % P
+                        X_H_sq = X * H_sq % P
+                        X = (R * R - H_cu - 2 * X_H_sq) % P
+                        Y = (R * (X_H_sq - X) - Y * H_cu) % P
+                        Z = Z * H % P
+            k >>= window
+            offset_base += mask * POINT_SIZE
+        return (X, Y, Z) if Z else IDENTITY
+
+    def multiply(self, k: int) -> Tuple[int, int]:
+        """k·G dạng affine (x, y)"""
+        return to_affine(self.multiply_jacobian(k))
+
+
+def to_affine(point: Jacobian) -> Tuple[int, int]:
+    """Như `from_jacobian` của eth_keys nhưng nghịch đảo bằng pow() (cài đặt C)"""
+    x, y, z = point
+    if not z:
+        return 0, 0
+    z_inv = pow(z, -1, P)
+    z_inv2 = z_inv * z_inv % P
+    return x * z_inv2 % P, y * z_inv2 * z_inv % P
+
+
+_tables: Dict[int, GeneratorTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_generator_table(window: Optional[int] = None, cache_path: Optional[str] = None) -> Optional[GeneratorTable]:
+    """
+    Bảng dùng chung trong tiến trình, tạo một lần cho mỗi độ rộng cửa sổ.
+
+    Args:
+        window: độ rộng cửa sổ (mặc định đọc WALLET_EC_WINDOW, 8); 0 để tắt
+        cache_path: file cache (mặc định đọc WALLET_EC_TABLE_CACHE); nếu có thì
+            mmap file khi hợp lệ, ngược lại tính bảng rồi ghi ra file
+    """
+    if window is None:
+        window = int(os.environ.get(WINDOW_ENV_VAR, DEFAULT_WINDOW))
+    if window == 0:
+        return None
+    if cache_path is None:
+        cache_path = os.environ.get(TABLE_CACHE_ENV_VAR) or None
+
+    with _tables_lock:
+        table = _tables.get(window)
+        if table is not None:
+            return table
+        table = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                table = GeneratorTable.load(cache_path, window)
+            except (OSError, ValueError):
+                table = None
+        if table is None:
+            table = GeneratorTable.build(window)
+            if cache_path:
+                try:
+                    table.save(cache_path)
+                except OSError:
+                    pass
+        _tables[window] = table
+        return table
+
+
+class FixedBaseECCBackend(NativeECCBackend):
+    """
+    Backend eth_keys thuần Python dùng bảng điểm sinh cho mọi phép nhân với G.
+
+    Thuật toán ký (RFC 6979, chuẩn hóa low-s) giữ nguyên như NativeECCBackend
+    nên chữ ký giống hệt từng byte; chỉ phép nhân k·G được thay bằng tra bảng.
+    """
+
+    def __init__(self, table: GeneratorTable):
+        self.table = table
+
+    def _raw_sign(self, msg_hash: bytes, private_key_bytes: bytes) -> Tuple[int, int, int]:
+        z = int.from_bytes(msg_hash, "big")
+        k = deterministic_generate_k(msg_hash, private_key_bytes)
+
+        r, y = self.table.multiply(k)
+        s_raw = pow(k, -1, N) * (z + r * int.from_bytes(private_key_bytes, "big")) % N
+
+        v = (y % 2) ^ (0 if s_raw * 2 < N else 1)
+        s = s_raw if s_raw * 2 < N else N - s_raw
+        return v, r, s
+
+    def ecdsa_sign(self, msg_hash: bytes, private_key) -> Signature:
+        return Signature(vrs=self._raw_sign(msg_hash, private_key.to_bytes()), backend=self)
+
+    def ecdsa_sign_non_recoverable(self, msg_hash: bytes, private_key) -> NonRecoverableSignature:
+        _, r, s = self._raw_sign(msg_hash, private_key.to_bytes())
+        return NonRecoverableSignature(rs=(r, s), backend=self)
+
+    def ecdsa_verify(self, msg_hash: bytes, signature, public_key) -> bool:
+        r, s = signature.rs
+        if not (r % N and s % N):
+            return False
+        public_key_bytes = public_key.to_bytes()
+        point = (int.from_bytes(public_key_bytes[:32], "big"), int.from_bytes(public_key_bytes[32:], "big"), 1)
+
+        w = pow(s, -1, N)
+        z = int.from_bytes(msg_hash, "big")
+        total = jacobian_add(self.table.multiply_jacobian(z * w % N), jacobian_multiply(point, r * w % N))
+        x, _ = to_affine(total)
+        return r == x
+
+    def ecdsa_recover(self, msg_hash: bytes, signature) -> PublicKey:
+        v, r, s = signature.vrs
+        if not 0 <= v <= 7:
+            raise BadSignature("%d must in range 27-31" % (v + 27))
+
+        x = r
+        x_cubed_b = (x * x * x + B) % P
+        beta = pow(x_cubed_b, (P + 1) // 4, P)
+        y = beta if (v + 27) % 2 ^ beta % 2 else (P - beta)
+        if (x_cubed_b - y * y) % P != 0 or not (r % N) or not (s % N):
+            raise BadSignature("Invalid signature")
+
+        # Q = r⁻¹(s·R - z·G) = (-z·r⁻¹)·G + (s·r⁻¹)·R: phần G tra bảng, chỉ một phép nhân biến đổi
+        z = int.from_bytes(msg_hash, "big")
+        r_inv = pow(r, -1, N)
+        Q = jacobian_add(
+            self.table.multiply_jacobian(-z * r_inv % N),
+            jacobian_multiply((x, y, 1), s * r_inv % N),
+        )
+        if is_identity(Q):
+            raise BadSignature("InvalidSignature")
+        return PublicKey(encode_raw_public_key(to_affine(Q)), backend=self)
+
+    def private_key_to_public_key(self, private_key) -> PublicKey:
+        return PublicKey(self.public_key_bytes(private_key.to_bytes()), backend=self)
+
+    def public_key_bytes(self, private_key_bytes: bytes) -> bytes:
+        k = int.from_bytes(private_key_bytes, "big")
+        if k >= N:
+            raise Exception("Invalid privkey")
+        return encode_raw_public_key(self.table.multiply(k))
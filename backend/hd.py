@@ -0,0 +1,203 @@
+"""
+Ví phân cấp tất định (HD): seed BIP-39, dẫn xuất khóa BIP-32, đường dẫn BIP-44
+Nút trung gian của đường dẫn được cache nên dẫn xuất một dải chỉ số chỉ còn
+một HMAC-SHA512 và một phép nhân điểm cho mỗi khóa con ở cấp cuối
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from eth_keys.constants import SECPK1_N
+
+HARDENED = 0x80000000
+# Cấp cha của địa chỉ nhận tiền Ethereum theo BIP-44 (m/44'/60'/account'/change)
+DEFAULT_PATH = "m/44'/60'/0'/0"
+DEFAULT_NODE_CACHE_SIZE = 64
+PBKDF2_ROUNDS = 2048
+MNEMONIC_WORD_COUNTS = (12, 15, 18, 21, 24)
+
+Path = Tuple[int, ...]
+
+
+def mnemonic_to_seed(mnemonic: str, passphrase: str = "") -> bytes:
+    """
+    Seed 64 byte theo BIP-39: PBKDF2-HMAC-SHA512 (2048 vòng) trên cụm từ đã chuẩn hóa NFKD.
+
+    Chỉ kiểm tra số từ; checksum của cụm từ cần danh sách từ BIP-39 nên không được xác thực ở đây.
+
+    Raises:
+        ValueError: số từ không thuộc 12/15/18/21/24
+    """
+    words = unicodedata.normalize("NFKD", mnemonic).split()
+    if len(words) not in MNEMONIC_WORD_COUNTS:
+        raise ValueError(f"Cụm từ ghi nhớ phải có 12/15/18/21/24 từ (nhận {len(words)})")
+    salt = "mnemonic" + unicodedata.normalize("NFKD", passphrase)
+    return hashlib.pbkdf2_hmac("sha512", " ".join(words).encode("utf-8"), salt.encode("utf-8"), PBKDF2_ROUNDS)
+
+
+def parse_path(path: str) -> Path:
+    """
+    Đọc đường dẫn BIP-32 như "m/44'/60'/0'/0" (hardened viết ' hoặc h)
+
+    Raises:
+        ValueError: đường dẫn sai cú pháp hoặc chỉ số vượt 2^31 - 1
+    """
+    parts = path.strip().split("/")
+    if parts[0] not in ("m", "M"):
+        raise ValueError(f"Đường dẫn BIP-32 phải bắt đầu bằng m: {path}")
+    indices = []
+    for part in parts[1:]:
+        hardened = part[-1:] in ("'", "h", "H")
+        digits = part[:-1] if hardened else part
+        if not digits.isdigit() or int(digits) >= HARDENED:
+            raise ValueError(f"Đường dẫn BIP-32 không hợp lệ: {path}")
+        indices.append(int(digits) + (HARDENED if hardened else 0))
+    return tuple(indices)
+
+
+def format_path(path: Path) -> str:
+    """Dạng chuỗi của đường dẫn, hardened viết bằng dấu '"""
+    return "/".join(["m"] + [f"{index - HARDENED}'" if index >= HARDENED else str(index) for index in path])
+
+
+def parse_range(text: str) -> range:
+    """
+    Đọc dải chỉ số "START-END" (không gồm END) hoặc một chỉ số "N"
+
+    Raises:
+        ValueError: dải sai cú pháp, rỗng hoặc vượt 2^31
+    """
+    start, _, end = text.partition("-")
+    try:
+        indices = range(int(start), int(end) if end else int(start) + 1)
+    except ValueError:
+        raise ValueError(f"Dải chỉ số không hợp lệ: {text} (dạng START-END)") from None
+    if indices.start < 0 or indices.stop > HARDENED or not indices:
+        raise ValueError(f"Dải chỉ số không hợp lệ: {text} (0 <= START < END <= 2^31)")
+    return indices
+
+
+def compress_public_key(public_key_bytes: bytes) -> bytes:
+    """Khóa công khai 64 byte (x ‖ y) sang dạng nén 33 byte"""
+    return bytes((2 + (public_key_bytes[63] & 1),)) + public_key_bytes[:32]
+
+
+class HDNode:
+    """Nút BIP-32: khóa riêng 32 byte, chain code 32 byte, khóa công khai nén (tính khi cần)"""
+
+    __slots__ = ("private_key", "chain_code", "public_key")
+
+    def __init__(self, private_key: bytes, chain_code: bytes):
+        self.private_key = private_key
+        self.chain_code = chain_code
+        self.public_key: Optional[bytes] = None
+
+
+def master_node(seed: bytes) -> HDNode:
+    """Nút gốc m từ seed (HMAC-SHA512 khóa "Bitcoin seed")"""
+    digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+    if not 0 < int.from_bytes(digest[:32], "big") < SECPK1_N:
+        raise ValueError("Seed cho khóa gốc không hợp lệ")
+    return HDNode(digest[:32], digest[32:])
+
+
+def child_node(node: HDNode, index: int, public_key_bytes: Callable[[bytes], bytes]) -> HDNode:
+    """
+    Khóa con CKDpriv của `node` tại `index` (>= 2^31 là hardened)
+
+    Khóa công khai nén của nút cha chỉ được tính một lần rồi giữ trên nút,
+    nên các khóa con không hardened cùng cha không phải nhân điểm lại cho cha.
+    """
+    if index >= HARDENED:
+        data = b"\x00" + node.private_key
+    else:
+        if node.public_key is None:
+            node.public_key = compress_public_key(public_key_bytes(node.private_key))
+        data = node.public_key
+    digest = hmac.new(node.chain_code, data + index.to_bytes(4, "big"), hashlib.sha512).digest()
+    tweak = int.from_bytes(digest[:32], "big")
+    child = (tweak + int.from_bytes(node.private_key, "big")) % SECPK1_N
+    if tweak >= SECPK1_N or child == 0:
+        # Xác suất ~2^-127; BIP-32 yêu cầu bỏ qua chỉ số này
+        raise ValueError(f"Chỉ số {index} cho khóa con không hợp lệ, hãy dùng chỉ số kế tiếp")
+    return HDNode(child.to_bytes(32, "big"), digest[32:])
+
+
+class HDDeriver:
+    """
+    Dẫn xuất BIP-32 có LRU cache cho nút gốc và nút trung gian.
+
+    Khóa tra cứu là BLAKE2b có khóa bí mật ngẫu nhiên theo tiến trình trên seed
+    cộng đường dẫn, không giữ seed làm key (giống `KeyCache`).
+    """
+
+    def __init__(self, public_key_bytes: Callable[[bytes], bytes], maxsize: int = DEFAULT_NODE_CACHE_SIZE):
+        self.public_key_bytes = public_key_bytes
+        self.maxsize = maxsize
+        self._nodes: "OrderedDict[Tuple[bytes, Path], HDNode]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._salt = secrets.token_bytes(32)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def node(self, seed: bytes, path: Path) -> HDNode:
+        """Nút tại `path`, đi tiếp từ tiền tố dài nhất đã có trong cache"""
+        seed_digest = hashlib.blake2b(seed, key=self._salt, digest_size=16).digest()
+        with self._lock:
+            depth = len(path)
+            while depth >= 0 and (seed_digest, path[:depth]) not in self._nodes:
+                depth -= 1
+            if depth == len(path):
+                self.hits += 1
+                self._nodes.move_to_end((seed_digest, path))
+                return self._nodes[(seed_digest, path)]
+            self.misses += 1
+            node = self._nodes[(seed_digest, path[:depth])] if depth >= 0 else None
+
+        if node is None:
+            node = master_node(seed)
+            self._put((seed_digest, ()), node)
+            depth = 0
+        for length in range(depth + 1, len(path) + 1):
+            node = child_node(node, path[length - 1], self.public_key_bytes)
+            self._put((seed_digest, path[:length]), node)
+        return node
+
+    def children(self, seed: bytes, path: Path, indices: Iterable[int]) -> Iterator[HDNode]:
+        """Các khóa con của nút `path` tại `indices`; nút cha lấy từ cache, chỉ làm việc ở cấp cuối"""
+        parent = self.node(seed, path)
+        public_key_bytes = self.public_key_bytes
+        for index in indices:
+            yield child_node(parent, index, public_key_bytes)
+
+    def _put(self, key: Tuple[bytes, Path], node: HDNode) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._nodes[key] = node
+            self._nodes.move_to_end(key)
+            while len(self._nodes) > self.maxsize:
+                self._nodes.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._nodes),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,149 @@
+"""
+Bộ đệm cặp khóa sinh sẵn cho /api/wallet/generate
+Thread nền giữ số cặp khóa trong bộ nhớ giữa ngưỡng thấp và ngưỡng cao; lấy ra là O(1),
+mỗi cặp chỉ được trao đúng một lần, không ghi xuống đĩa và bị ghi đè 0 khi dừng
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from results import Keypair
+
+DEFAULT_POOL_WORKERS = 1
+
+
+class KeypairPool:
+    """
+    Bộ đệm cặp khóa được `workers` thread nền nạp lại.
+
+    Khi số cặp xuống dưới `low` (hoặc pool cạn), thread nạp được đánh thức và sinh tới `high`;
+    với nhiều thread, pool có thể vượt `high` tối đa `workers - 1` cặp. `take()` lấy bằng
+    `deque.popleft()` (nguyên tử) nên hai request không bao giờ nhận cùng một khóa; pool cạn thì
+    trả None để nơi gọi sinh khóa tại chỗ.
+
+    Khóa riêng được giữ trong bytearray để ghi đè 0 ngay sau khi định dạng trao đi và khi
+    `close()`; bản `bytes` tạm lúc sinh khóa là bất biến nên không xóa được từ Python.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[], Keypair],
+        high: int,
+        low: Optional[int] = None,
+        workers: int = DEFAULT_POOL_WORKERS,
+    ):
+        """
+        Args:
+            generate: Hàm sinh một `Keypair` dạng bytes (ví dụ `WalletCore.generate_raw_keypair`)
+            high: Số cặp tối đa nạp sẵn
+            low: Ngưỡng đánh thức thread nạp (mặc định `high // 2`)
+            workers: Số thread nạp
+        """
+        low = high // 2 if low is None else low
+        if high < 1 or workers < 1 or not 0 <= low < high:
+            raise ValueError("Cần high ≥ 1, workers ≥ 1 và 0 ≤ low < high")
+        self.high = high
+        self.low = low
+        self.workers = workers
+        self._generate = generate
+        self._entries: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.served = 0
+        self.misses = 0
+        self.generated = 0
+        # Số cặp/giây của lần nạp gần nhất
+        self.refill_rate = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def start(self) -> None:
+        """Khởi động các thread nạp và nạp đầy lần đầu"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"keypair-pool-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._wake.set()
+
+    def take(self) -> Optional[Tuple[str, str, str]]:
+        """
+        Lấy một cặp khóa đã định dạng (private_key_hex, public_key_hex, address checksum)
+
+        Returns:
+            tuple hoặc None nếu pool cạn
+        """
+        try:
+            private_key, public_key, address = self._entries.popleft()
+        except IndexError:
+            with self._lock:
+                self.misses += 1
+            self._wake.set()
+            return None
+        if len(self._entries) < self.low:
+            self._wake.set()
+        keypair = Keypair(private_key, public_key, address).to_tuple()
+        private_key[:] = bytes(len(private_key))
+        with self._lock:
+            self.served += 1
+        return keypair
+
+    def stats(self) -> dict:
+        """size, low, high, served, misses (sinh tại chỗ), generated, refill_rate (cặp/giây)"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "low": self.low,
+                "high": self.high,
+                "served": self.served,
+                "misses": self.misses,
+                "generated": self.generated,
+                "refill_rate": round(self.refill_rate, 1),
+            }
+
+    def wipe(self) -> int:
+        """Ghi đè 0 và bỏ mọi khóa chưa trao; trả số cặp đã xóa"""
+        wiped = 0
+        while True:
+            try:
+                private_key, _, _ = self._entries.popleft()
+            except IndexError:
+                return wiped
+            private_key[:] = bytes(len(private_key))
+            wiped += 1
+
+    def close(self) -> None:
+        """Dừng các thread nạp rồi xóa pool"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.wipe()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            # Xóa cờ trước khi kiểm tra số lượng: `take()` trong lúc nạp sẽ đặt lại cờ, không bị mất
+            self._wake.clear()
+            start = time.perf_counter()
+            count = 0
+            while len(self._entries) < self.high and not self._stop.is_set():
+                private_key, public_key, address = self._generate()
+                self._entries.append((bytearray(private_key), public_key, address))
+                count += 1
+            if count:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.generated += count
+                    self.refill_rate = count / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,253 @@
+"""
+Keystore mã hóa theo chuẩn Web3 Secret Storage (V3) và phiên mở khóa
+KDF scrypt (pycryptodome) / pbkdf2 (hashlib), mã hóa AES-128-CTR, MAC Keccak-256
+"""
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from Crypto.Cipher import AES
+from Crypto.Protocol.KDF import scrypt
+from Crypto.Util import Counter
+from eth_utils import keccak, to_checksum_address
+
+KDF_SCRYPT = "scrypt"
+KDF_PBKDF2 = "pbkdf2"
+CIPHER = "aes-128-ctr"
+
+# Tham số mặc định giống geth ("standard"); KDF tốn khoảng vài trăm ms mỗi lần mở khóa
+DEFAULT_SCRYPT_PARAMS = {"n": 1 << 18, "r": 8, "p": 1}
+DEFAULT_PBKDF2_ITERATIONS = 1 << 18
+DEFAULT_UNLOCK_TTL = 300.0
+
+# Trần tham số KDF đọc từ keystore (có thể do client gửi lên API): đủ cho mức "standard" của geth
+# (n=2^18, r=8, p=1: 256 MiB) và vector chuẩn (n=2^18, r=1, p=8), chặn keystore cố ý làm treo worker
+MAX_SCRYPT_MEMORY = 256 << 20
+MAX_SCRYPT_COST = 1 << 22
+MAX_PBKDF2_ITERATIONS = 1 << 22
+MAX_SALT_BYTES = 64
+DKLEN = 32
+
+
+def _int_param(params: dict, name: str, low: int, high: int) -> int:
+    value = params.get(name)
+    if type(value) is not int or not low <= value <= high:
+        raise ValueError(f"Tham số KDF `{name}` không hợp lệ hoặc vượt giới hạn: {value!r} (cho phép {low}..{high})")
+    return value
+
+
+def check_kdf_params(kdf: str, params: dict) -> None:
+    """Ném ValueError nếu tham số KDF sai kiểu hoặc vượt trần; gọi trước khi chạy KDF"""
+    _int_param(params, "dklen", DKLEN, DKLEN)
+    salt = params.get("salt")
+    if not isinstance(salt, str) or len(salt) > MAX_SALT_BYTES * 2:
+        raise ValueError("Salt KDF không hợp lệ")
+    if kdf == KDF_SCRYPT:
+        n = _int_param(params, "n", 2, MAX_SCRYPT_MEMORY // 128)
+        if n & (n - 1):
+            raise ValueError(f"Tham số scrypt `n` phải là lũy thừa của 2: {n}")
+        r = _int_param(params, "r", 1, MAX_SCRYPT_MEMORY // (128 * n))
+        _int_param(params, "p", 1, MAX_SCRYPT_COST // (n * r))
+    elif kdf == KDF_PBKDF2:
+        _int_param(params, "c", 1, MAX_PBKDF2_ITERATIONS)
+    else:
+        raise ValueError(f"KDF không được hỗ trợ: {kdf}")
+
+
+def _derive_key(password: bytes, crypto: dict) -> bytes:
+    """Chạy KDF theo `kdfparams` của keystore (đã qua `check_kdf_params`)"""
+    kdf = crypto["kdf"]
+    params = crypto["kdfparams"]
+    check_kdf_params(kdf, params)
+    salt = bytes.fromhex(params["salt"])
+    dklen = params["dklen"]
+    if kdf == KDF_SCRYPT:
+        # hashlib.scrypt (OpenSSL) từ chối n >= 2^(16r), trong khi nhiều keystore phổ biến dùng r=1, n=2^18
+        return scrypt(password, salt, dklen, N=params["n"], r=params["r"], p=params["p"])
+    if kdf == KDF_PBKDF2:
+        if params.get("prf", "hmac-sha256") != "hmac-sha256":
+            raise ValueError(f"PRF không được hỗ trợ: {params['prf']}")
+        return hashlib.pbkdf2_hmac("sha256", password, salt, params["c"], dklen)
+    raise ValueError(f"KDF không được hỗ trợ: {kdf}")
+
+
+def _aes_ctr(key: bytes, iv: bytes, data: bytes) -> bytes:
+    counter = Counter.new(128, initial_value=int.from_bytes(iv, "big"))
+    return AES.new(key, AES.MODE_CTR, counter=counter).encrypt(data)
+
+
+def encrypt_keystore(
+    private_key_bytes: bytes,
+    address_bytes: bytes,
+    password: str,
+    kdf: str = KDF_SCRYPT,
+    kdf_params: Optional[dict] = None,
+) -> dict:
+    """
+    Mã hóa khóa riêng thành keystore V3.
+
+    Args:
+        kdf: "scrypt" hoặc "pbkdf2"
+        kdf_params: ghi đè tham số KDF (n/r/p cho scrypt, c cho pbkdf2)
+
+    Returns:
+        dict: keystore V3 sẵn sàng ghi JSON
+    """
+    if kdf == KDF_SCRYPT:
+        params = dict(DEFAULT_SCRYPT_PARAMS)
+    elif kdf == KDF_PBKDF2:
+        params = {"c": DEFAULT_PBKDF2_ITERATIONS, "prf": "hmac-sha256"}
+    else:
+        raise ValueError(f"KDF không được hỗ trợ: {kdf}")
+    params.update(kdf_params or {})
+    params["dklen"] = 32
+    params["salt"] = secrets.token_hex(32)
+
+    crypto = {"cipher": CIPHER, "cipherparams": {"iv": secrets.token_hex(16)}, "kdf": kdf, "kdfparams": params}
+    derived_key = _derive_key(password.encode("utf-8"), crypto)
+    ciphertext = _aes_ctr(derived_key[:16], bytes.fromhex(crypto["cipherparams"]["iv"]), private_key_bytes)
+    crypto["ciphertext"] = ciphertext.hex()
+    crypto["mac"] = keccak(derived_key[16:32] + ciphertext).hex()
+
+    return {
+        "address": address_bytes.hex(),
+        "crypto": crypto,
+        "id": str(uuid.uuid4()),
+        "version": 3,
+    }
+
+
+def decrypt_keystore(keystore, password: str) -> bytes:
+    """
+    Giải mã keystore V3 (dict hoặc chuỗi JSON) và trả về 32 byte khóa riêng.
+
+    Ném ValueError nếu sai mật khẩu (MAC không khớp) hoặc keystore không hợp lệ.
+    """
+    if isinstance(keystore, (str, bytes)):
+        keystore = json.loads(keystore)
+    if keystore.get("version") != 3:
+        raise ValueError("Chỉ hỗ trợ keystore phiên bản 3")
+    # Một số công cụ cũ ghi khóa "Crypto" viết hoa
+    crypto = keystore.get("crypto") or keystore.get("Crypto")
+    if not crypto:
+        raise ValueError("Keystore thiếu trường crypto")
+    if crypto.get("cipher") != CIPHER:
+        raise ValueError(f"Cipher không được hỗ trợ: {crypto.get('cipher')}")
+
+    ciphertext = bytes.fromhex(crypto["ciphertext"])
+    derived_key = _derive_key(password.encode("utf-8"), crypto)
+    mac = keccak(derived_key[16:32] + ciphertext)
+    if not hmac.compare_digest(mac, bytes.fromhex(crypto["mac"])):
+        raise ValueError("Sai mật khẩu hoặc keystore bị hỏng (MAC không khớp)")
+    return _aes_ctr(derived_key[:16], bytes.fromhex(crypto["cipherparams"]["iv"]), ciphertext)
+
+
+class SessionLocked(LookupError):
+    """Địa chỉ chưa được mở khóa hoặc phiên đã hết hạn"""
+
+
+def _normalize(address: str) -> str:
+    address = address.lower()
+    return address if address.startswith("0x") else f"0x{address}"
+
+
+class UnlockSessions:
+    """
+    Khóa đã giải mã giữ trong bộ nhớ theo địa chỉ, hết hạn sau TTL.
+
+    Giá trị lưu là đối tượng khóa đã parse nên ký theo địa chỉ không phải
+    chạy lại KDF lẫn parse khóa; mục hết hạn bị xóa khi truy cập hoặc `purge()`.
+    Phiên mở kèm `token` (API) chỉ được dùng/khóa/liệt kê bởi người giữ token đó
+    (xem `authorize`); chỉ lưu SHA-256 của token.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries: Dict[str, Tuple[Any, float, Optional[bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def unlock(self, address: str, key: Any, ttl: float = DEFAULT_UNLOCK_TTL, token: Optional[str] = None) -> float:
+        """
+        Lưu khóa cho `address` trong `ttl` giây; trả thời điểm hết hạn (đồng hồ monotonic).
+
+        Mở lại một địa chỉ thay luôn token cũ.
+        """
+        if ttl <= 0:
+            raise ValueError("TTL phải lớn hơn 0")
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._entries[_normalize(address)] = (key, expires_at, _token_digest(token))
+        return expires_at
+
+    def get(self, address: str) -> Any:
+        """Lấy khóa đã mở; ném SessionLocked nếu địa chỉ chưa mở khóa hoặc đã hết hạn"""
+        return self._entry(address)[0]
+
+    def authorize(self, address: str, token: Optional[str]) -> None:
+        """Ném SessionLocked nếu `address` chưa mở khóa, đã hết hạn hoặc phiên có token khác `token`"""
+        digest = self._entry(address)[2]
+        if digest is not None and not (token and hmac.compare_digest(digest, _token_digest(token))):
+            raise SessionLocked(f"Địa chỉ {address} chưa được mở khóa hoặc phiên đã hết hạn")
+
+    def _entry(self, address: str) -> Tuple[Any, float, Optional[bytes]]:
+        normalized = _normalize(address)
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is not None and entry[1] <= self._clock():
+                del self._entries[normalized]
+                entry = None
+        if entry is None:
+            raise SessionLocked(f"Địa chỉ {address} chưa được mở khóa hoặc phiên đã hết hạn")
+        return entry
+
+    def lock(self, address: Optional[str] = None, token: Optional[str] = None) -> int:
+        """Khóa một địa chỉ (hoặc tất cả nếu None); có `token` thì chỉ các phiên của token đó. Trả số phiên đã xóa"""
+        with self._lock:
+            addresses = list(self._entries) if address is None else [_normalize(address)]
+            if token is not None:
+                digest = _token_digest(token)
+                addresses = [
+                    item for item in addresses
+                    if item in self._entries and self._entries[item][2] is not None
+                    and hmac.compare_digest(self._entries[item][2], digest)
+                ]
+            return sum(1 for item in addresses if self._entries.pop(item, None) is not None)
+
+    def purge(self) -> int:
+        """Xóa các phiên đã hết hạn"""
+        now = self._clock()
+        with self._lock:
+            expired = [address for address, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for address in expired:
+                del self._entries[address]
+        return len(expired)
+
+    def sessions(self, token: Optional[str] = None) -> List[dict]:
+        """Danh sách phiên còn hiệu lực: địa chỉ và số giây còn lại; có `token` thì chỉ các phiên của token đó"""
+        self.purge()
+        now = self._clock()
+        digest = _token_digest(token)
+        with self._lock:
+            return [
+                {"address": to_checksum_address(address), "expires_in": round(expires_at - now, 1)}
+                for address, (_, expires_at, owner) in self._entries.items()
+                if digest is None or (owner is not None and hmac.compare_digest(owner, digest))
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def new_session_token() -> str:
+    """Token ngẫu nhiên (256 bit) trao cho người mở khóa qua API"""
+    return secrets.token_urlsafe(32)
+
+
+def _token_digest(token: Optional[str]) -> Optional[bytes]:
+    return hashlib.sha256(token.encode("utf-8")).digest() if token else None
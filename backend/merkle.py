@@ -0,0 +1,194 @@
+"""
+Cây Merkle keccak cho ký lô (batch attestation)
+Một chữ ký trên gốc cây thay cho một chữ ký mỗi thông điệp; mỗi thông điệp nhận bằng chứng
+thuộc cây là các hash anh em (32 byte mỗi tầng, nối liền) từ lá lên gốc
+"""
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from eth_hash.auto import keccak
+
+HASH_SIZE = 32
+# Tiền tố tách miền lá/nút trong (như RFC 6962): lá không thể được trình ra như một nút trong
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+# Gốc lô gắn thêm số lá, để bằng chứng không khai được một số lá khác mà vẫn ra cùng gốc
+ROOT_PREFIX = b"\x02"
+
+
+def leaf_hash(message_hash: bytes) -> bytes:
+    """keccak(0x00 ‖ hash thông điệp)"""
+    return keccak(LEAF_PREFIX + message_hash)
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """keccak(0x01 ‖ trái ‖ phải)"""
+    return keccak(NODE_PREFIX + left + right)
+
+
+def seal_root(top: bytes, count: int) -> bytes:
+    """Gốc lô: keccak(0x02 ‖ số lá 32 byte ‖ nút đỉnh cây)"""
+    return keccak(ROOT_PREFIX + count.to_bytes(32, "big") + top)
+
+
+class MerkleTree:
+    """
+    Cây Merkle xây dạng luồng trên các hash thông điệp 32 byte; gốc là `seal_root` của nút đỉnh.
+
+    `add()` băm nút cha ngay khi một cặp hoàn tất nên việc băm chạy song song với việc đọc
+    đầu vào; mỗi tầng là một bytearray liền (tổng khoảng 64 byte mỗi lá), không giữ đối tượng
+    Python cho từng nút. Tầng 0 giữ hash thông điệp, lá thật là `leaf_hash` của chúng.
+    Nút lẻ cuối một tầng được đưa thẳng lên tầng trên (không nhân đôi).
+    """
+
+    __slots__ = ("_levels", "_root")
+
+    def __init__(self, message_hashes: Iterable[bytes] = ()):
+        self._levels: List[bytearray] = [bytearray()]
+        self._root = None
+        for message_hash in message_hashes:
+            self.add(message_hash)
+
+    def __len__(self) -> int:
+        return len(self._levels[0]) // HASH_SIZE
+
+    def add(self, message_hash: bytes) -> None:
+        """Thêm lá; không dùng được sau khi đã lấy `root()`"""
+        if self._root is not None:
+            raise ValueError("Cây Merkle đã chốt gốc, không thêm lá được nữa")
+        if len(message_hash) != HASH_SIZE:
+            raise ValueError("Hash thông điệp phải dài 32 byte")
+        self._levels[0] += message_hash
+        self._carry(0)
+
+    def _size(self, level: int) -> int:
+        return len(self._levels[level]) // HASH_SIZE
+
+    def _node(self, level: int, index: int) -> bytes:
+        node = bytes(self._levels[level][index * HASH_SIZE:(index + 1) * HASH_SIZE])
+        return leaf_hash(node) if level == 0 else node
+
+    def _push(self, level: int, node: bytes) -> None:
+        if level == len(self._levels):
+            self._levels.append(bytearray())
+        self._levels[level] += node
+        self._carry(level)
+
+    def _carry(self, level: int) -> None:
+        # Số nút chẵn: nút vừa thêm hoàn tất một cặp, băm nút cha lên tầng trên
+        size = self._size(level)
+        if size % 2 == 0:
+            self._push(level + 1, node_hash(self._node(level, size - 2), self._node(level, size - 1)))
+
+    def root(self) -> bytes:
+        """Gốc cây; lần gọi đầu chốt cây, đưa các nút lẻ cuối tầng lên trên"""
+        if self._root is None:
+            if not len(self):
+                raise ValueError("Cây Merkle cần ít nhất một lá")
+            level = 0
+            while level < len(self._levels) - 1 or self._size(level) > 1:
+                size = self._size(level)
+                if size % 2:
+                    self._push(level + 1, self._node(level, size - 1))
+                level += 1
+            self._root = seal_root(self._node(level, 0), len(self))
+        return self._root
+
+    def message_hash(self, index: int) -> bytes:
+        return bytes(self._levels[0][index * HASH_SIZE:(index + 1) * HASH_SIZE])
+
+    def proof(self, index: int) -> bytes:
+        """Bằng chứng của lá `index`: các hash anh em từ dưới lên, nối liền"""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Lá {index} nằm ngoài cây {len(self)} lá")
+        self.root()
+        path = bytearray()
+        for level in range(len(self._levels) - 1):
+            sibling = index ^ 1
+            if sibling < self._size(level):
+                path += self._node(level, sibling)
+            index >>= 1
+        return bytes(path)
+
+    def proofs(self) -> Iterator[Tuple[int, bytes, bytes]]:
+        """(index, hash thông điệp, bằng chứng) cho mọi lá theo thứ tự"""
+        for index in range(len(self)):
+            yield index, self.message_hash(index), self.proof(index)
+
+
+class VerifiedPath:
+    """
+    Đường đi từ một lá lên gốc vừa xác thực: theo từng tầng (vị trí, nút, phần bằng chứng từ tầng đó lên).
+
+    Các thông điệp liền nhau trong lô chung phần lớn đường đi, nên bằng chứng kế tiếp dừng được
+    ngay khi gặp lại một nút đã xác thực với đúng phần bằng chứng phía trên; xác thực theo thứ tự
+    chỉ còn khoảng hai phép băm mỗi thông điệp thay vì log2(count) + 1.
+    """
+
+    __slots__ = ("count", "root", "levels")
+
+    def __init__(self, count: int, root: bytes, levels: List[Tuple[int, bytes, bytes]]):
+        self.count = count
+        self.root = root
+        self.levels = levels
+
+
+def _climb(message_hash: bytes, index: int, count: int, path: bytes, verified) -> Tuple[bytes, list]:
+    if not 0 <= index < count:
+        raise ValueError(f"Vị trí {index} nằm ngoài cây {count} lá")
+    known = verified.levels if verified is not None and verified.count == count else ()
+    leaves = count
+    node = leaf_hash(message_hash)
+    offset = 0
+    levels = []
+    while count > 1:
+        level = len(levels)
+        if level < len(known) and known[level][0] == index and known[level][1] == node \
+                and known[level][2] == path[offset:]:
+            return verified.root, levels + known[level:]
+        levels.append((index, node, path[offset:]))
+        if index ^ 1 < count:
+            sibling = path[offset:offset + HASH_SIZE]
+            if len(sibling) != HASH_SIZE:
+                raise ValueError("Bằng chứng thiếu hash anh em")
+            node = node_hash(sibling, node) if index & 1 else node_hash(node, sibling)
+            offset += HASH_SIZE
+        index >>= 1
+        count = (count + 1) // 2
+    if offset != len(path):
+        raise ValueError("Bằng chứng dài hơn độ sâu của cây")
+    return seal_root(node, leaves), levels
+
+
+def compute_root(message_hash: bytes, index: int, count: int, path: bytes) -> bytes:
+    """
+    Gốc suy ra từ hash thông điệp và bằng chứng của lá `index` trong cây `count` lá
+
+    Raises:
+        ValueError: vị trí nằm ngoài cây hoặc độ dài bằng chứng không khớp hình dạng cây
+    """
+    return _climb(message_hash, index, count, path, None)[0]
+
+
+def verify_path(
+    message_hash: bytes,
+    index: int,
+    count: int,
+    path: bytes,
+    root: bytes,
+    verified: Optional[VerifiedPath] = None,
+) -> Optional[VerifiedPath]:
+    """
+    Bằng chứng có dẫn tới `root` không; kết quả giống hệt so `compute_root` với `root`.
+
+    `verified` là kết quả của lần gọi trước trên cùng gốc, dùng để dừng sớm.
+
+    Returns:
+        VerifiedPath: đường đi vừa xác thực (truyền vào lần gọi sau), None nếu bằng chứng sai
+    """
+    if verified is not None and verified.root != root:
+        verified = None
+    try:
+        computed, levels = _climb(message_hash, index, count, path, verified)
+    except ValueError:
+        return None
+    return VerifiedPath(count, root, levels) if computed == root else None
@@ -0,0 +1,278 @@
+"""
+Thu thập metrics dạng Prometheus
+Counter/Gauge/Histogram gộp theo từng thread, không khóa trên đường ghi
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Bucket độ trễ (giây): từ 50µs cho phép toán EC native đến 10s cho lô lớn
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+class _ThreadShards:
+    """
+    Mỗi thread ghi vào dict riêng nên không cần khóa khi cập nhật;
+    khóa chỉ dùng khi một thread tạo shard lần đầu và khi gộp để xuất.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: dict = {}
+            with self._lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def shards(self) -> List[dict]:
+        with self._lock:
+            return list(self._shards)
+
+
+class Counter:
+    """Bộ đếm tăng dần theo nhãn"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = _ThreadShards()
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        values = self._values.shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._values.shards():
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        for labels, value in sorted(self.collect().items()):
+            yield self.name + self._suffix(), labels, value
+
+    def _suffix(self) -> str:
+        return "" if self.name.endswith("_total") else "_total"
+
+
+class Gauge(Counter):
+    """Giá trị tăng/giảm (tổng các shard là giá trị hiện tại)"""
+
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def _suffix(self) -> str:
+        return ""
+
+
+class CallbackGauge:
+    """Gauge đọc giá trị từ hàm callback lúc xuất metrics"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = ()
+        self.callback = callback
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        try:
+            value = self.callback()
+        except Exception:
+            return
+        if value is not None:
+            yield self.name, (), value
+
+
+class Histogram:
+    """Histogram độ trễ; mỗi shard lưu [số đếm từng bucket..., tổng, số mẫu]"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = _ThreadShards()
+
+    def observe(self, labels: Labels, seconds: float) -> None:
+        values = self._values.shard()
+        row = values.get(labels)
+        if row is None:
+            row = values[labels] = [0] * (len(self.buckets) + 3)
+        # Chỉ số cuối của bucket là +Inf
+        row[bisect_left(self.buckets, seconds)] += 1
+        row[-2] += seconds
+        row[-1] += 1
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._values.shards():
+            for labels, row in list(shard.items()):
+                total = totals.setdefault(labels, [0] * len(row))
+                for i, value in enumerate(row):
+                    total[i] += value
+
+        for labels, row in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", labels + (("le", le),), cumulative
+            yield f"{self.name}_sum", labels, row[-2]
+            yield f"{self.name}_count", labels, row[-1]
+
+
+class Registry:
+    """Tập metrics được xuất qua /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def callback_gauge(self, name: str, documentation: str, callback: Callable[[], float]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames))
+
+    def render(self) -> str:
+        """Xuất toàn bộ metrics theo định dạng văn bản Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labelnames: Tuple[str, ...], labels: tuple) -> str:
+    pairs = list(zip(labelnames, labels[:len(labelnames)]))
+    # Nhãn bổ sung (ví dụ `le` của histogram) được truyền dạng tuple (tên, giá trị)
+    pairs.extend(extra for extra in labels[len(labelnames):])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "wallet_http_requests_total", "Số request HTTP theo route, method và status", ("route", "method", "status")
+)
+HTTP_ERRORS = REGISTRY.counter(
+    "wallet_http_request_errors_total", "Số request HTTP trả lỗi (status >= 400)", ("route", "method")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "wallet_http_request_duration_seconds", "Độ trễ request HTTP theo route", ("route", "method")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "wallet_http_requests_in_flight", "Số request HTTP đang xử lý"
+)
+WS_CONNECTIONS = REGISTRY.gauge(
+    "wallet_ws_connections", "Số kết nối WebSocket /api/ws đang mở"
+)
+WS_IN_FLIGHT = REGISTRY.gauge(
+    "wallet_ws_frames_in_flight", "Số frame WebSocket đang xử lý (mọi kết nối)"
+)
+WS_FRAMES = REGISTRY.counter(
+    "wallet_ws_frames_total", "Số frame WebSocket đã trả lời theo op và status", ("op", "status")
+)
+CORE_LATENCY = REGISTRY.histogram(
+    "wallet_core_operation_duration_seconds",
+    "Thời gian từng bước trong WalletCore (key_parse, hash, sign, recover, verify, address, keygen, kdf)",
+    ("operation",),
+)
+
+
+def observe_core(operation: str, seconds: float) -> None:
+    """Observer truyền vào WalletCore để ghi thời gian từng bước"""
+    CORE_LATENCY.observe((operation,), seconds)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware ghi số request, lỗi và độ trễ theo route.
+
+    Nhãn route dùng mẫu đường dẫn (ví dụ `/api/wallet/address/{private_key}`)
+    nên không lộ dữ liệu trong URL và số nhãn luôn hữu hạn.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            status = status_holder[0]
+            HTTP_REQUESTS.inc((route_path, method, str(status)))
+            HTTP_LATENCY.observe((route_path, method), elapsed)
+            if status >= 400:
+                HTTP_ERRORS.inc((route_path, method))
+
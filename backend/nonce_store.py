@@ -0,0 +1,277 @@
+"""
+Kho nonce dùng một lần cho đăng nhập (Sign-In with Ethereum)
+Chia shard theo hash của nonce để giảm tranh chấp khóa, hết hạn theo TTL, giới hạn kích thước
+(bỏ nonce cũ nhất khi đầy) và lưu bền vững qua giao diện `NoncePersistence` (có bản SQLite)
+"""
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_NONCE_TTL = 300.0
+DEFAULT_MAX_NONCES = 1_000_000
+DEFAULT_SHARDS = 16
+# Nonce EIP-4361 phải là chữ-số, tối thiểu 8 ký tự; 12 byte hex = 96 bit ngẫu nhiên
+NONCE_BYTES = 12
+
+
+class NoncePersistence:
+    """
+    Giao diện lưu nonce bền vững để nonce đã phát/đã dùng không mất khi khởi động lại.
+
+    Lớp cơ sở không lưu gì. `NonceStore` gọi `issued`/`discarded` ngoài khóa shard,
+    nên cài đặt có thể gộp ghi theo lô. Cài đặt có `shared = True` là kho dùng chung giữa
+    nhiều tiến trình: `NonceStore.consume()` khi đó lấy nonce qua `take()` thay vì bộ nhớ.
+    """
+
+    shared = False
+
+    def load(self, now: float) -> Iterable[Tuple[str, float]]:
+        """Các nonce (nonce, hạn dùng epoch giây) còn hiệu lực tại `now`"""
+        return ()
+
+    def issued(self, nonce: str, expires_at: float) -> None:
+        pass
+
+    def discarded(self, nonce: str) -> None:
+        """Nonce đã dùng, bị loại vì đầy hoặc đã hết hạn"""
+        pass
+
+    def take(self, nonce: str) -> Optional[float]:
+        """Đọc và xóa nonce trong một thao tác nguyên tử; trả hạn dùng, None nếu không có"""
+        return None
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteNoncePersistence(NoncePersistence):
+    """
+    Lưu nonce vào file SQLite (WAL) theo kiểu ghi sau: thao tác được gom lại và
+    ghi một transaction mỗi `flush_interval` giây bởi thread nền.
+
+    `flush_interval=0` ghi ngay mỗi thao tác (chậm hơn nhiều, không mất gì khi sập);
+    với giá trị > 0, nonce dùng trong khoảng đó trước khi sập có thể dùng lại sau khi khởi động.
+
+    `shared=True` dùng một file cho nhiều tiến trình API (`--workers N`): nonce phát ra vẫn được
+    gom ghi theo lô nên worker khác thấy nó sau tối đa `flush_interval` giây (lâu hơn nhiều so với
+    thời gian người dùng ký thông điệp). `take()` lấy nonce còn chờ ghi ngay trong bộ nhớ (chưa
+    worker nào khác thấy được); nonce đã ghi thì xóa bằng một câu `DELETE ... RETURNING` nguyên tử,
+    nên mỗi nonce chỉ một worker dùng được. Câu DELETE đó là một transaction ghi, các worker xếp
+    hàng trên khóa ghi của file (xem `benchmarks/bench_siwe.py --shared`).
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, shared: bool = False):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.shared = shared
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Tiến trình khác có thể đang ghi: chờ khóa thay vì báo "database is locked" ngay
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS nonces (nonce TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS nonces_expires_at ON nonces (expires_at)")
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._added: Dict[str, float] = {}
+        self._removed: List[Tuple[str]] = []
+        self._stop = threading.Event()
+        self._thread = None
+        if flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="nonce-flush", daemon=True)
+            self._thread.start()
+
+    def load(self, now: float) -> Iterable[Tuple[str, float]]:
+        with self._db_lock:
+            self._conn.execute("DELETE FROM nonces WHERE expires_at <= ?", (now,))
+            return self._conn.execute("SELECT nonce, expires_at FROM nonces ORDER BY expires_at").fetchall()
+
+    def issued(self, nonce: str, expires_at: float) -> None:
+        with self._lock:
+            self._added[nonce] = expires_at
+        if self._thread is None:
+            self.flush()
+
+    def discarded(self, nonce: str) -> None:
+        with self._lock:
+            self._removed.append((nonce,))
+        if self._thread is None:
+            self.flush()
+
+    def take(self, nonce: str) -> Optional[float]:
+        with self._lock:
+            expires_at = self._added.pop(nonce, None)
+        if expires_at is not None:
+            # Chưa ghi xuống file nên chưa worker nào khác thấy: dùng mà không chạm SQLite
+            return expires_at
+        with self._db_lock:
+            # Một câu lệnh là một transaction: hai worker không cùng xóa được một nonce
+            rows = self._conn.execute("DELETE FROM nonces WHERE nonce = ? RETURNING expires_at", (nonce,)).fetchall()
+        return rows[0][0] if rows else None
+
+    def flush(self) -> None:
+        """Ghi các thao tác đang chờ trong một transaction và dọn nonce hết hạn"""
+        # Lấy lô trong khi giữ _db_lock: take() không thấy nonce ở khoảng giữa bộ nhớ và file
+        with self._db_lock:
+            with self._lock:
+                added, self._added = self._added, {}
+                removed, self._removed = self._removed, []
+            if not added and not removed:
+                return
+            with self._conn:
+                self._conn.execute("BEGIN")
+                # Thêm trước rồi xóa: nonce phát và dùng trong cùng lô không còn lại trong bảng
+                self._conn.executemany("INSERT OR REPLACE INTO nonces VALUES (?, ?)", added.items())
+                self._conn.executemany("DELETE FROM nonces WHERE nonce = ?", removed)
+                self._conn.execute("DELETE FROM nonces WHERE expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self._conn.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+class _Shard:
+    """Một phần của kho: nonce -> hạn dùng theo thứ tự phát (TTL cố định nên cũng là thứ tự hết hạn)"""
+
+    __slots__ = ("entries", "lock", "issued", "consumed", "rejected", "expired", "evicted")
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, float]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.issued = 0
+        self.consumed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.evicted = 0
+
+
+class NonceStore:
+    """
+    Kho nonce trong bộ nhớ: `issue()` phát nonce mới, `consume()` dùng đúng một lần.
+
+    Mỗi shard có khóa và bộ đếm riêng nên các luồng đăng nhập song song hiếm khi chờ nhau.
+    Nonce hết hạn được dọn dần ở đầu mỗi shard khi phát nonce mới; khi shard đầy,
+    nonce cũ nhất bị loại. Với persistence dùng chung (`shared`), persistence quyết định
+    nonce còn dùng được không, bộ nhớ chỉ để dọn nonce do tiến trình này phát.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_NONCE_TTL,
+        max_size: int = DEFAULT_MAX_NONCES,
+        shards: int = DEFAULT_SHARDS,
+        persistence: Optional[NoncePersistence] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if ttl <= 0 or max_size < 1 or shards < 1:
+            raise ValueError("ttl, max_size và shards phải lớn hơn 0")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.persistence = persistence or NoncePersistence()
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_capacity = -(-max_size // shards)
+        for nonce, expires_at in self.persistence.load(clock()):
+            self._insert(self._shard(nonce), nonce, expires_at)
+
+    def _shard(self, nonce: str) -> _Shard:
+        return self._shards[hash(nonce) % len(self._shards)]
+
+    def issue(self) -> str:
+        """Phát một nonce mới, hết hạn sau `ttl` giây"""
+        nonce = secrets.token_hex(NONCE_BYTES)
+        expires_at = self._clock() + self.ttl
+        persistence = self.persistence
+        for old in self._insert(self._shard(nonce), nonce, expires_at):
+            persistence.discarded(old)
+        persistence.issued(nonce, expires_at)
+        return nonce
+
+    def _insert(self, shard: _Shard, nonce: str, expires_at: float) -> List[str]:
+        """Thêm nonce vào shard, dọn nonce hết hạn/cũ nhất; trả các nonce đã loại"""
+        discarded = []
+        now = self._clock()
+        with shard.lock:
+            entries = shard.entries
+            while entries:
+                oldest, oldest_expires_at = next(iter(entries.items()))
+                if oldest_expires_at > now and len(entries) < self._shard_capacity:
+                    break
+                entries.popitem(last=False)
+                discarded.append(oldest)
+                if oldest_expires_at > now:
+                    shard.evicted += 1
+                else:
+                    shard.expired += 1
+            entries[nonce] = expires_at
+            shard.issued += 1
+        return discarded
+
+    def consume(self, nonce: str) -> bool:
+        """Dùng nonce: True đúng một lần nếu nonce đã phát và chưa hết hạn"""
+        shard = self._shard(nonce)
+        if self.persistence.shared:
+            # Nonce có thể do tiến trình khác phát, và tiến trình khác có thể vừa dùng nó
+            expires_at = self.persistence.take(nonce)
+            with shard.lock:
+                shard.entries.pop(nonce, None)
+                if expires_at is None:
+                    shard.rejected += 1
+                    return False
+                if expires_at <= self._clock():
+                    shard.expired += 1
+                    return False
+                shard.consumed += 1
+                return True
+        with shard.lock:
+            expires_at = shard.entries.pop(nonce, None)
+            if expires_at is None:
+                shard.rejected += 1
+                return False
+            if expires_at <= self._clock():
+                shard.expired += 1
+                valid = False
+            else:
+                shard.consumed += 1
+                valid = True
+        self.persistence.discarded(nonce)
+        return valid
+
+    def __contains__(self, nonce: str) -> bool:
+        """Nonce đã phát, chưa dùng và chưa hết hạn (không tiêu thụ)"""
+        shard = self._shard(nonce)
+        with shard.lock:
+            expires_at = shard.entries.get(nonce)
+        return expires_at is not None and expires_at > self._clock()
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def stats(self) -> dict:
+        """Tổng hợp bộ đếm các shard: size, issued, consumed, rejected, expired, evicted"""
+        totals = {"size": 0, "max_size": self.max_size, "shards": len(self._shards)}
+        for name in ("issued", "consumed", "rejected", "expired", "evicted"):
+            totals[name] = 0
+        for shard in self._shards:
+            with shard.lock:
+                totals["size"] += len(shard.entries)
+                for name in ("issued", "consumed", "rejected", "expired", "evicted"):
+                    totals[name] += getattr(shard, name)
+        return totals
+
+    def close(self) -> None:
+        """Ghi nốt thao tác đang chờ và đóng persistence"""
+        self.persistence.close()
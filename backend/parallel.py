@@ -0,0 +1,417 @@
+"""
+Tiện ích xử lý song song bằng tiến trình
+Chia việc thành từng lô, chạy trên process pool và trả kết quả đúng thứ tự
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from hd import format_path, parse_path
+from results import address_matches
+from wallet_core import WalletCore
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Mỗi tiến trình worker giữ một WalletCore riêng, tạo một lần rồi dùng lại
+_worker_core: Optional[WalletCore] = None
+
+
+def default_workers() -> int:
+    """Số worker mặc định: bằng số lõi CPU khả dụng"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Chia iterable thành các list có tối đa `size` phần tử, không đọc trước"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_imap(
+    executor: Executor,
+    fn: Callable[[Any], Any],
+    chunks: Iterable[Any],
+    max_pending: int,
+) -> Iterator[Any]:
+    """
+    Gửi từng lô vào executor và trả kết quả theo đúng thứ tự đầu vào.
+
+    Chỉ giữ tối đa `max_pending` lô đang chạy nên bộ nhớ không tăng theo
+    kích thước đầu vào (khác với `Executor.map` vốn submit toàn bộ ngay).
+    """
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(fn, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def get_worker_core() -> WalletCore:
+    """Lấy WalletCore của tiến trình hiện tại"""
+    global _worker_core
+    if _worker_core is None:
+        _worker_core = WalletCore()
+    return _worker_core
+
+
+def call_core(method: str, args: tuple, kwargs: dict) -> Any:
+    """Gọi `WalletCore.<method>` trên WalletCore của tiến trình worker"""
+    return getattr(get_worker_core(), method)(*args, **kwargs)
+
+
+def call_core_observed(method: str, args: tuple, kwargs: dict) -> tuple:
+    """
+    Như `call_core` nhưng trả (kết quả, list (bước, số giây)) đo trong worker,
+    để tiến trình API ghi vào metrics của mình (observer không qua được ranh giới tiến trình).
+    """
+    core = get_worker_core()
+    spans = []
+    core.observer = lambda operation, seconds: spans.append((operation, seconds))
+    try:
+        return getattr(core, method)(*args, **kwargs), spans
+    finally:
+        core.observer = None
+
+
+def sign_items(core: WalletCore, items: List[tuple]) -> List[dict]:
+    """
+    Ký một lô thông điệp bằng `core`.
+
+    Args:
+        items: list các tuple (index, message, private_key_hex, personal, address);
+            mục có `address` ký bằng khóa đã mở khóa trong `core`
+
+    Returns:
+        list: kết quả ký kèm `index`, hoặc `error` nếu mục đó lỗi
+    """
+    results = []
+    for index, message, private_key_hex, personal, address in items:
+        try:
+            if address:
+                result = core.sign_message_with_address(message, address, personal)
+            elif private_key_hex:
+                result = core.sign_message(message, private_key_hex, personal)
+            else:
+                raise ValueError("Cần private_key hoặc address")
+            result["index"] = index
+            result["message"] = message
+        except Exception as e:
+            result = {"index": index, "error": str(e)}
+        results.append(result)
+    return results
+
+
+def sign_chunk(items: List[tuple]) -> List[dict]:
+    """Ký một lô thông điệp trong tiến trình worker (xem `sign_items`)"""
+    return sign_items(get_worker_core(), items)
+
+
+def sign_typed_items(core: WalletCore, items: List[tuple]) -> List[dict]:
+    """
+    Ký một lô typed data EIP-712 bằng `core`; cache schema/domain của `core` được dùng lại giữa các mục.
+
+    Args:
+        items: list các tuple (index, typed_data, private_key_hex, address)
+
+    Returns:
+        list: kết quả ký kèm `index`, hoặc `error` nếu mục đó lỗi
+    """
+    results = []
+    for index, typed_data, private_key_hex, address in items:
+        try:
+            if address:
+                result = core.sign_typed_data_with_address(typed_data, address)
+            elif private_key_hex:
+                result = core.sign_typed_data(typed_data, private_key_hex)
+            else:
+                raise ValueError("Cần private_key hoặc address")
+            result["index"] = index
+        except Exception as e:
+            result = {"index": index, "error": str(e)}
+        results.append(result)
+    return results
+
+
+def sign_typed_chunk(items: List[tuple]) -> List[dict]:
+    """Ký một lô typed data trong tiến trình worker (xem `sign_typed_items`)"""
+    return sign_typed_items(get_worker_core(), items)
+
+
+def verify_typed_items(core: WalletCore, items: List[tuple]) -> List[dict]:
+    """
+    Xác thực một lô chữ ký EIP-712 bằng `core`.
+
+    Args:
+        items: list các tuple (index, typed_data, signature, public_key, address, strict, require_low_s)
+
+    Returns:
+        list: {index, valid, address, message_hash, match_expected?} hoặc {index, valid: False, error}
+    """
+    results = []
+    for index, typed_data, signature, public_key, expected, strict, require_low_s in items:
+        try:
+            if public_key:
+                valid, recovered_address, message_hash = core.verify_typed_data_with_public_key(
+                    typed_data, signature, public_key
+                )
+            else:
+                valid, recovered_address, message_hash = core.verify_typed_data(
+                    typed_data, signature, strict, require_low_s
+                )
+            result = {"index": index, "valid": valid, "address": recovered_address, "message_hash": message_hash}
+            _apply_expected(result, expected)
+        except Exception as e:
+            result = {"index": index, "valid": False, "error": str(e)}
+        results.append(result)
+    return results
+
+
+def verify_typed_chunk(items: List[tuple]) -> List[dict]:
+    """Xác thực một lô chữ ký EIP-712 trong tiến trình worker (xem `verify_typed_items`)"""
+    return verify_typed_items(get_worker_core(), items)
+
+
+def generate_chunk(task: tuple) -> str:
+    """
+    Sinh một lô cặp khóa và định dạng sẵn thành văn bản.
+
+    Args:
+        task: (số cặp khóa, "ndjson" | "csv")
+
+    Returns:
+        str: các dòng NDJSON/CSV, mỗi dòng một ví
+    """
+    count, output_format = task
+    core = get_worker_core()
+    lines = []
+    for _ in range(count):
+        private_key, public_key, address = core.generate_raw_keypair().to_tuple()
+        if output_format == "csv":
+            lines.append(f"{private_key},{public_key},{address}\n")
+        else:
+            lines.append(json.dumps({
+                "private_key": private_key,
+                "public_key": public_key,
+                "address": address,
+            }) + "\n")
+    return "".join(lines)
+
+
+def derive_items(core: WalletCore, task: tuple) -> str:
+    """
+    Dẫn xuất một dải địa chỉ HD và định dạng sẵn thành văn bản.
+
+    Nút cha `path` nằm trong cache HD của `core`, nên các lô kế tiếp của cùng
+    seed/đường dẫn chỉ làm việc ở cấp cuối.
+
+    Args:
+        task: (seed, đường dẫn cha, chỉ số đầu, chỉ số cuối (không gồm), "ndjson" | "csv", kèm khóa riêng)
+
+    Returns:
+        str: các dòng NDJSON/CSV {index, path, address, public_key, private_key?}
+    """
+    seed, path, start, stop, output_format, include_private_key = task
+    indices = parse_path(path)
+    prefix = format_path(indices)
+    lines = []
+    for index, keypair in zip(range(start, stop), core.derive_raw_keypairs(seed, indices, range(start, stop))):
+        private_key, public_key, address = keypair.to_tuple()
+        if output_format == "csv":
+            row = f"{index},{prefix}/{index},{address},{public_key}"
+            lines.append(f"{row},{private_key}\n" if include_private_key else f"{row}\n")
+        else:
+            record = {"index": index, "path": f"{prefix}/{index}", "address": address, "public_key": public_key}
+            if include_private_key:
+                record["private_key"] = private_key
+            lines.append(json.dumps(record) + "\n")
+    return "".join(lines)
+
+
+def derive_chunk(task: tuple) -> str:
+    """Dẫn xuất một dải địa chỉ HD trong tiến trình worker (xem `derive_items`)"""
+    return derive_items(get_worker_core(), task)
+
+
+def derive_tasks(seed: bytes, path: str, indices: range, output_format: str,
+                 include_private_key: bool, chunk_size: int) -> Iterator[tuple]:
+    """Chia dải chỉ số thành các task cho `derive_chunk`"""
+    for start in range(indices.start, indices.stop, chunk_size):
+        yield seed, path, start, min(start + chunk_size, indices.stop), output_format, include_private_key
+
+
+def sign_tx_items(core: WalletCore, task: tuple) -> str:
+    """
+    Ký một lô giao dịch cùng người gửi và định dạng sẵn thành văn bản.
+
+    Args:
+        task: (TransactionTemplate, khóa riêng 32 byte hoặc địa chỉ đã mở khóa, vị trí của mục đầu,
+            list (nonce, to, value, data), "ndjson" | "csv")
+
+    Returns:
+        str: các dòng NDJSON {index, nonce, from, to, value, hash, raw_transaction} hoặc CSV cùng cột
+    """
+    template, key, start, items, output_format = task
+    if isinstance(key, str):
+        signed = core.sign_transactions_with_address(template, key, items)
+    else:
+        signed = core.sign_transactions_bytes(template, key, items)
+    lines = []
+    for index, transaction in enumerate(signed, start=start):
+        record = transaction.to_dict()
+        if output_format == "csv":
+            lines.append(f"{index},{record['nonce']},{record['from']},{record['to']},{record['value']},"
+                         f"{record['hash']},{record['raw_transaction']}\n")
+        else:
+            lines.append(json.dumps({"index": index, **record}) + "\n")
+    return "".join(lines)
+
+
+def sign_tx_chunk(task: tuple) -> str:
+    """Ký một lô giao dịch trong tiến trình worker (xem `sign_tx_items`)"""
+    return sign_tx_items(get_worker_core(), task)
+
+
+def sign_tx_tasks(template, key, payments: List[tuple], start_nonce: int, output_format: str,
+                  chunk_size: int) -> Iterator[tuple]:
+    """
+    Gán nonce tăng dần từ `start_nonce` theo thứ tự `payments` (to, value, data) và chia thành task
+    cho `sign_tx_chunk`; template và khóa đi kèm mỗi task nên worker không phải nạp lại gì khác
+    """
+    for start in range(0, len(payments), chunk_size):
+        items = [
+            (start_nonce + offset, to, value, data)
+            for offset, (to, value, data) in enumerate(payments[start:start + chunk_size], start=start)
+        ]
+        yield template, key, start, items, output_format
+
+
+def _parse_bool(value: Any, default: bool = True) -> bool:
+    """Đọc cờ boolean từ JSON hoặc ô CSV"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def _apply_expected(result: dict, expected: Optional[str]) -> dict:
+    """Ghi `match_expected` và hạ `valid` nếu địa chỉ khôi phục khác `expected` (nếu có), như /api/wallet/verify"""
+    if expected:
+        match_expected = address_matches(result["address"], expected)
+        result["match_expected"] = match_expected
+        result["valid"] = result["valid"] and match_expected
+    return result
+
+
+def verify_record(core: WalletCore, record: dict) -> dict:
+    """
+    Xác thực một bản ghi {message, signature, address?/public_key?, personal?}
+
+    Logic so khớp địa chỉ giống /api/wallet/verify.
+    """
+    message = record["message"]
+    signature = record["signature"]
+    personal = _parse_bool(record.get("personal"))
+    public_key = record.get("public_key")
+
+    if public_key:
+        valid, recovered_address, message_hash = core.verify_signature_with_public_key(
+            message, signature, public_key, personal
+        )
+    else:
+        valid, recovered_address, message_hash = core.verify_signature(message, signature, personal)
+
+    result = {"valid": valid, "address": recovered_address, "message_hash": message_hash}
+    return _apply_expected(result, record.get("address"))
+
+
+def verify_attestation_record(
+    core: WalletCore, record: dict, expected: Optional[str] = None, require_low_s: bool = False
+) -> dict:
+    """
+    Xác thực một bản ghi bằng chứng lô {message, index, count, proof, root, signature, address?, personal?}
+    như đầu ra của `wallet attest`; `expected` thay cho `address` của bản ghi.
+
+    Chạy trong cùng tiến trình cho cả file để cache người ký theo gốc của `core` được dùng lại.
+    """
+    personal = _parse_bool(record.get("personal"))
+    valid, recovered_address, message_hash = core.verify_attestation(record["message"], record, personal, require_low_s)
+    result = {"valid": valid, "address": recovered_address, "message_hash": message_hash}
+    return _apply_expected(result, expected or record.get("address"))
+
+
+def verify_attestation_items(core: WalletCore, items: List[tuple]) -> List[dict]:
+    """
+    Xác thực một lô bằng chứng bằng `core` của tiến trình API (cache người ký theo gốc dùng chung).
+
+    Args:
+        items: list các tuple (index, bản ghi như `verify_attestation_record`, require_low_s)
+    """
+    return [
+        {"index": index, **verify_attestation_record(core, record, require_low_s=require_low_s)}
+        for index, record, require_low_s in items
+    ]
+
+
+def verify_chunk(items: List[tuple]) -> List[dict]:
+    """
+    Xác thực một lô bản ghi trong tiến trình worker.
+
+    Bản ghi không có `public_key` được khôi phục địa chỉ chung một lượt qua
+    `WalletCore.recover_batch`; bản ghi có `public_key` đi qua `verify_record`.
+
+    Args:
+        items: list các tuple (số dòng, bản ghi hoặc None, lỗi đọc hoặc None)
+
+    Returns:
+        list: kết quả kèm `line`; bản ghi hỏng có `error` thay cho kết quả
+    """
+    core = get_worker_core()
+    results = []
+    lines = []
+    pending = []
+    for line, record, error in items:
+        result = None
+        if error is None:
+            try:
+                if record.get("public_key"):
+                    result = verify_record(core, record)
+                else:
+                    message_hash = core.hash_message(record["message"], _parse_bool(record.get("personal")))
+                    result = {"valid": False, "address": None, "message_hash": "0x" + message_hash.hex()}
+                    pending.append((result, message_hash, record["signature"], record.get("address")))
+            except KeyError as e:
+                error = f"Thiếu trường {e}"
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            result = {"valid": False, "error": error}
+        lines.append(line)
+        results.append(result)
+
+    if pending:
+        recovered = core.recover_batch([item[1] for item in pending], [item[2] for item in pending])
+        for (result, _, _, expected), outcome in zip(pending, recovered):
+            # Chữ ký hỏng cho valid=False như verify_signature, không phải lỗi bản ghi
+            result["address"] = outcome["address"]
+            result["valid"] = outcome["address"] is not None
+            _apply_expected(result, expected)
+    for line, result in zip(lines, results):
+        result["line"] = line
+    return results
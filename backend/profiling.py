@@ -0,0 +1,175 @@
+"""
+Profile theo yêu cầu cho API (bật bằng WALLET_PROFILING=1)
+Yêu cầu được chọn (header X-Wallet-Profile hoặc lấy mẫu theo tỉ lệ) chạy phần việc trong crypto
+executor dưới cProfile; kết quả gộp của mọi yêu cầu đã chọn xem qua /api/admin/profile
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+PROFILE_HEADER = b"x-wallet-profile"
+SORT_KEYS = ("cumulative", "tottime", "calls")
+# Không profile chính các route quản trị/metrics
+EXCLUDED_PREFIXES = ("/api/admin/", "/metrics")
+
+# Danh sách profile của yêu cầu hiện tại (None: yêu cầu không được chọn)
+_current: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar("wallet_request_profile", default=None)
+
+
+def profiled(fn: Callable) -> Callable:
+    """
+    `fn` chạy dưới cProfile riêng nếu yêu cầu hiện tại được chọn, ngược lại trả nguyên `fn`.
+
+    Gọi ở luồng gửi tác vụ (event loop) để đọc đúng yêu cầu; mỗi lời gọi có profile riêng
+    nên các tác vụ song song của cùng một yêu cầu không dùng chung một profile giữa các thread.
+    """
+    sink = _current.get()
+    if sink is None:
+        return fn
+
+    def run(*args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            sink.append(profile)
+
+    return run
+
+
+class RequestProfiler:
+    """
+    Bộ gộp profile của các yêu cầu đã chọn.
+
+    Yêu cầu được chọn khi có header `X-Wallet-Profile` (khác "0") hoặc theo `sample_rate`
+    (0 = chỉ theo header). Ngoài thống kê hàm còn ghi theo route số yêu cầu, tổng thời gian
+    thực và tổng thời gian trong executor, để thấy phần còn lại (event loop, phân tích JSON,
+    chờ hàng đợi) chiếm bao nhiêu.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 0.0):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, value: float) -> None:
+        if not 0.0 <= value <= 1.0:
+            raise ValueError("sample_rate phải nằm trong [0, 1]")
+        self._sample_rate = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = pstats.Stats()
+            self._routes = {}
+            self.requests = 0
+            self.started_at = time.time()
+
+    def select(self, scope: dict) -> bool:
+        """Yêu cầu HTTP này có được profile không"""
+        if not self.enabled or scope["path"].startswith(EXCLUDED_PREFIXES):
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value not in (b"", b"0")
+        return self._sample_rate > 0 and random.random() < self._sample_rate
+
+    def record(self, route: str, seconds: float, profiles: List[cProfile.Profile]) -> None:
+        """Gộp profile của một yêu cầu vừa xong"""
+        stats = [pstats.Stats(profile) for profile in profiles]
+        executor_seconds = sum(item.total_tt for item in stats)
+        with self._lock:
+            for item in stats:
+                self._stats.add(item)
+            entry = self._routes.setdefault(route, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += executor_seconds
+            self.requests += 1
+
+    def report(self, sort: str = "cumulative", limit: int = 30) -> dict:
+        """Tổng hợp dạng JSON: theo route và `limit` hàm đứng đầu theo `sort`"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort phải là {', '.join(SORT_KEYS)}")
+        column = {"cumulative": 3, "tottime": 2, "calls": 1}[sort]
+        with self._lock:
+            rows = sorted(self._stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+            routes = {
+                route: {
+                    "requests": count,
+                    "wall_seconds": round(wall, 6),
+                    "executor_seconds": round(executor, 6),
+                    "mean_ms": round(wall / count * 1000, 3),
+                }
+                for route, (count, wall, executor) in sorted(self._routes.items())
+            }
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self._sample_rate,
+                "since": self.started_at,
+                "requests": self.requests,
+                "routes": routes,
+                "sort": sort,
+                "functions": [
+                    {
+                        "function": name,
+                        "file": filename,
+                        "line": line,
+                        "calls": calls,
+                        "primitive_calls": primitive_calls,
+                        "tottime": round(tottime, 6),
+                        "cumtime": round(cumtime, 6),
+                    }
+                    for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in rows
+                ],
+            }
+
+    def text(self, sort: str = "cumulative", limit: int = 30) -> str:
+        """Bảng pstats quen thuộc"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort phải là {', '.join(SORT_KEYS)}")
+        out = io.StringIO()
+        with self._lock:
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def dump(self) -> bytes:
+        """Nội dung file .prof (như `pstats.Stats.dump_stats`), mở bằng pstats hoặc snakeviz"""
+        with self._lock:
+            return marshal.dumps(self._stats.stats)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware đặt profile cho yêu cầu được `profiler.select()` chọn rồi gộp khi xong"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.select(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sink = []
+        token = _current.set(sink)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.profiler.record(f"{scope['method']} {route}", elapsed, sink)
@@ -0,0 +1,241 @@
+"""
+Kiểu kết quả dạng bytes cho WalletCore
+Giữ giá trị thô (khóa 32/64 byte, địa chỉ 20 byte, chữ ký 65 byte) và chỉ định dạng
+hex/checksum khi xuất ra; checksum EIP-55 được ghi nhớ cho các địa chỉ lặp lại
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from eth_hash.auto import keccak
+from eth_keys.constants import SECPK1_N
+
+HALF_CURVE_ORDER = SECPK1_N // 2
+CHECKSUM_CACHE_SIZE = 4096
+
+
+def encode_checksum(address_bytes: bytes) -> str:
+    """Địa chỉ checksum EIP-55 từ 20 byte (không qua cache, dùng cho địa chỉ chỉ gặp một lần)"""
+    hex_address = address_bytes.hex()
+    hashed = keccak(hex_address.encode("ascii")).hex()
+    # Nibble băm >= 8 thì viết hoa; các chữ số hex '8'..'f' đều lớn hơn '7' trong ASCII
+    return "0x" + "".join(char.upper() if nibble > "7" else char for char, nibble in zip(hex_address, hashed))
+
+
+@lru_cache(maxsize=CHECKSUM_CACHE_SIZE)
+def checksum_address(address_bytes: bytes) -> str:
+    """Như `encode_checksum` nhưng ghi nhớ: người ký/địa chỉ đã mở khóa thường lặp lại"""
+    return encode_checksum(address_bytes)
+
+
+def address_matches(recovered_address: Optional[str], expected: str) -> bool:
+    """Địa chỉ khôi phục có trùng địa chỉ mong đợi không (không phân biệt hoa/thường, `0x` tùy chọn)"""
+    if not recovered_address:
+        return False
+    if not expected.startswith("0x"):
+        expected = f"0x{expected}"
+    return recovered_address.lower() == expected.lower()
+
+
+def _hex(value: bytes) -> str:
+    return f"0x{value.hex()}"
+
+
+class Keypair:
+    """Cặp khóa dạng bytes; unpack được như tuple (private_key, public_key, address)"""
+
+    __slots__ = ("private_key", "public_key", "address")
+
+    def __init__(self, private_key: bytes, public_key: bytes, address: bytes):
+        self.private_key = private_key
+        self.public_key = public_key
+        self.address = address
+
+    def __iter__(self):
+        return iter((self.private_key, self.public_key, self.address))
+
+    def to_tuple(self) -> Tuple[str, str, str]:
+        """(private_key_hex, public_key_hex, address checksum)"""
+        return _hex(self.private_key), _hex(self.public_key), encode_checksum(self.address)
+
+
+class SignedHash:
+    """Chữ ký 65 byte (r ‖ s ‖ v) trên hash 32 byte cùng địa chỉ 20 byte của người ký"""
+
+    __slots__ = ("signature", "message_hash", "address")
+
+    def __init__(self, signature: bytes, message_hash: bytes, address: bytes):
+        self.signature = signature
+        self.message_hash = message_hash
+        self.address = address
+
+    @property
+    def v(self) -> int:
+        return self.signature[64]
+
+    @property
+    def r(self) -> int:
+        return int.from_bytes(self.signature[:32], "big")
+
+    @property
+    def s(self) -> int:
+        return int.from_bytes(self.signature[32:64], "big")
+
+    @property
+    def is_low_s(self) -> bool:
+        return self.s <= HALF_CURVE_ORDER
+
+    def to_dict(self) -> dict:
+        """Dạng dict của `WalletCore.sign_message` (hex/checksum)"""
+        signature = self.signature
+        return {
+            "signature": _hex(signature),
+            "message_hash": _hex(self.message_hash),
+            "address": checksum_address(self.address),
+            "v": signature[64],
+            "r": _hex(signature[:32]),
+            "s": _hex(signature[32:64]),
+            "is_low_s": self.is_low_s,
+        }
+
+
+class Verification:
+    """Kết quả xác thực: hợp lệ hay không, địa chỉ 20 byte (None nếu không khôi phục được) và hash"""
+
+    __slots__ = ("valid", "address", "message_hash")
+
+    def __init__(self, valid: bool, address: Optional[bytes], message_hash: bytes):
+        self.valid = valid
+        self.address = address
+        self.message_hash = message_hash
+
+    def to_tuple(self) -> Tuple[bool, Optional[str], str]:
+        """Dạng tuple của `WalletCore.verify_signature`: (valid, address checksum, message_hash hex)"""
+        address = checksum_address(self.address) if self.address else None
+        return self.valid, address, _hex(self.message_hash)
+
+
+class Recovery:
+    """Kết quả khôi phục của một mục trong lô: địa chỉ 20 byte hoặc thông báo lỗi"""
+
+    __slots__ = ("address", "error")
+
+    def __init__(self, address: Optional[bytes], error: Optional[str] = None):
+        self.address = address
+        self.error = error
+
+    def to_dict(self) -> dict:
+        """{"address"} hoặc {"address": None, "error"} như `WalletCore.recover_batch`"""
+        if self.address is None:
+            return {"address": None, "error": self.error}
+        return {"address": checksum_address(self.address)}
+
+
+class SignedTransaction:
+    """Giao dịch đã ký (raw bytes) cùng người gửi 20 byte, nonce, người nhận và số tiền để báo cáo"""
+
+    __slots__ = ("raw_transaction", "sender", "nonce", "to", "value")
+
+    def __init__(self, raw_transaction: bytes, sender: bytes, nonce: int, to: bytes, value: int):
+        self.raw_transaction = raw_transaction
+        self.sender = sender
+        self.nonce = nonce
+        self.to = to
+        self.value = value
+
+    @property
+    def hash(self) -> bytes:
+        """Hash giao dịch: keccak của raw"""
+        return keccak(self.raw_transaction)
+
+    def to_dict(self) -> dict:
+        """{nonce, from, to, value, hash, raw_transaction}; value là chuỗi thập phân wei (vượt 2^53)"""
+        return {
+            "nonce": self.nonce,
+            "from": checksum_address(self.sender),
+            "to": encode_checksum(self.to) if self.to else None,
+            "value": str(self.value),
+            "hash": _hex(self.hash),
+            "raw_transaction": _hex(self.raw_transaction),
+        }
+
+
+def _from_hex(value: str) -> bytes:
+    return bytes.fromhex(value[2:] if value[:2] in ("0x", "0X") else value)
+
+
+class InclusionProof:
+    """Bằng chứng một hash thông điệp thuộc lô đã ký: vị trí, số lá, hash anh em nối liền, gốc và chữ ký gốc"""
+
+    __slots__ = ("message_hash", "index", "count", "path", "root", "signature")
+
+    def __init__(self, message_hash: bytes, index: int, count: int, path: bytes, root: bytes, signature: bytes):
+        self.message_hash = message_hash
+        self.index = index
+        self.count = count
+        self.path = path
+        self.root = root
+        self.signature = signature
+
+    @classmethod
+    def from_dict(cls, message_hash: bytes, proof: dict) -> "InclusionProof":
+        """Từ {index, count, proof, root, signature} hex như `to_dict()`; ValueError/KeyError nếu thiếu hoặc sai hex"""
+        return cls(
+            message_hash,
+            int(proof["index"]),
+            int(proof["count"]),
+            _from_hex(proof["proof"]),
+            _from_hex(proof["root"]),
+            _from_hex(proof["signature"]),
+        )
+
+    def to_dict(self) -> dict:
+        """Bản ghi tự đủ để xác thực một thông điệp: {index, count, message_hash, proof, root, signature}"""
+        return {
+            "index": self.index,
+            "count": self.count,
+            "message_hash": _hex(self.message_hash),
+            "proof": _hex(self.path),
+            "root": _hex(self.root),
+            "signature": _hex(self.signature),
+        }
+
+
+class BatchAttestation:
+    """Lô đã ký: cây Merkle của các hash thông điệp cùng một chữ ký 65 byte trên gốc và địa chỉ người ký"""
+
+    __slots__ = ("tree", "signature", "address")
+
+    def __init__(self, tree, signature: bytes, address: bytes):
+        self.tree = tree
+        self.signature = signature
+        self.address = address
+
+    @property
+    def root(self) -> bytes:
+        return self.tree.root()
+
+    def __len__(self) -> int:
+        return len(self.tree)
+
+    def proof(self, index: int) -> InclusionProof:
+        tree = self.tree
+        return InclusionProof(tree.message_hash(index), index, len(tree), tree.proof(index), tree.root(), self.signature)
+
+    def proofs(self):
+        """`InclusionProof` cho mọi thông điệp theo thứ tự, sinh dần"""
+        root, count = self.tree.root(), len(self.tree)
+        for index, message_hash, path in self.tree.proofs():
+            yield InclusionProof(message_hash, index, count, path, root, self.signature)
+
+    def to_dict(self) -> dict:
+        """{root, signature, address, count, proofs: [{index, message_hash, proof}]}; gốc/chữ ký không lặp lại mỗi mục"""
+        return {
+            "root": _hex(self.root),
+            "signature": _hex(self.signature),
+            "address": checksum_address(self.address),
+            "count": len(self.tree),
+            "proofs": [
+                {"index": index, "message_hash": _hex(message_hash), "proof": _hex(path)}
+                for index, message_hash, path in self.tree.proofs()
+            ],
+        }
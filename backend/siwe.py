@@ -0,0 +1,208 @@
+"""
+Sign-In with Ethereum (EIP-4361)
+Phân tích thông điệp đăng nhập theo đúng cú pháp của đặc tả, dựng lại văn bản để ký
+và kiểm tra địa chỉ, domain, thời hạn sau khi khôi phục người ký
+"""
+import re
+from datetime import datetime, timezone
+from typing import FrozenSet, Iterable, List, Optional, Union
+
+from results import encode_checksum
+
+_HEADER = re.compile(
+    r"^(?:(?P<scheme>[a-zA-Z][a-zA-Z0-9+\-.]*)://)?(?P<domain>[^\s/?#]+)"
+    r" wants you to sign in with your Ethereum account:$"
+)
+_ADDRESS = re.compile(r"^0x[0-9a-fA-F]{40}$")
+_NONCE = re.compile(r"^[a-zA-Z0-9]{8,}$")
+_URI = re.compile(r"^[a-zA-Z][a-zA-Z0-9+\-.]*:\S+$")
+
+# Trường có nhãn theo đúng thứ tự của đặc tả: (nhãn, thuộc tính, bắt buộc)
+_FIELDS = (
+    ("URI", "uri", True),
+    ("Version", "version", True),
+    ("Chain ID", "chain_id", True),
+    ("Nonce", "nonce", True),
+    ("Issued At", "issued_at", True),
+    ("Expiration Time", "expiration_time", False),
+    ("Not Before", "not_before", False),
+    ("Request ID", "request_id", False),
+)
+
+
+class SiweError(ValueError):
+    """Thông điệp SIWE sai cú pháp hoặc không qua được kiểm tra"""
+
+
+def parse_domains(text: Optional[str]) -> FrozenSet[str]:
+    """Tập domain từ chuỗi phân tách bằng dấu phẩy (ví dụ WALLET_SIWE_DOMAIN="example.com,app.example.com")"""
+    return frozenset(part.strip() for part in (text or "").split(",") if part.strip())
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Thời điểm RFC 3339 (cho phép hậu tố Z) có múi giờ"""
+    try:
+        parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith(("Z", "z")) else value)
+    except ValueError:
+        raise SiweError(f"Thời điểm không hợp lệ: {value}") from None
+    if parsed.tzinfo is None:
+        raise SiweError(f"Thời điểm phải có múi giờ: {value}")
+    return parsed
+
+
+class SiweMessage:
+    """Các trường của một thông điệp EIP-4361"""
+
+    __slots__ = (
+        "scheme", "domain", "address", "statement", "uri", "version", "chain_id", "nonce",
+        "issued_at", "expiration_time", "not_before", "request_id", "resources",
+    )
+
+    def __init__(
+        self,
+        domain: str,
+        address: str,
+        uri: str,
+        nonce: str,
+        issued_at: str,
+        chain_id: int = 1,
+        version: str = "1",
+        statement: Optional[str] = None,
+        expiration_time: Optional[str] = None,
+        not_before: Optional[str] = None,
+        request_id: Optional[str] = None,
+        resources: Optional[List[str]] = None,
+        scheme: Optional[str] = None,
+    ):
+        self.scheme = scheme
+        self.domain = domain
+        self.address = address
+        self.statement = statement
+        self.uri = uri
+        self.version = version
+        self.chain_id = chain_id
+        self.nonce = nonce
+        self.issued_at = issued_at
+        self.expiration_time = expiration_time
+        self.not_before = not_before
+        self.request_id = request_id
+        self.resources = resources
+
+    @classmethod
+    def parse(cls, text: str) -> "SiweMessage":
+        """
+        Phân tích văn bản đã ký; mọi sai lệch so với cú pháp EIP-4361 đều bị từ chối.
+
+        Raises:
+            SiweError: sai cú pháp, địa chỉ không ở dạng checksum, nonce/version/chain ID không hợp lệ
+        """
+        lines = text.split("\n")
+        header = _HEADER.match(lines[0])
+        if header is None:
+            raise SiweError("Dòng đầu phải là '<domain> wants you to sign in with your Ethereum account:'")
+        if len(lines) < 4 or not _ADDRESS.match(lines[1]) or lines[2] != "":
+            raise SiweError("Dòng thứ hai phải là địa chỉ Ethereum, theo sau là một dòng trống")
+        address = lines[1]
+        if encode_checksum(bytes.fromhex(address[2:])) != address:
+            raise SiweError("Địa chỉ phải ở dạng checksum EIP-55")
+
+        # Không có statement: hai dòng trống liên tiếp; có statement: statement rồi một dòng trống
+        if lines[3] == "":
+            statement, position = None, 4
+        else:
+            if len(lines) < 5 or lines[4] != "":
+                raise SiweError("Statement phải nằm trên một dòng, theo sau là một dòng trống")
+            statement, position = lines[3], 5
+
+        values = {}
+        for label, attribute, required in _FIELDS:
+            prefix = f"{label}: "
+            if position < len(lines) and lines[position].startswith(prefix):
+                values[attribute] = lines[position][len(prefix):]
+                position += 1
+            elif required:
+                raise SiweError(f"Thiếu trường bắt buộc '{label}'")
+
+        resources = None
+        if position < len(lines) and lines[position] == "Resources:":
+            resources = []
+            position += 1
+            while position < len(lines) and lines[position].startswith("- "):
+                resources.append(lines[position][2:])
+                position += 1
+        if position != len(lines):
+            raise SiweError(f"Dòng không hợp lệ: {lines[position]!r}")
+
+        if not _URI.match(values["uri"]):
+            raise SiweError(f"URI không hợp lệ: {values['uri']}")
+        if values["version"] != "1":
+            raise SiweError(f"Version phải là 1 (nhận {values['version']})")
+        if not values["chain_id"].isdigit():
+            raise SiweError(f"Chain ID không hợp lệ: {values['chain_id']}")
+        if not _NONCE.match(values["nonce"]):
+            raise SiweError("Nonce phải gồm ít nhất 8 ký tự chữ hoặc số")
+        for attribute in ("issued_at", "expiration_time", "not_before"):
+            if attribute in values:
+                parse_timestamp(values[attribute])
+
+        return cls(
+            domain=header.group("domain"),
+            address=address,
+            uri=values["uri"],
+            nonce=values["nonce"],
+            issued_at=values["issued_at"],
+            chain_id=int(values["chain_id"]),
+            version=values["version"],
+            statement=statement,
+            expiration_time=values.get("expiration_time"),
+            not_before=values.get("not_before"),
+            request_id=values.get("request_id"),
+            resources=resources,
+            scheme=header.group("scheme"),
+        )
+
+    def prepare(self) -> str:
+        """Văn bản EIP-4361 để ví ký (personal_sign)"""
+        origin = f"{self.scheme}://{self.domain}" if self.scheme else self.domain
+        lines = [f"{origin} wants you to sign in with your Ethereum account:", self.address, ""]
+        if self.statement is not None:
+            lines.append(self.statement)
+        lines.append("")
+        values = {attribute: getattr(self, attribute) for _, attribute, _ in _FIELDS}
+        values["chain_id"] = str(self.chain_id)
+        for label, attribute, _ in _FIELDS:
+            if values[attribute] is not None:
+                lines.append(f"{label}: {values[attribute]}")
+        if self.resources is not None:
+            lines.append("Resources:")
+            lines.extend(f"- {resource}" for resource in self.resources)
+        return "\n".join(lines)
+
+    def check(self, recovered_address: Optional[str], domains: Union[str, Iterable[str]],
+              now: Optional[datetime] = None) -> None:
+        """
+        Kiểm tra sau khi khôi phục người ký (chưa gồm nonce, do kho nonce đảm nhận)
+
+        Args:
+            domains: Domain (hoặc các domain) do bên xác thực kiểm soát; bắt buộc theo EIP-4361,
+                không được lấy từ client
+
+        Raises:
+            SiweError: người ký khác địa chỉ trong thông điệp, không có domain để so, sai domain,
+                hết hạn hoặc chưa tới hiệu lực
+        """
+        if not recovered_address or recovered_address.lower() != self.address.lower():
+            raise SiweError("Chữ ký không thuộc về địa chỉ trong thông điệp")
+        domains = {domains} if isinstance(domains, str) else set(domains)
+        if not domains:
+            raise SiweError("Chưa cấu hình domain để kiểm tra thông điệp đăng nhập")
+        if self.domain not in domains:
+            raise SiweError(f"Domain không khớp (nhận {self.domain})")
+        now = now or datetime.now(timezone.utc)
+        if self.expiration_time is not None and now >= parse_timestamp(self.expiration_time):
+            raise SiweError("Thông điệp đăng nhập đã hết hạn")
+        if self.not_before is not None and now < parse_timestamp(self.not_before):
+            raise SiweError("Thông điệp đăng nhập chưa có hiệu lực")
+
+    def to_dict(self) -> dict:
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
@@ -0,0 +1,267 @@
+"""
+Mã hóa giao dịch Ethereum: RLP, giao dịch EIP-1559 (type 2) và legacy EIP-155
+Các trường chung của một đợt ký (chain ID, phí, gas, access list) được mã hóa RLP
+một lần trong `TransactionTemplate`; mỗi giao dịch chỉ còn ghép nonce, người nhận,
+số tiền và data vào các đoạn đã mã hóa sẵn
+"""
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, List, Optional, Tuple, Union
+
+from results import encode_checksum
+
+TX_TYPE_EIP1559 = "eip1559"
+TX_TYPE_LEGACY = "legacy"
+TX_TYPES = (TX_TYPE_EIP1559, TX_TYPE_LEGACY)
+DEFAULT_GAS_LIMIT = 21000
+
+# Đơn vị được chấp nhận trong số tiền/phí dạng chuỗi ("0.5 ether", "30 gwei")
+UNITS = {"wei": 0, "gwei": 9, "ether": 18, "eth": 18}
+
+Quantity = Union[int, str]
+
+
+def _length_prefix(length: int, offset: int) -> bytes:
+    if length < 56:
+        return bytes((offset + length,))
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((offset + 55 + len(length_bytes),)) + length_bytes
+
+
+def encode_bytes(value: bytes) -> bytes:
+    """RLP của một chuỗi byte"""
+    if len(value) == 1 and value[0] < 0x80:
+        return value
+    return _length_prefix(len(value), 0x80) + value
+
+
+def encode_int(value: int) -> bytes:
+    """RLP của số nguyên không âm (big-endian, không có byte 0 ở đầu; 0 là chuỗi rỗng)"""
+    return encode_bytes(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def encode_list(payload: bytes) -> bytes:
+    """RLP của danh sách có phần thân `payload` (các phần tử đã mã hóa nối liền)"""
+    return _length_prefix(len(payload), 0xC0) + payload
+
+
+def rlp_encode(item) -> bytes:
+    """RLP của bytes, số nguyên không âm hoặc list/tuple lồng nhau của chúng"""
+    if isinstance(item, (bytes, bytearray)):
+        return encode_bytes(bytes(item))
+    if isinstance(item, int) and item >= 0:
+        return encode_int(item)
+    if isinstance(item, (list, tuple)):
+        return encode_list(b"".join(rlp_encode(element) for element in item))
+    raise TypeError(f"Không mã hóa RLP được giá trị kiểu {type(item).__name__}")
+
+
+def parse_quantity(value: Quantity, name: str = "giá trị") -> int:
+    """
+    Số nguyên wei từ int, chuỗi thập phân, hex "0x..." hoặc số kèm đơn vị ("1.5 ether", "30gwei")
+
+    Raises:
+        ValueError: sai cú pháp, âm hoặc không phải số nguyên wei
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"{name} không hợp lệ: {value}")
+    if isinstance(value, int):
+        amount = value
+    else:
+        text = str(value).strip().lower()
+        if text.startswith("0x"):
+            try:
+                amount = int(text, 16)
+            except ValueError:
+                raise ValueError(f"{name} không hợp lệ: {value}") from None
+        else:
+            number, decimals = text, 0
+            for unit, unit_decimals in UNITS.items():
+                if text.endswith(unit) and text[:-len(unit)].rstrip()[-1:].isdigit():
+                    number, decimals = text[:-len(unit)].strip(), unit_decimals
+                    break
+            try:
+                scaled = Decimal(number).scaleb(decimals)
+            except InvalidOperation:
+                raise ValueError(f"{name} không hợp lệ: {value}") from None
+            if not scaled.is_finite() or scaled != scaled.to_integral_value():
+                raise ValueError(f"{name} phải là số nguyên wei: {value}")
+            amount = int(scaled)
+    if amount < 0:
+        raise ValueError(f"{name} không được âm: {value}")
+    return amount
+
+
+def parse_address(value: str, name: str = "địa chỉ") -> bytes:
+    """
+    Địa chỉ 20 byte; địa chỉ viết hoa/thường lẫn lộn phải đúng checksum EIP-55
+
+    Raises:
+        ValueError: sai độ dài, không phải hex hoặc sai checksum
+    """
+    text = value.strip() if isinstance(value, str) else ""
+    body = text[2:] if text[:2] in ("0x", "0X") else text
+    try:
+        address = bytes.fromhex(body)
+    except ValueError:
+        address = b""
+    if len(address) != 20 or len(body) != 40:
+        raise ValueError(f"{name} không hợp lệ: {value}")
+    if body != body.lower() and body != body.upper() and encode_checksum(address) != "0x" + body:
+        raise ValueError(f"{name} sai checksum EIP-55: {value}")
+    return address
+
+
+def parse_data(value: Optional[str]) -> bytes:
+    """Calldata từ hex (có/không 0x); rỗng hoặc None là không có data"""
+    if not value:
+        return b""
+    text = value[2:] if value[:2] in ("0x", "0X") else value
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        raise ValueError(f"data không phải hex: {value}") from None
+
+
+def _encode_access_list(access_list: Iterable) -> bytes:
+    """Access list EIP-2930 từ [{"address", "storage_keys"}] hoặc [(address, [khóa 32 byte])]"""
+    entries = []
+    for entry in access_list:
+        if isinstance(entry, dict):
+            address = entry.get("address")
+            keys = entry.get("storage_keys", entry.get("storageKeys", []))
+        else:
+            address, keys = entry
+        storage_keys = []
+        for key in keys:
+            key_bytes = parse_data(key)
+            if len(key_bytes) != 32:
+                raise ValueError(f"Storage key phải dài 32 byte: {key}")
+            storage_keys.append(key_bytes)
+        entries.append([parse_address(address, "địa chỉ trong access_list"), storage_keys])
+    return rlp_encode(entries)
+
+
+class TransactionTemplate:
+    """
+    Các trường chung của một đợt giao dịch, mã hóa RLP sẵn thành các đoạn cố định.
+
+    EIP-1559: 0x02 ‖ rlp([chain_id, nonce, priority_fee, max_fee, gas, to, value, data, access_list, y, r, s]).
+    Legacy EIP-155: rlp([nonce, gas_price, gas, to, value, data, v, r, s]), ký trên
+    rlp([..., chain_id, 0, 0]) với v = chain_id * 2 + 35 + y.
+    """
+
+    __slots__ = (
+        "tx_type", "chain_id", "gas_limit", "max_fee_per_gas", "max_priority_fee_per_gas", "gas_price",
+        "_prefix", "_head", "_middle", "_tail", "_v_offset",
+    )
+
+    def __init__(
+        self,
+        chain_id: int,
+        tx_type: str = TX_TYPE_EIP1559,
+        gas_limit: int = DEFAULT_GAS_LIMIT,
+        max_fee_per_gas: Optional[int] = None,
+        max_priority_fee_per_gas: Optional[int] = None,
+        gas_price: Optional[int] = None,
+        access_list: Iterable = (),
+    ):
+        if tx_type not in TX_TYPES:
+            raise ValueError(f"Loại giao dịch phải là {' hoặc '.join(TX_TYPES)} (nhận {tx_type})")
+        if chain_id < 1 or gas_limit < 1:
+            raise ValueError("chain_id và gas phải lớn hơn 0")
+        self.tx_type = tx_type
+        self.chain_id = chain_id
+        self.gas_limit = gas_limit
+        self.max_fee_per_gas = max_fee_per_gas
+        self.max_priority_fee_per_gas = max_priority_fee_per_gas
+        self.gas_price = gas_price
+        if tx_type == TX_TYPE_EIP1559:
+            if max_fee_per_gas is None or max_priority_fee_per_gas is None or gas_price is not None:
+                raise ValueError("Giao dịch EIP-1559 cần max_fee_per_gas và max_priority_fee_per_gas, không dùng gas_price")
+            if max_priority_fee_per_gas > max_fee_per_gas:
+                raise ValueError("max_priority_fee_per_gas không được lớn hơn max_fee_per_gas")
+            self._prefix = b"\x02"
+            self._head = encode_int(chain_id)
+            self._middle = encode_int(max_priority_fee_per_gas) + encode_int(max_fee_per_gas) + encode_int(gas_limit)
+            self._tail = _encode_access_list(access_list)
+            self._v_offset = 0
+        else:
+            if gas_price is None or max_fee_per_gas is not None or max_priority_fee_per_gas is not None:
+                raise ValueError("Giao dịch legacy cần gas_price, không dùng phí EIP-1559")
+            if list(access_list):
+                raise ValueError("Giao dịch legacy không có access_list")
+            self._prefix = b""
+            self._head = b""
+            self._middle = encode_int(gas_price) + encode_int(gas_limit)
+            # Phần đuôi khi ký theo EIP-155: chain_id, 0, 0
+            self._tail = encode_int(chain_id) + b"\x80\x80"
+            self._v_offset = chain_id * 2 + 35
+
+    def _body(self, nonce: int, to: bytes, value: int, data: bytes) -> bytes:
+        return (
+            self._head + encode_int(nonce) + self._middle
+            + encode_bytes(to) + encode_int(value) + encode_bytes(data)
+        )
+
+    def unsigned(self, nonce: int, to: bytes, value: int, data: bytes = b"") -> bytes:
+        """Dữ liệu cần băm keccak để ký"""
+        return self._prefix + encode_list(self._body(nonce, to, value, data) + self._tail)
+
+    def signed(self, nonce: int, to: bytes, value: int, data: bytes, signature: bytes) -> bytes:
+        """Giao dịch đã ký (raw, gửi qua eth_sendRawTransaction) từ chữ ký 65 byte r ‖ s ‖ y"""
+        body = self._body(nonce, to, value, data)
+        if self._v_offset:
+            body += encode_int(self._v_offset + signature[64])
+        else:
+            body += self._tail + encode_int(signature[64])
+        body += encode_bytes(signature[:32].lstrip(b"\x00")) + encode_bytes(signature[32:64].lstrip(b"\x00"))
+        return self._prefix + encode_list(body)
+
+
+def template_from_dict(fields: dict) -> TransactionTemplate:
+    """
+    Template từ các trường chung {chain_id, type?, gas?, max_fee_per_gas?, max_priority_fee_per_gas?,
+    gas_price?, access_list?}; không có `type` thì suy ra legacy khi chỉ có gas_price
+    """
+    def quantity(name: str) -> Optional[int]:
+        return parse_quantity(fields[name], name) if fields.get(name) is not None else None
+
+    tx_type = fields.get("type")
+    if tx_type is None:
+        tx_type = TX_TYPE_LEGACY if fields.get("gas_price") is not None and fields.get("max_fee_per_gas") is None \
+            else TX_TYPE_EIP1559
+    if "chain_id" not in fields:
+        raise ValueError("Thiếu chain_id")
+    return TransactionTemplate(
+        chain_id=parse_quantity(fields["chain_id"], "chain_id"),
+        tx_type=tx_type,
+        gas_limit=quantity("gas") or DEFAULT_GAS_LIMIT,
+        max_fee_per_gas=quantity("max_fee_per_gas"),
+        max_priority_fee_per_gas=quantity("max_priority_fee_per_gas"),
+        gas_price=quantity("gas_price"),
+        access_list=fields.get("access_list") or (),
+    )
+
+
+def payment_from_dict(item: dict) -> Tuple[bytes, int, bytes]:
+    """(to 20 byte, value wei, data) từ {to, value?, data?}; `to` bắt buộc"""
+    if not item.get("to"):
+        raise ValueError("Thiếu địa chỉ người nhận (to)")
+    return parse_address(item["to"], "to"), parse_quantity(item.get("value") or 0, "value"), parse_data(item.get("data"))
+
+
+def parse_payments(items: Iterable[dict]) -> List[Tuple[bytes, int, bytes]]:
+    """
+    Kiểm tra toàn bộ danh sách chi trả trước khi ký, để nonce được gán liền mạch.
+
+    Raises:
+        ValueError: mục đầu tiên không hợp lệ, kèm vị trí (bắt đầu từ 0)
+    """
+    payments = []
+    for index, item in enumerate(items):
+        try:
+            payments.append(payment_from_dict(item))
+        except ValueError as e:
+            raise ValueError(f"Mục {index}: {e}") from None
+    return payments
+
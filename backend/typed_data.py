@@ -0,0 +1,293 @@
+"""
+Băm dữ liệu có kiểu theo EIP-712 (`eth_signTypedData_v4`)
+Schema đã biên dịch (chuỗi kiểu, type hash, hàm mã hóa từng trường) và domain separator
+được giữ trong LRU nên các thông điệp lặp lại chỉ còn phải băm giá trị
+"""
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from eth_hash.auto import keccak
+
+from lru import LRUCache
+
+DEFAULT_SCHEMA_CACHE_SIZE = 128
+DEFAULT_DOMAIN_CACHE_SIZE = 256
+DOMAIN_TYPE = "EIP712Domain"
+
+# Thứ tự và kiểu trường domain chuẩn, dùng khi `types` không khai báo EIP712Domain
+DOMAIN_FIELDS = (
+    ("name", "string"),
+    ("version", "string"),
+    ("chainId", "uint256"),
+    ("verifyingContract", "address"),
+    ("salt", "bytes32"),
+)
+
+_ARRAY_RE = re.compile(r"^(.+)\[(\d*)\]$")
+_INT_RE = re.compile(r"^(u?)int(\d+)$")
+_BYTES_RE = re.compile(r"^bytes(\d+)$")
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_$][A-Za-z0-9_$]*$")
+
+Encoder = Callable[[Any], bytes]
+
+
+def _to_bytes(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, str):
+        hex_value = value[2:] if value[:2].lower() == "0x" else value
+        return bytes.fromhex(hex_value)
+    raise ValueError(f"Giá trị bytes phải là chuỗi hex: {value!r}")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        negative = text.startswith("-")
+        digits = text[1:] if negative else text
+        number = int(digits[2:], 16) if digits[:2].lower() == "0x" else int(digits, 10)
+        return -number if negative else number
+    raise ValueError(f"Giá trị số nguyên không hợp lệ: {value!r}")
+
+
+def _int_encoder(signed: bool, bits: int) -> Encoder:
+    low, high = (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if signed else (0, (1 << bits) - 1)
+    type_name = f"{'' if signed else 'u'}int{bits}"
+
+    def encode(value: Any) -> bytes:
+        number = _to_int(value)
+        if not low <= number <= high:
+            raise ValueError(f"Giá trị {number} vượt phạm vi {type_name}")
+        return (number % (1 << 256)).to_bytes(32, "big")
+    return encode
+
+
+def _fixed_bytes_encoder(size: int) -> Encoder:
+    def encode(value: Any) -> bytes:
+        data = _to_bytes(value)
+        if len(data) > size:
+            raise ValueError(f"bytes{size} nhận tối đa {size} byte, có {len(data)}")
+        return data.ljust(32, b"\x00")
+    return encode
+
+
+def _encode_address(value: Any) -> bytes:
+    data = _to_bytes(value)
+    if len(data) != 20:
+        raise ValueError(f"Địa chỉ phải có 20 byte: {value!r}")
+    return data.rjust(32, b"\x00")
+
+
+def _encode_bool(value: Any) -> bytes:
+    if value not in (True, False, 0, 1):
+        raise ValueError(f"Giá trị bool không hợp lệ: {value!r}")
+    return bytes(31) + (b"\x01" if value else b"\x00")
+
+
+def _encode_string(value: Any) -> bytes:
+    if not isinstance(value, str):
+        raise ValueError(f"Giá trị string không hợp lệ: {value!r}")
+    return keccak(value.encode("utf-8"))
+
+
+def _encode_dynamic_bytes(value: Any) -> bytes:
+    return keccak(_to_bytes(value))
+
+
+def _base_type(type_name: str) -> str:
+    """Bỏ hậu tố mảng: `Person[][3]` -> `Person`"""
+    while True:
+        match = _ARRAY_RE.match(type_name)
+        if match is None:
+            return type_name
+        type_name = match.group(1)
+
+
+class Schema:
+    """
+    Các kiểu struct của một `types` EIP-712 đã biên dịch.
+
+    Mỗi struct có chuỗi `encodeType`, type hash và danh sách (tên trường, hàm mã hóa);
+    hàm mã hóa cho từng chuỗi kiểu được tạo một lần rồi dùng lại.
+    """
+
+    def __init__(self, types: Dict[str, List[dict]]):
+        self._fields: Dict[str, List[Tuple[str, str]]] = {}
+        for name, fields in types.items():
+            if not _IDENTIFIER_RE.match(name):
+                raise ValueError(f"Tên kiểu không hợp lệ: {name!r}")
+            try:
+                self._fields[name] = [(field["name"], field["type"]) for field in fields]
+            except (KeyError, TypeError):
+                raise ValueError(f"Khai báo trường của {name} phải là list {{name, type}}") from None
+
+        self._encoders: Dict[str, Encoder] = {}
+        self.encoded_types: Dict[str, str] = {}
+        self.type_hashes: Dict[str, bytes] = {}
+        self._struct_fields: Dict[str, List[Tuple[str, Encoder]]] = {}
+        for name, fields in self._fields.items():
+            self.encoded_types[name] = self._encode_type(name)
+            self.type_hashes[name] = keccak(self.encoded_types[name].encode("utf-8"))
+            self._struct_fields[name] = [(field, self._encoder(field_type)) for field, field_type in fields]
+
+    def hash_struct(self, name: str, value: Any) -> bytes:
+        """keccak(typeHash ‖ encodeData(value))"""
+        fields = self._struct_fields.get(name)
+        if fields is None:
+            raise ValueError(f"Kiểu {name} không được khai báo trong types")
+        if not isinstance(value, dict):
+            raise ValueError(f"Giá trị của {name} phải là object")
+        parts = [self.type_hashes[name]]
+        for field, encode in fields:
+            try:
+                field_value = value[field]
+            except KeyError:
+                raise ValueError(f"{name} thiếu trường {field!r}") from None
+            parts.append(encode(field_value))
+        return keccak(b"".join(parts))
+
+    def _encode_type(self, primary: str) -> str:
+        """`Primary(...)` rồi các kiểu phụ thuộc theo thứ tự chữ cái"""
+        dependencies = set()
+        stack = [primary]
+        while stack:
+            for _, field_type in self._fields[stack.pop()]:
+                base = _base_type(field_type)
+                if base in self._fields and base != primary and base not in dependencies:
+                    dependencies.add(base)
+                    stack.append(base)
+        return "".join(
+            f"{name}({','.join(f'{field_type} {field}' for field, field_type in self._fields[name])})"
+            for name in [primary, *sorted(dependencies)]
+        )
+
+    def _encoder(self, type_name: str) -> Encoder:
+        encoder = self._encoders.get(type_name)
+        if encoder is None:
+            encoder = self._build_encoder(type_name)
+            self._encoders[type_name] = encoder
+        return encoder
+
+    def _build_encoder(self, type_name: str) -> Encoder:
+        array = _ARRAY_RE.match(type_name)
+        if array is not None:
+            element_encoder = self._encoder(array.group(1))
+            length = int(array.group(2)) if array.group(2) else None
+
+            def encode_array(value: Any) -> bytes:
+                if not isinstance(value, (list, tuple)):
+                    raise ValueError(f"Giá trị {type_name} phải là mảng")
+                if length is not None and len(value) != length:
+                    raise ValueError(f"{type_name} cần đúng {length} phần tử, có {len(value)}")
+                return keccak(b"".join(element_encoder(item) for item in value))
+            return encode_array
+
+        if type_name in self._fields:
+            # Struct (kể cả đệ quy) tra bảng lúc gọi nên không cần thứ tự biên dịch
+            return lambda value: self.hash_struct(type_name, value)
+        if type_name == "address":
+            return _encode_address
+        if type_name == "bool":
+            return _encode_bool
+        if type_name == "string":
+            return _encode_string
+        if type_name == "bytes":
+            return _encode_dynamic_bytes
+        match = _INT_RE.match(type_name)
+        if match is not None:
+            bits = int(match.group(2))
+            if bits % 8 == 0 and 8 <= bits <= 256:
+                return _int_encoder(not match.group(1), bits)
+        match = _BYTES_RE.match(type_name)
+        if match is not None and 1 <= int(match.group(1)) <= 32:
+            return _fixed_bytes_encoder(int(match.group(1)))
+        raise ValueError(f"Kiểu EIP-712 không được hỗ trợ: {type_name}")
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return f"0x{bytes(value).hex()}"
+    raise TypeError(f"Không tuần tự hóa được {type(value).__name__}")
+
+
+def _cache_key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=_json_default)
+
+
+def parse_typed_data(typed_data: Any) -> dict:
+    """Nhận dict hoặc chuỗi JSON {types, primaryType, domain, message} và kiểm tra các khóa bắt buộc"""
+    if isinstance(typed_data, (str, bytes)):
+        typed_data = json.loads(typed_data)
+    if not isinstance(typed_data, dict):
+        raise ValueError("Typed data phải là JSON object")
+    for key in ("types", "primaryType", "domain"):
+        if key not in typed_data:
+            raise ValueError(f"Typed data thiếu trường {key!r}")
+    if not isinstance(typed_data["types"], dict) or not isinstance(typed_data["domain"], dict):
+        raise ValueError("`types` và `domain` phải là object")
+    return typed_data
+
+
+class TypedDataEncoder:
+    """
+    Tính digest EIP-712 với cache schema và domain separator.
+
+    Schema được khóa theo `types` (bỏ EIP712Domain) đã chuẩn hóa JSON, domain separator
+    theo cặp (trường domain, giá trị domain); cả hai là LRU có giới hạn.
+    """
+
+    def __init__(
+        self,
+        schema_cache_size: int = DEFAULT_SCHEMA_CACHE_SIZE,
+        domain_cache_size: int = DEFAULT_DOMAIN_CACHE_SIZE,
+    ):
+        self._schemas = LRUCache(schema_cache_size)
+        self._domains = LRUCache(domain_cache_size)
+
+    def schema(self, types: Dict[str, List[dict]]) -> Schema:
+        """Schema đã biên dịch cho `types` (qua cache)"""
+        key = _cache_key(types)
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = Schema(types)
+            self._schemas.put(key, schema)
+        return schema
+
+    def domain_separator(self, domain: dict, domain_fields: Optional[List[dict]] = None) -> bytes:
+        """hashStruct(EIP712Domain, domain); `domain_fields` mặc định suy ra từ các khóa có trong domain"""
+        if domain_fields is None:
+            domain_fields = [{"name": name, "type": field_type} for name, field_type in DOMAIN_FIELDS
+                             if name in domain]
+        key = _cache_key([domain_fields, domain])
+        separator = self._domains.get(key)
+        if separator is None:
+            separator = self.schema({DOMAIN_TYPE: domain_fields}).hash_struct(DOMAIN_TYPE, domain)
+            self._domains.put(key, separator)
+        return separator
+
+    def hash(self, typed_data: Any) -> bytes:
+        """keccak(0x1901 ‖ domainSeparator ‖ hashStruct(primaryType, message))"""
+        typed_data = parse_typed_data(typed_data)
+        types = typed_data["types"]
+        primary_type = typed_data["primaryType"]
+        domain_separator = self.domain_separator(typed_data["domain"], types.get(DOMAIN_TYPE))
+        if primary_type == DOMAIN_TYPE:
+            return keccak(b"\x19\x01" + domain_separator)
+        if "message" not in typed_data:
+            raise ValueError("Typed data thiếu trường 'message'")
+        message_types = {name: fields for name, fields in types.items() if name != DOMAIN_TYPE}
+        message_hash = self.schema(message_types).hash_struct(primary_type, typed_data["message"])
+        return keccak(b"\x19\x01" + domain_separator + message_hash)
+
+    def clear(self) -> None:
+        self._schemas.clear()
+        self._domains.clear()
+
+    def stats(self) -> dict:
+        """Thống kê hai cache: schemas và domains"""
+        return {"schemas": self._schemas.stats(), "domains": self._domains.stats()}
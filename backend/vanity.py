@@ -0,0 +1,166 @@
+"""
+Tìm địa chỉ vanity (tiền tố/hậu tố tùy chọn) trên nhiều tiến trình
+Vòng lặp so khớp trực tiếp trên 20 byte địa chỉ, chỉ định dạng khi trúng
+"""
+import math
+import multiprocessing
+import queue
+import string
+import time
+from typing import Callable, Optional, Tuple
+
+from results import encode_checksum
+from wallet_core import WalletCore
+
+HEX_DIGITS = set(string.hexdigits)
+
+# Khoảng thời gian worker gộp số lần thử vào bộ đếm chung
+REPORT_INTERVAL = 0.25
+
+
+class VanityPattern:
+    """Mẫu tiền tố/hậu tố đã biên dịch để so khớp trên bytes địa chỉ"""
+
+    def __init__(self, prefix: str = "", suffix: str = "", case_sensitive: bool = False):
+        if prefix.lower().startswith("0x"):
+            prefix = prefix[2:]
+        for part in (prefix, suffix):
+            if not set(part) <= HEX_DIGITS:
+                raise ValueError(f"Mẫu chỉ được chứa ký tự hex: {part}")
+        if len(prefix) + len(suffix) > 40:
+            raise ValueError("Tổng độ dài tiền tố và hậu tố vượt quá 40 ký tự hex")
+
+        self.prefix = prefix
+        self.suffix = suffix
+        self.case_sensitive = case_sensitive
+
+        # Tiền tố: các byte đầy đủ + nửa byte cao (nếu độ dài lẻ)
+        lower_prefix = prefix.lower()
+        self._prefix_bytes = bytes.fromhex(lower_prefix[:len(lower_prefix) // 2 * 2])
+        self._prefix_nibble = int(lower_prefix[-1], 16) if len(lower_prefix) % 2 else None
+
+        # Hậu tố: nửa byte thấp (nếu độ dài lẻ) + các byte đầy đủ
+        lower_suffix = suffix.lower()
+        odd = len(lower_suffix) % 2
+        self._suffix_bytes = bytes.fromhex(lower_suffix[odd:])
+        self._suffix_nibble = int(lower_suffix[0], 16) if odd else None
+
+    @property
+    def difficulty(self) -> int:
+        """Số lần thử kỳ vọng để gặp một địa chỉ khớp"""
+        pattern = self.prefix + self.suffix
+        difficulty = 16 ** len(pattern)
+        if self.case_sensitive:
+            # Mỗi chữ cái a-f còn phải khớp hoa/thường theo checksum EIP-55
+            difficulty *= 2 ** sum(1 for char in pattern if char.isalpha())
+        return difficulty
+
+    def matches(self, address_bytes: bytes) -> bool:
+        """So khớp trên 20 byte địa chỉ; chỉ tính checksum khi cần phân biệt hoa/thường"""
+        if not address_bytes.startswith(self._prefix_bytes):
+            return False
+        if self._prefix_nibble is not None and address_bytes[len(self._prefix_bytes)] >> 4 != self._prefix_nibble:
+            return False
+        if not address_bytes.endswith(self._suffix_bytes):
+            return False
+        if self._suffix_nibble is not None and address_bytes[-len(self._suffix_bytes) - 1] & 0x0F != self._suffix_nibble:
+            return False
+        if self.case_sensitive:
+            checksum = encode_checksum(address_bytes)[2:]
+            return checksum.startswith(self.prefix) and checksum.endswith(self.suffix)
+        return True
+
+
+def expected_seconds(pattern: VanityPattern, keys_per_second: float) -> float:
+    """Thời gian kỳ vọng để tìm thấy địa chỉ khớp ở tốc độ hiện tại"""
+    if keys_per_second <= 0:
+        return math.inf
+    return pattern.difficulty / keys_per_second
+
+
+def _search_worker(pattern, ec_backend, stop_event, counter, results):
+    """Vòng lặp tìm kiếm chạy trong tiến trình worker"""
+    core = WalletCore(key_cache_size=0, ec_backend=ec_backend)
+    generate = core.generate_raw_keypair
+    matches = pattern.matches
+    attempts = 0
+    last_report = time.perf_counter()
+
+    while not stop_event.is_set():
+        private_key_bytes, public_key_bytes, address_bytes = generate()
+        attempts += 1
+        if matches(address_bytes):
+            results.put((private_key_bytes, public_key_bytes, address_bytes))
+            stop_event.set()
+            break
+        now = time.perf_counter()
+        if now - last_report >= REPORT_INTERVAL:
+            with counter.get_lock():
+                counter.value += attempts
+            attempts = 0
+            last_report = now
+
+    with counter.get_lock():
+        counter.value += attempts
+
+
+def search(
+    pattern: VanityPattern,
+    workers: int,
+    ec_backend: Optional[str] = None,
+    on_progress: Optional[Callable[[int, float], None]] = None,
+    progress_interval: float = 1.0,
+) -> Tuple[Tuple[str, str, str], int, float]:
+    """
+    Tìm khóa có địa chỉ khớp mẫu bằng `workers` tiến trình.
+
+    Args:
+        on_progress: gọi định kỳ với (tổng số lần thử, số khóa/giây)
+
+    Returns:
+        tuple: ((private_key_hex, public_key_hex, address), tổng số lần thử, số giây)
+    """
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    counter = context.Value("Q", 0)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=_search_worker,
+            args=(pattern, ec_backend, stop_event, counter, results),
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    try:
+        while True:
+            try:
+                raw_keypair = results.get(timeout=progress_interval)
+                break
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    # Worker có thể vừa gửi kết quả rồi thoát
+                    try:
+                        raw_keypair = results.get(timeout=1)
+                        break
+                    except queue.Empty:
+                        raise RuntimeError("Tất cả worker đã dừng mà không tìm thấy kết quả")
+                if on_progress is not None:
+                    elapsed = time.perf_counter() - start
+                    on_progress(counter.value, counter.value / elapsed)
+    finally:
+        # Dừng mọi worker ngay khi có kết quả (hoặc khi bị ngắt)
+        stop_event.set()
+        for process in processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+
+    elapsed = time.perf_counter() - start
+    keypair = WalletCore(key_cache_size=0, ec_backend=ec_backend).format_keypair(*raw_keypair)
+    return keypair, counter.value, elapsed
@@ -2,18 +2,124 @@
 Lõi chức năng ví Ethereum
 Xử lý sinh khóa, ký và xác thực
 """
-from typing import Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+import time
+from contextlib import nullcontext
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
+from eth_hash.auto import keccak as keccak_hash
 from eth_keys import keys
 from eth_keys.constants import SECPK1_N
-from eth_utils import keccak, to_checksum_address
+from eth_utils import keccak
 import secrets
 
-HALF_CURVE_ORDER = SECPK1_N // 2
+from ec_backend import load_backend
+from hd import DEFAULT_PATH, HDDeriver, mnemonic_to_seed, parse_path
+from keystore import DEFAULT_UNLOCK_TTL, KDF_SCRYPT, UnlockSessions, decrypt_keystore, encrypt_keystore
+from lru import LRUCache
+from merkle import MerkleTree, VerifiedPath, verify_path
+from results import (
+    HALF_CURVE_ORDER, BatchAttestation, InclusionProof, Keypair, Recovery, SignedHash, SignedTransaction,
+    Verification, checksum_address,
+)
+from transactions import TransactionTemplate, parse_quantity, payment_from_dict, template_from_dict
+from typed_data import TypedDataEncoder
+
+DEFAULT_KEY_CACHE_SIZE = 256
+# Số cặp (gốc Merkle, chữ ký) đã khôi phục người ký được giữ lại
+DEFAULT_ATTESTATION_CACHE_SIZE = 1024
+# Kích thước mỗi khối khi băm file/luồng
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class CachedKey(NamedTuple):
+    """Khóa riêng đã parse cùng khóa công khai và địa chỉ 20 byte dẫn xuất"""
+    private_key: keys.PrivateKey
+    public_key: keys.PublicKey
+    address_bytes: bytes
+
+    @property
+    def address(self) -> str:
+        """Địa chỉ checksum (ghi nhớ, chỉ tính khi cần xuất ra)"""
+        return checksum_address(self.address_bytes)
+
+
+class KeyCache(LRUCache):
+    """
+    LRU cache có giới hạn cho khóa riêng đã parse.
+
+    Khóa tra cứu là BLAKE2b có khóa bí mật ngẫu nhiên theo tiến trình,
+    không bao giờ giữ chuỗi hex của khóa riêng làm key.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_KEY_CACHE_SIZE):
+        super().__init__(maxsize)
+        self._salt = secrets.token_bytes(32)
+
+    def digest(self, private_key_bytes: bytes) -> bytes:
+        return hashlib.blake2b(private_key_bytes, key=self._salt, digest_size=16).digest()
+
+
+class _AttestedRoot:
+    """Người ký đã khôi phục của một cặp (gốc lô, chữ ký) và đường đi xác thực gần nhất tới gốc đó"""
+
+    __slots__ = ("address", "path")
+
+    def __init__(self, address: Optional[bytes]):
+        self.address = address
+        self.path: Optional[VerifiedPath] = None
+
+
+class _Span:
+    """Đo thời gian một bước và báo cho observer"""
+    
+    __slots__ = ("observer", "operation", "start")
+    
+    def __init__(self, observer: Callable[[str, float], None], operation: str):
+        self.observer = observer
+        self.operation = operation
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.observer(self.operation, time.perf_counter() - self.start)
+        return False
+
+
+_NO_SPAN = nullcontext()
 
 
 class WalletCore:
     """Các thao tác lõi cho ví Ethereum"""
+
+    def __init__(
+        self,
+        key_cache_size: int = DEFAULT_KEY_CACHE_SIZE,
+        ec_backend: Optional[str] = None,
+        observer: Optional[Callable[[str, float], None]] = None,
+        attestation_cache_size: int = DEFAULT_ATTESTATION_CACHE_SIZE,
+    ):
+        """
+        Args:
+            key_cache_size: Số khóa riêng đã parse được giữ lại (0 để tắt cache)
+            ec_backend: "coincurve", "python" hoặc "auto"; mặc định đọc
+                biến môi trường WALLET_EC_BACKEND rồi chọn backend nhanh nhất
+            observer: Hàm nhận (tên bước, số giây) cho từng bước key_parse,
+                hash, sign, recover, verify, address, keygen, kdf, merkle (None để tắt)
+            attestation_cache_size: Số gốc lô đã ký được nhớ người ký (0 để tắt cache)
+        """
+        self._key_cache = KeyCache(key_cache_size)
+        self._attested_roots = LRUCache(attestation_cache_size)
+        self._sessions = UnlockSessions()
+        self._typed_data = TypedDataEncoder()
+        self.backend = load_backend(ec_backend)
+        self._hd = HDDeriver(self.backend.public_key_bytes)
+        self.observer = observer
     
     def generate_keypair(self):
         """
@@ -22,32 +128,76 @@ class WalletCore:
         Returns:
             tuple: (private_key_hex, public_key_hex, address)
         """
-        # Sinh khóa riêng ngẫu nhiên 32 byte
-        private_key_bytes = secrets.token_bytes(32)
-        private_key = keys.PrivateKey(private_key_bytes)
+        return self.format_keypair(*self.generate_raw_keypair())
+    
+    def generate_raw_keypair(self) -> Keypair:
+        """
+        Sinh cặp khóa ở dạng bytes, không định dạng hex/checksum
         
-        # Dẫn xuất khóa công khai từ khóa riêng
-        public_key = private_key.public_key
+        Dùng cho vòng lặp nóng (tìm địa chỉ vanity, sinh hàng loạt) để chỉ
+        định dạng những khóa thực sự cần xuất ra.
         
-        # Dẫn xuất địa chỉ từ khóa công khai
-        # Địa chỉ Ethereum = 20 byte cuối của băm Keccak-256 khóa công khai
-        public_key_bytes = public_key.to_bytes()
-        # Bỏ byte tiền tố 0x04 (định dạng khóa công khai uncompressed)
-        if public_key_bytes[0] == 4:
-            public_key_bytes = public_key_bytes[1:]
+        Returns:
+            Keypair: private_key 32 byte, public_key 64 byte, address 20 byte (unpack được như tuple)
+        """
+        # Sinh khóa riêng ngẫu nhiên 32 byte trong khoảng [1, n-1]
+        private_key_bytes = secrets.token_bytes(32)
+        while not 0 < int.from_bytes(private_key_bytes, 'big') < SECPK1_N:
+            private_key_bytes = secrets.token_bytes(32)
+        return self._raw_keypair(private_key_bytes)
+    
+    def _raw_keypair(self, private_key_bytes: bytes) -> Keypair:
+        """Dẫn xuất khóa công khai và địa chỉ dạng bytes từ khóa riêng 32 byte"""
+        # Dẫn xuất khóa công khai (64 byte, không có tiền tố 0x04)
+        with self._span("keygen"):
+            public_key_bytes = self.backend.public_key_bytes(private_key_bytes)
         
-        # Băm khóa công khai bằng Keccak-256
-        hash_bytes = keccak(public_key_bytes)
+        # Địa chỉ Ethereum = 20 byte cuối của băm Keccak-256 khóa công khai
+        with self._span("address"):
+            address_bytes = keccak(public_key_bytes)[-20:]
+        return Keypair(private_key_bytes, public_key_bytes, address_bytes)
+    
+    def format_keypair(
+        self,
+        private_key_bytes: bytes,
+        public_key_bytes: bytes,
+        address_bytes: bytes,
+    ) -> Tuple[str, str, str]:
+        """Định dạng cặp khóa dạng bytes thành (private_key_hex, public_key_hex, address checksum)"""
+        return Keypair(private_key_bytes, public_key_bytes, address_bytes).to_tuple()
+    
+    def derive_keypair(
+        self,
+        mnemonic: str,
+        path: str = f"{DEFAULT_PATH}/0",
+        passphrase: str = "",
+    ) -> Tuple[str, str, str]:
+        """
+        Dẫn xuất cặp khóa HD (BIP-39 seed, BIP-32/44) tại `path`
         
-        # Lấy 20 byte cuối (40 ký tự hex)
-        address_bytes = hash_bytes[-20:]
-        address = to_checksum_address(address_bytes.hex())
+        Returns:
+            tuple: (private_key_hex, public_key_hex, address) như `generate_keypair`
+        """
+        return self.derive_raw_keypair(mnemonic_to_seed(mnemonic, passphrase), path).to_tuple()
+    
+    def derive_raw_keypair(self, seed: bytes, path: str) -> Keypair:
+        """Cặp khóa dạng bytes tại `path` từ seed BIP-39; các nút cha được cache"""
+        indices = parse_path(path)
+        if not indices:
+            raise ValueError("Đường dẫn phải có ít nhất một cấp dưới m")
+        return next(self.derive_raw_keypairs(seed, indices[:-1], indices[-1:]))
+    
+    def derive_raw_keypairs(self, seed: bytes, path, indices: Iterable[int]) -> Iterator[Keypair]:
+        """
+        Cặp khóa dạng bytes cho các con `indices` của nút `path` (ví dụ "m/44'/60'/0'/0")
         
-        return (
-            private_key.to_hex(),
-            public_key.to_hex(),
-            address
-        )
+        Nút `path` chỉ được dẫn xuất một lần rồi giữ trong cache, mỗi chỉ số chỉ còn
+        một HMAC-SHA512 và một phép nhân điểm.
+        """
+        if isinstance(path, str):
+            path = parse_path(path)
+        for node in self._hd.children(seed, path, indices):
+            yield self._raw_keypair(node.private_key)
     
     def private_key_to_address(self, private_key_hex: str):
         """
@@ -59,52 +209,262 @@ class WalletCore:
         Returns:
             str: Địa chỉ Ethereum dạng checksum
         """
-        # Bỏ tiền tố 0x nếu có
-        if private_key_hex.startswith('0x'):
-            private_key_hex = private_key_hex[2:]
+        return self._load_private_key(private_key_hex).address
+    
+    def sign_message(self, message: str, private_key_hex: str, use_personal: bool = True):
+        """
+        Ký thông điệp bằng khóa riêng và trả về đầy đủ thông tin chữ ký.
+        """
+        message_hash = self._hash_message(message, use_personal)
+        return self.sign_message_hash(message_hash, private_key_hex)
+    
+    def sign_message_hash(self, message_hash: bytes, private_key_hex: str) -> dict:
+        """Ký một hash 32 byte đã tính sẵn (ví dụ từ `hash_file`)"""
+        return self._sign_hash(self._load_private_key(private_key_hex), message_hash).to_dict()
+    
+    def sign_hash_bytes(self, message_hash: bytes, private_key_bytes: bytes) -> SignedHash:
+        """Ký hash 32 byte bằng khóa riêng 32 byte; kết quả giữ bytes, chỉ định dạng khi gọi `to_dict()`"""
+        return self._sign_hash(self._load_private_key_bytes(private_key_bytes), message_hash)
+    
+    def sign_hash_bytes_with_address(self, message_hash: bytes, address: str) -> SignedHash:
+        """Như `sign_hash_bytes` nhưng dùng khóa đã mở khóa của `address`"""
+        return self._sign_hash(self._sessions.get(address), message_hash)
+    
+    def sign_message_with_address(self, message: str, address: str, use_personal: bool = True) -> dict:
+        """Ký bằng khóa đã mở qua `unlock_keystore`, không chạy lại KDF hay parse khóa"""
+        message_hash = self._hash_message(message, use_personal)
+        return self.sign_message_hash_with_address(message_hash, address)
+    
+    def sign_message_hash_with_address(self, message_hash: bytes, address: str) -> dict:
+        """Ký hash 32 byte bằng khóa đã mở khóa của `address`"""
+        return self.sign_hash_bytes_with_address(message_hash, address).to_dict()
+    
+    def create_keystore(
+        self,
+        private_key_hex: str,
+        password: str,
+        kdf: str = KDF_SCRYPT,
+        kdf_params: Optional[dict] = None,
+    ) -> dict:
+        """Mã hóa khóa riêng thành keystore V3 (Web3 Secret Storage)"""
+        cached = self._load_private_key(private_key_hex)
+        with self._span("kdf"):
+            return encrypt_keystore(
+                cached.private_key.to_bytes(),
+                cached.address_bytes,
+                password,
+                kdf,
+                kdf_params,
+            )
+    
+    def unlock_keystore(
+        self, keystore, password: str, ttl: float = DEFAULT_UNLOCK_TTL, token: Optional[str] = None
+    ) -> str:
+        """
+        Giải mã keystore V3 một lần và giữ khóa đã parse trong phiên có hạn `ttl` giây
         
-        private_key_bytes = bytes.fromhex(private_key_hex)
-        private_key = keys.PrivateKey(private_key_bytes)
-        public_key = private_key.public_key
+        Args:
+            token: nếu có, chỉ người giữ token mới qua được `authorize_address` cho phiên này
         
-        # Dẫn xuất địa chỉ
-        public_key_bytes = public_key.to_bytes()
-        if public_key_bytes[0] == 4:
-            public_key_bytes = public_key_bytes[1:]
+        Returns:
+            str: địa chỉ checksum để ký bằng `sign_message_with_address`
+        """
+        if isinstance(keystore, (str, bytes)):
+            keystore = json.loads(keystore)
+        with self._span("kdf"):
+            private_key_bytes = decrypt_keystore(keystore, password)
+        cached = self._parse_private_key(private_key_bytes)
         
-        hash_bytes = keccak(public_key_bytes)
-        address_bytes = hash_bytes[-20:]
-        address = to_checksum_address(address_bytes.hex())
+        expected = keystore.get("address")
+        if expected and expected.lower()[-40:] != cached.address_bytes.hex():
+            raise ValueError("Địa chỉ trong keystore không khớp với khóa đã giải mã")
+        self._sessions.unlock(cached.address, cached, ttl, token)
+        return cached.address
+    
+    def authorize_address(self, address: str, token: Optional[str] = None) -> None:
+        """Ném SessionLocked nếu `address` chưa mở khóa hoặc phiên được mở bằng token khác `token`"""
+        self._sessions.authorize(address, token)
+    
+    def lock(self, address: Optional[str] = None, token: Optional[str] = None) -> int:
+        """Khóa lại một địa chỉ (hoặc tất cả; chỉ các phiên của `token` nếu có); trả số phiên đã xóa"""
+        return self._sessions.lock(address, token)
+    
+    def unlocked_sessions(self, token: Optional[str] = None) -> list:
+        """Các địa chỉ đang mở khóa kèm số giây còn lại (chỉ các phiên của `token` nếu có)"""
+        return self._sessions.sessions(token)
+    
+    def _sign_hash(self, cached: CachedKey, message_hash: bytes) -> SignedHash:
+        with self._span("sign"):
+            signature = cached.private_key.sign_msg_hash(message_hash)
+        return SignedHash(signature.to_bytes(), message_hash, cached.address_bytes)
+    
+    def hash_stream(self, chunks: Iterable[bytes], length: int, use_personal: bool = True) -> bytes:
+        """
+        Băm dữ liệu theo từng khối mà không ghép toàn bộ vào bộ nhớ
         
-        return address
+        Tiền tố EIP-191 cần độ dài trước khi băm nên phải biết `length`
+        (ví dụ kích thước file); tổng số byte đọc được phải khớp với nó.
+        """
+        with self._span("hash"):
+            hasher = keccak_hash.new(self._personal_prefix(length) if use_personal else b'')
+            total = 0
+            for chunk in chunks:
+                hasher.update(chunk)
+                total += len(chunk)
+            if total != length:
+                raise ValueError(f"Độ dài dữ liệu ({total}) khác độ dài khai báo ({length})")
+            return hasher.digest()
     
-    def sign_message(self, message: str, private_key_hex: str, use_personal: bool = True):
+    def hash_file(self, path: str, use_personal: bool = True) -> bytes:
         """
-        Ký thông điệp bằng khóa riêng và trả về đầy đủ thông tin chữ ký.
+        Băm nội dung file qua mmap, kết quả giống `_hash_message` trên cùng bytes
+        
+        Tiền tố EIP-191 lấy độ dài từ kích thước file.
         """
-        if private_key_hex.startswith('0x'):
-            private_key_hex = private_key_hex[2:]
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return self.hash_stream((), 0, use_personal)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    chunks = (view[offset:offset + HASH_CHUNK_SIZE] for offset in range(0, size, HASH_CHUNK_SIZE))
+                    return self.hash_stream(chunks, size, use_personal)
+                finally:
+                    view.release()
+    
+    def hash_typed_data(self, typed_data) -> bytes:
+        """
+        Digest EIP-712 của typed data (dict hoặc chuỗi JSON {types, primaryType, domain, message}).
         
-        private_key_bytes = bytes.fromhex(private_key_hex)
-        private_key = keys.PrivateKey(private_key_bytes)
+        Schema đã biên dịch và domain separator được cache nên các thông điệp
+        cùng schema/domain chỉ phải băm giá trị.
+        """
+        with self._span("hash"):
+            return self._typed_data.hash(typed_data)
+    
+    def sign_typed_data(self, typed_data, private_key_hex: str) -> dict:
+        """Ký typed data EIP-712 (`eth_signTypedData_v4`); kết quả cùng dạng `sign_message`"""
+        return self.sign_message_hash(self.hash_typed_data(typed_data), private_key_hex)
+    
+    def sign_typed_data_with_address(self, typed_data, address: str) -> dict:
+        """Ký typed data EIP-712 bằng khóa đã mở khóa của `address`"""
+        return self.sign_message_hash_with_address(self.hash_typed_data(typed_data), address)
+    
+    def sign_transaction(self, transaction: dict, private_key_hex: str) -> dict:
+        """
+        Ký một giao dịch EIP-1559 hoặc legacy EIP-155.
         
-        message_hash = self._hash_message(message, use_personal)
-        signature = private_key.sign_msg_hash(message_hash)
-        
-        address = self.private_key_to_address(private_key_hex)
-        signature_hex = signature.to_hex()
-        r_hex = self._int_to_hex(signature.r)
-        s_hex = self._int_to_hex(signature.s)
-        
-        return {
-            "signature": signature_hex,
-            "message_hash": f"0x{message_hash.hex()}",
-            "address": address,
-            "v": signature.v,
-            "r": r_hex,
-            "s": s_hex,
-            "is_low_s": signature.s <= HALF_CURVE_ORDER
-        }
+        Args:
+            transaction: {chain_id, nonce, to, value?, data?, gas?, max_fee_per_gas +
+                max_priority_fee_per_gas (EIP-1559) hoặc gas_price (legacy), type?, access_list?}
+        
+        Returns:
+            dict: {nonce, from, to, value, hash, raw_transaction}
+        """
+        return self._sign_transaction_dict(self._load_private_key(private_key_hex), transaction)
+    
+    def sign_transaction_with_address(self, transaction: dict, address: str) -> dict:
+        """Ký giao dịch bằng khóa đã mở khóa của `address`"""
+        return self._sign_transaction_dict(self._sessions.get(address), transaction)
+    
+    def sign_transactions_bytes(
+        self,
+        template: TransactionTemplate,
+        private_key_bytes: bytes,
+        items: Iterable[Tuple[int, bytes, int, bytes]],
+    ) -> Iterator[SignedTransaction]:
+        """
+        Ký một loạt giao dịch cùng người gửi và cùng trường chung `template`.
+        
+        Khóa chỉ nạp một lần cho cả loạt; mỗi mục (nonce, to, value, data) chỉ mã hóa
+        các trường riêng của nó, phần còn lại lấy từ các đoạn RLP của template.
+        """
+        return self._sign_transactions(self._load_private_key_bytes(private_key_bytes), template, items)
+    
+    def sign_transactions_with_address(
+        self,
+        template: TransactionTemplate,
+        address: str,
+        items: Iterable[Tuple[int, bytes, int, bytes]],
+    ) -> Iterator[SignedTransaction]:
+        """Như `sign_transactions_bytes` nhưng dùng khóa đã mở khóa của `address`"""
+        return self._sign_transactions(self._sessions.get(address), template, items)
+    
+    def _sign_transaction_dict(self, cached: CachedKey, transaction: dict) -> dict:
+        if transaction.get("nonce") is None:
+            raise ValueError("Thiếu nonce")
+        template = template_from_dict(transaction)
+        nonce = parse_quantity(transaction["nonce"], "nonce")
+        to, value, data = payment_from_dict(transaction)
+        return next(self._sign_transactions(cached, template, [(nonce, to, value, data)])).to_dict()
+    
+    def _sign_transactions(
+        self,
+        cached: CachedKey,
+        template: TransactionTemplate,
+        items: Iterable[Tuple[int, bytes, int, bytes]],
+    ) -> Iterator[SignedTransaction]:
+        sign = self.backend.signer(cached.private_key)
+        sender = cached.address_bytes
+        for nonce, to, value, data in items:
+            with self._span("hash"):
+                transaction_hash = keccak_hash(template.unsigned(nonce, to, value, data))
+            with self._span("sign"):
+                signature = sign(transaction_hash)
+            yield SignedTransaction(template.signed(nonce, to, value, data, signature), sender, nonce, to, value)
+    
+    def attest_messages(self, messages: Iterable[str], private_key_hex: str, use_personal: bool = True) -> dict:
+        """
+        Ký lô: một chữ ký trên gốc cây Merkle các hash thông điệp thay vì một chữ ký mỗi thông điệp.
+        
+        Returns:
+            dict: {root, signature, address, count, proofs: [{index, message_hash, proof}]}
+        """
+        message_hashes = (self._hash_message(message, use_personal) for message in messages)
+        return self._attest(self._load_private_key(private_key_hex), message_hashes).to_dict()
+    
+    def attest_messages_with_address(self, messages: Iterable[str], address: str, use_personal: bool = True) -> dict:
+        """Như `attest_messages` nhưng dùng khóa đã mở khóa của `address`"""
+        message_hashes = (self._hash_message(message, use_personal) for message in messages)
+        return self._attest(self._sessions.get(address), message_hashes).to_dict()
+    
+    def attest_hashes_bytes(self, message_hashes: Iterable[bytes], private_key_bytes: bytes) -> BatchAttestation:
+        """
+        Ký lô các hash 32 byte (có thể là luồng rất dài): cây được băm dần khi đọc,
+        rồi chỉ ký gốc một lần. Bằng chứng từng thông điệp lấy qua `proofs()` của kết quả.
+        """
+        return self._attest(self._load_private_key_bytes(private_key_bytes), message_hashes)
+    
+    def attest_hashes_with_address(self, message_hashes: Iterable[bytes], address: str) -> BatchAttestation:
+        """Như `attest_hashes_bytes` nhưng dùng khóa đã mở khóa của `address`"""
+        return self._attest(self._sessions.get(address), message_hashes)
+    
+    def _attest(self, cached: CachedKey, message_hashes: Iterable[bytes]) -> BatchAttestation:
+        with self._span("merkle"):
+            tree = MerkleTree(message_hashes)
+            root = tree.root()
+        signed = self._sign_hash(cached, self._root_digest(root))
+        return BatchAttestation(tree, signed.signature, cached.address_bytes)
+    
+    def verify_typed_data(
+        self,
+        typed_data,
+        signature_hex: str,
+        strict: bool = False,
+        require_low_s: bool = False,
+    ) -> Tuple[bool, Optional[str], str]:
+        """Xác thực chữ ký EIP-712 và khôi phục địa chỉ người ký (typed data sai định dạng ném ValueError)"""
+        return self.verify_message_hash(self.hash_typed_data(typed_data), signature_hex, strict, require_low_s)
+    
+    def verify_typed_data_with_public_key(
+        self,
+        typed_data,
+        signature_hex: str,
+        public_key_hex: str,
+    ) -> Tuple[bool, Optional[str], str]:
+        """Xác thực chữ ký EIP-712 bằng khóa công khai đã cho"""
+        return self.verify_message_hash_with_public_key(self.hash_typed_data(typed_data), signature_hex, public_key_hex)
     
     def verify_signature_with_public_key(
         self,
@@ -114,73 +474,296 @@ class WalletCore:
         use_personal: bool = True,
     ) -> Tuple[bool, Optional[str], str]:
         """Xác thực chữ ký bằng khóa công khai đã cho"""
-        if public_key_hex.startswith('0x'):
-            public_key_hex = public_key_hex[2:]
-        if signature_hex.startswith('0x'):
-            signature_hex = signature_hex[2:]
-        
         message_hash = self._hash_message(message, use_personal)
-        
+        return self.verify_message_hash_with_public_key(message_hash, signature_hex, public_key_hex)
+    
+    def verify_message_hash_with_public_key(
+        self,
+        message_hash: bytes,
+        signature_hex: str,
+        public_key_hex: str,
+    ) -> Tuple[bool, Optional[str], str]:
+        """Xác thực chữ ký trên hash đã tính sẵn bằng khóa công khai đã cho"""
         try:
-            public_key_bytes = bytes.fromhex(public_key_hex)
-            public_key = keys.PublicKey(public_key_bytes)
-            
-            signature_bytes = bytes.fromhex(signature_hex)
-            signature = keys.Signature(signature_bytes)
+            public_key_bytes = self._hex_to_bytes(public_key_hex)
+            signature_bytes = self._hex_to_bytes(signature_hex)
+        except ValueError:
+            return False, None, f"0x{message_hash.hex()}"
+        return self.verify_hash_bytes_with_public_key(message_hash, signature_bytes, public_key_bytes).to_tuple()
+    
+    def verify_hash_bytes_with_public_key(
+        self,
+        message_hash: bytes,
+        signature_bytes: bytes,
+        public_key_bytes: bytes,
+    ) -> Verification:
+        """Xác thực chữ ký 65 byte bằng khóa công khai 64 byte, không định dạng hex/checksum"""
+        try:
+            with self._span("key_parse"):
+                public_key = self.backend.public_key(public_key_bytes)
+            signature = self.backend.signature(signature_bytes)
             
-            is_valid = signature.verify_msg_hash(message_hash, public_key)
-            recovered_address = self._public_key_to_address(public_key)
-            return is_valid, recovered_address, f"0x{message_hash.hex()}"
+            with self._span("verify"):
+                is_valid = signature.verify_msg_hash(message_hash, public_key)
+            return Verification(is_valid, self._address_bytes(public_key), message_hash)
         except Exception:
-            return False, None, f"0x{message_hash.hex()}"
+            return Verification(False, None, message_hash)
     
     def verify_signature(
         self,
         message: str,
         signature_hex: str,
         use_personal: bool = True,
+        strict: bool = False,
+        require_low_s: bool = False,
     ) -> Tuple[bool, Optional[str], str]:
-        """Xác thực chữ ký và khôi phục địa chỉ người ký"""
-        normalized = signature_hex[2:] if signature_hex.startswith('0x') else signature_hex
-        message_hash = self._hash_message(message, use_personal)
+        """
+        Xác thực chữ ký và khôi phục địa chỉ người ký
+        
+        Mặc định chỉ khôi phục khóa công khai: r/s/v được kiểm tra một lần rồi
+        khôi phục. Khóa khôi phục được luôn thỏa phương trình ECDSA nên bước
+        `verify_msg_hash` với chính khóa đó là thừa; `strict=True` giữ lại bước này.
         
+        Args:
+            strict: Chạy thêm xác thực ECDSA đầy đủ với khóa vừa khôi phục
+            require_low_s: Từ chối chữ ký có s > n/2 (EIP-2)
+        """
+        message_hash = self._hash_message(message, use_personal)
+        return self.verify_message_hash(message_hash, signature_hex, strict, require_low_s)
+    
+    def verify_message_hash(
+        self,
+        message_hash: bytes,
+        signature_hex: str,
+        strict: bool = False,
+        require_low_s: bool = False,
+    ) -> Tuple[bool, Optional[str], str]:
+        """Xác thực chữ ký trên hash đã tính sẵn và khôi phục địa chỉ người ký"""
+        try:
+            signature_bytes = self._hex_to_bytes(signature_hex)
+        except ValueError:
+            return False, None, f"0x{message_hash.hex()}"
+        return self.verify_hash_bytes(message_hash, signature_bytes, strict, require_low_s).to_tuple()
+    
+    def verify_hash_bytes(
+        self,
+        message_hash: bytes,
+        signature_bytes: bytes,
+        strict: bool = False,
+        require_low_s: bool = False,
+    ) -> Verification:
+        """Như `verify_message_hash` trên chữ ký 65 byte; địa chỉ giữ dạng 20 byte cho tới `to_tuple()`"""
         try:
-            signature_bytes = bytes.fromhex(normalized)
-            signature = keys.Signature(signature_bytes)
+            signature = self.backend.signature(signature_bytes)
+            if not self._has_valid_signature_values(signature, require_low_s):
+                return Verification(False, None, message_hash)
             
-            recovered_public_key = signature.recover_public_key_from_msg_hash(message_hash)
-            recovered_address = self._public_key_to_address(recovered_public_key)
+            with self._span("recover"):
+                recovered_public_key = signature.recover_public_key_from_msg_hash(message_hash)
+            address_bytes = self._address_bytes(recovered_public_key)
             
-            is_valid = signature.verify_msg_hash(message_hash, recovered_public_key)
-            return is_valid, recovered_address, f"0x{message_hash.hex()}"
+            is_valid = True
+            if strict:
+                with self._span("verify"):
+                    is_valid = signature.verify_msg_hash(message_hash, recovered_public_key)
+            return Verification(is_valid, address_bytes, message_hash)
         except Exception:
+            return Verification(False, None, message_hash)
+    
+    def recover_batch(
+        self,
+        message_hashes: Sequence[bytes],
+        signatures: Sequence,
+        require_low_s: bool = False,
+    ) -> List[dict]:
+        """
+        Khôi phục địa chỉ người ký cho cả lô (hash 32 byte, chữ ký hex hoặc 65 byte).
+        
+        Backend Python thuần xử lý cả lô một lượt (xem `batch_recover`), backend
+        native gọi libsecp256k1 cho từng chữ ký. Lỗi của một mục không ảnh hưởng mục khác.
+        
+        Returns:
+            list: theo thứ tự đầu vào, {"address"} hoặc {"address": None, "error"}
+        """
+        return [result.to_dict() for result in self.recover_batch_bytes(message_hashes, signatures, require_low_s)]
+    
+    def recover_batch_bytes(
+        self,
+        message_hashes: Sequence[bytes],
+        signatures: Sequence,
+        require_low_s: bool = False,
+    ) -> List[Recovery]:
+        """Như `recover_batch` nhưng trả `Recovery` giữ địa chỉ 20 byte, không tính checksum"""
+        if len(message_hashes) != len(signatures):
+            raise ValueError("Số hash và số chữ ký phải bằng nhau")
+        results: List[Optional[Recovery]] = [None] * len(signatures)
+        positions, hashes, signature_bytes = [], [], []
+        for index, (message_hash, signature) in enumerate(zip(message_hashes, signatures)):
+            try:
+                if isinstance(signature, str):
+                    signature = self._hex_to_bytes(signature)
+                if require_low_s and int.from_bytes(signature[32:64], "big") > HALF_CURVE_ORDER:
+                    raise ValueError("Chữ ký có s cao (EIP-2)")
+            except ValueError as e:
+                results[index] = Recovery(None, str(e))
+                continue
+            positions.append(index)
+            hashes.append(message_hash)
+            signature_bytes.append(signature)
+        
+        with self._span("recover"):
+            recovered = self.backend.recover_batch(hashes, signature_bytes)
+        with self._span("address"):
+            for index, (public_key_bytes, error) in zip(positions, recovered):
+                if error is None:
+                    results[index] = Recovery(keccak(public_key_bytes)[-20:])
+                else:
+                    results[index] = Recovery(None, error)
+        return results
+    
+    def verify_attestation(
+        self,
+        message: str,
+        proof: dict,
+        use_personal: bool = True,
+        require_low_s: bool = False,
+    ) -> Tuple[bool, Optional[str], str]:
+        """
+        Xác thực thông điệp thuộc một lô đã ký: bằng chứng dẫn tới `root` và chữ ký trên gốc hợp lệ
+        
+        Args:
+            proof: {index, count, proof, root, signature} như một mục của `attest_messages`
+                kèm gốc và chữ ký của lô
+        
+        Returns:
+            tuple: như `verify_signature`, địa chỉ là người ký gốc
+        """
+        message_hash = self._hash_message(message, use_personal)
+        try:
+            inclusion = InclusionProof.from_dict(message_hash, proof)
+        except (KeyError, TypeError, ValueError):
             return False, None, f"0x{message_hash.hex()}"
+        return self.verify_inclusion_bytes(inclusion, require_low_s).to_tuple()
     
-    def _public_key_to_address(self, public_key):
-        """Hàm hỗ trợ chuyển khóa công khai thành địa chỉ"""
-        public_key_bytes = public_key.to_bytes()
-        if public_key_bytes[0] == 4:
-            public_key_bytes = public_key_bytes[1:]
+    def verify_inclusion_bytes(self, inclusion: InclusionProof, require_low_s: bool = False) -> Verification:
+        """
+        Như `verify_attestation` trên bằng chứng dạng bytes.
         
-        hash_bytes = keccak(public_key_bytes)
-        address_bytes = hash_bytes[-20:]
-        address = to_checksum_address(address_bytes.hex())
+        Người ký của mỗi cặp (gốc, chữ ký) được nhớ trong LRU, nên xác thực nhiều thông điệp
+        cùng lô chỉ tốn một lần khôi phục; cùng với đó là đường đi vừa xác thực, nên các thông
+        điệp liền nhau chỉ còn băm tới nút chung đầu tiên (xem `merkle.VerifiedPath`).
+        """
+        message_hash = inclusion.message_hash
+        key = inclusion.root + inclusion.signature + (b"\x01" if require_low_s else b"\x00")
+        attested = self._attested_roots.get(key)
+        with self._span("merkle"):
+            path = verify_path(
+                message_hash, inclusion.index, inclusion.count, inclusion.path, inclusion.root,
+                attested.path if attested is not None else None,
+            )
+        if path is None:
+            return Verification(False, None, message_hash)
         
-        return address
+        if attested is None:
+            recovered = self.verify_hash_bytes(self._root_digest(inclusion.root), inclusion.signature,
+                                               require_low_s=require_low_s)
+            # Ghi nhớ cả chữ ký gốc không hợp lệ (address None) để không khôi phục lại
+            attested = _AttestedRoot(recovered.address if recovered.valid else None)
+            self._attested_roots.put(key, attested)
+        attested.path = path
+        return Verification(attested.address is not None, attested.address, message_hash)
+    
+    def hash_message(self, message: str, use_personal: bool = True) -> bytes:
+        """Hash 32 byte sẽ được ký cho `message` (EIP-191 nếu `use_personal`)"""
+        return self._hash_message(message, use_personal)
+    
+    def clear_key_cache(self) -> None:
+        """Xóa toàn bộ khóa riêng (kể cả nút HD) đang được cache và đặt lại thống kê"""
+        self._key_cache.clear()
+        self._hd.clear()
+
+    def hd_cache_stats(self) -> dict:
+        """Thống kê cache nút HD cùng dạng `key_cache_stats`"""
+        return self._hd.stats()
+
+    def key_cache_stats(self) -> dict:
+        """Thống kê cache khóa: size, maxsize, hits, misses, evictions"""
+        return self._key_cache.stats()
+
+    def attestation_cache_stats(self) -> dict:
+        """Thống kê cache người ký theo gốc lô cùng dạng `key_cache_stats`"""
+        return self._attested_roots.stats()
+
+    def typed_data_cache_stats(self) -> dict:
+        """Thống kê cache EIP-712: {"schemas": {...}, "domains": {...}} cùng dạng `key_cache_stats`"""
+        return self._typed_data.stats()
+
+    def _load_private_key(self, private_key_hex: str) -> CachedKey:
+        """Parse khóa riêng hex (qua cache) và dẫn xuất khóa công khai + địa chỉ một lần"""
+        return self._load_private_key_bytes(self._hex_to_bytes(private_key_hex))
+
+    def _load_private_key_bytes(self, private_key_bytes: bytes) -> CachedKey:
+        """Như `_load_private_key` với khóa riêng 32 byte"""
+        digest = self._key_cache.digest(private_key_bytes)
+        cached = self._key_cache.get(digest)
+        if cached is not None:
+            return cached
+        
+        cached = self._parse_private_key(private_key_bytes)
+        self._key_cache.put(digest, cached)
+        return cached
+
+    def _parse_private_key(self, private_key_bytes: bytes) -> CachedKey:
+        """Parse khóa riêng và dẫn xuất khóa công khai + địa chỉ (không qua cache)"""
+        with self._span("key_parse"):
+            private_key = self.backend.private_key(private_key_bytes)
+            public_key = private_key.public_key
+        return CachedKey(private_key, public_key, self._address_bytes(public_key))
+
+    def _span(self, operation: str):
+        """Context manager đo thời gian một bước; không tốn gì khi không có observer"""
+        if self.observer is None:
+            return _NO_SPAN
+        return _Span(self.observer, operation)
+
+    def _has_valid_signature_values(self, signature, require_low_s: bool = False) -> bool:
+        """Kiểm tra 0 < r, s < n, v ∈ {0, 1} và (tùy chọn) chính sách low-s"""
+        if signature.v not in (0, 1):
+            return False
+        if not (0 < signature.r < SECPK1_N and 0 < signature.s < SECPK1_N):
+            return False
+        if require_low_s and signature.s > HALF_CURVE_ORDER:
+            return False
+        return True
+
+    def _public_key_to_address(self, public_key):
+        """Hàm hỗ trợ chuyển khóa công khai thành địa chỉ checksum"""
+        return checksum_address(self._address_bytes(public_key))
+
+    def _address_bytes(self, public_key) -> bytes:
+        """20 byte cuối của Keccak-256 khóa công khai (64 byte x ‖ y, không có tiền tố 0x04)"""
+        with self._span("address"):
+            return keccak(public_key.to_bytes())[-20:]
+
+    def _hex_to_bytes(self, value: str) -> bytes:
+        """Đổi chuỗi hex (có/không có tiền tố 0x) sang bytes"""
+        return bytes.fromhex(value[2:] if value.startswith('0x') else value)
 
     def _hash_message(self, message: str, use_personal: bool) -> bytes:
         """Băm thông điệp theo chuẩn EIP-191 nếu cần"""
-        message_bytes = message.encode('utf-8')
-        if use_personal:
-            prefix = f"\x19Ethereum Signed Message:\n{len(message_bytes)}".encode('utf-8')
-            payload = prefix + message_bytes
-        else:
-            payload = message_bytes
-        return keccak(payload)
-
-    def _int_to_hex(self, value: int, length: int = 32) -> str:
-        """Chuyển số nguyên sang hex có padding"""
-        hex_value = hex(value)[2:]
-        padded = hex_value.rjust(length * 2, '0')
-        return f"0x{padded}"
+        with self._span("hash"):
+            message_bytes = message.encode('utf-8')
+            if use_personal:
+                payload = self._personal_prefix(len(message_bytes)) + message_bytes
+            else:
+                payload = message_bytes
+            return keccak(payload)
+
+    def _root_digest(self, root: bytes) -> bytes:
+        """Hash được ký cho gốc lô: EIP-191 trên 32 byte gốc (ví ngoài ký được bằng personal_sign)"""
+        return keccak(self._personal_prefix(len(root)) + root)
+
+    def _personal_prefix(self, length: int) -> bytes:
+        """Tiền tố EIP-191 cho thông điệp dài `length` byte"""
+        return f"\x19Ethereum Signed Message:\n{length}".encode('utf-8')
 
@@ -0,0 +1,292 @@
+"""
+Daemon giữ WalletCore đã khởi động sẵn, nhận lệnh qua Unix domain socket
+Giao thức: mỗi dòng một JSON {"method", "args", "kwargs"} -> {"ok", "result"} hoặc {"ok": false, "error", "type"}
+
+Phần client chỉ dùng thư viện chuẩn (không import eth_keys) để CLI chuyển tiếp lệnh
+mà không tốn thời gian import; phần server chỉ import WalletCore khi chạy.
+"""
+import builtins
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+SOCKET_ENV_VAR = "WALLET_DAEMON_SOCKET"
+# Đặt WALLET_NO_DAEMON=1 để CLI luôn chạy tại chỗ
+DISABLE_ENV_VAR = "WALLET_NO_DAEMON"
+
+# Các phương thức WalletCore được phép gọi qua socket
+ALLOWED_METHODS = frozenset({
+    "generate_keypair",
+    "private_key_to_address",
+    "sign_message",
+    "sign_message_hash",
+    "sign_message_with_address",
+    "sign_message_hash_with_address",
+    "verify_signature",
+    "verify_signature_with_public_key",
+    "verify_message_hash",
+    "verify_message_hash_with_public_key",
+    "hash_file",
+    "hash_typed_data",
+    "sign_typed_data",
+    "sign_typed_data_with_address",
+    "verify_typed_data",
+    "verify_typed_data_with_public_key",
+    "sign_transaction",
+    "sign_transaction_with_address",
+    "attest_messages",
+    "attest_messages_with_address",
+    "verify_attestation",
+    "unlock_keystore",
+    "lock",
+    "unlocked_sessions",
+})
+
+
+def _fallback_dir() -> Path:
+    """Thư mục riêng 0700 của user hiện tại khi không có XDG_RUNTIME_DIR"""
+    return Path(tempfile.gettempdir()) / f"eth-wallet-{os.getuid()}"
+
+
+def default_socket_path() -> str:
+    """WALLET_DAEMON_SOCKET, hoặc $XDG_RUNTIME_DIR/eth-wallet.sock, hoặc /tmp/eth-wallet-<uid>/daemon.sock"""
+    path = os.environ.get(SOCKET_ENV_VAR)
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return str(Path(runtime_dir) / "eth-wallet.sock")
+    return str(_fallback_dir() / "daemon.sock")
+
+
+def ensure_private_dir(directory: Path) -> None:
+    """
+    Tạo thư mục quyền 0700 nếu chưa có và kiểm tra nó thuộc user hiện tại
+
+    Raises:
+        PermissionError: đường dẫn không phải thư mục, thuộc user khác hoặc người khác truy cập được
+    """
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{directory} phải là thư mục quyền 0700 của user hiện tại")
+
+
+def peer_uid(sock: socket.socket, path: str) -> int:
+    """uid của tiến trình đầu kia socket (SO_PEERCRED), hoặc của chủ file socket nếu hệ thống không hỗ trợ"""
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", credentials)[1]
+    return os.stat(path).st_uid
+
+
+def _encode(value: Any) -> Any:
+    """bytes không có trong JSON nên gửi dạng {"__bytes__": hex}; tuple thành list"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__bytes__": bytes(value).hex()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and "__bytes__" in value:
+            return bytes.fromhex(value["__bytes__"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _builtin_type_name(error: Exception) -> str:
+    """Tên lớp ngoại lệ có sẵn gần nhất (ví dụ SessionLocked -> LookupError) để client ném lại"""
+    for cls in type(error).__mro__:
+        if getattr(builtins, cls.__name__, None) is cls:
+            return cls.__name__
+    return "Exception"
+
+
+class DaemonError(RuntimeError):
+    """Lỗi từ daemon không ánh xạ được về kiểu ngoại lệ có sẵn"""
+
+
+class DaemonClient:
+    """
+    Kết nối tới daemon; giữ một socket và gửi từng lệnh tuần tự.
+
+    Chỉ nói chuyện với daemon cùng user: tiến trình đầu kia thuộc user khác thì ném
+    PermissionError trước khi gửi bất kỳ lệnh nào (khóa riêng đi qua socket này).
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0):
+        self.path = path or default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(self.path)
+            uid = peer_uid(self._socket, self.path)
+            if uid != os.getuid():
+                raise PermissionError(f"Socket {self.path} thuộc user khác (uid {uid}), không gửi lệnh")
+        except OSError:
+            self._socket.close()
+            raise
+        self._reader = self._socket.makefile("rb")
+
+    def call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        request = {"method": method, "args": _encode(args), "kwargs": _encode(kwargs)}
+        self._socket.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Daemon đã đóng kết nối")
+        response = json.loads(line)
+        if response.get("ok"):
+            return _decode(response.get("result"))
+        error_type = getattr(builtins, response.get("type", ""), None)
+        if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+            error_type = DaemonError
+        raise error_type(response.get("error", "Lỗi không xác định từ daemon"))
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+
+class WalletProxy:
+    """Đối tượng thay cho WalletCore ở phía CLI: `proxy.sign_message(...)` gọi sang daemon"""
+
+    def __init__(self, client: DaemonClient):
+        self._client = client
+
+    def __getattr__(self, method: str):
+        if method not in ALLOWED_METHODS:
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self._client.call(method, *args, **kwargs)
+
+
+def connect(path: Optional[str] = None) -> Optional[DaemonClient]:
+    """
+    Kết nối tới daemon nếu đang chạy dưới cùng user (và không bị tắt bằng WALLET_NO_DAEMON),
+    ngược lại None để chạy tại chỗ
+    """
+    if os.environ.get(DISABLE_ENV_VAR, "") not in ("", "0"):
+        return None
+    try:
+        return DaemonClient(path)
+    except OSError:
+        return None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                method = request["method"]
+                if method == "__status__":
+                    result = server.status()
+                elif method == "__shutdown__":
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    result = True
+                elif method in ALLOWED_METHODS:
+                    args = _decode(request.get("args") or [])
+                    kwargs = _decode(request.get("kwargs") or {})
+                    result = getattr(server.core, method)(*args, **kwargs)
+                else:
+                    raise ValueError(f"Phương thức không được phép: {method}")
+                server.requests += 1
+                response = {"ok": True, "result": _encode(result)}
+            except Exception as e:
+                response = {"ok": False, "error": str(e), "type": _builtin_type_name(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class WalletDaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Server đa luồng dùng chung một WalletCore (cache khóa, phiên mở khóa, bảng fixed-base)"""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, core):
+        self.core = core
+        self.started_at = time.time()
+        self.requests = 0
+        # Socket chỉ chủ sở hữu truy cập được: daemon có thể giữ khóa đã mở
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "socket": self.server_address,
+            "backend": self.core.backend.name,
+            "uptime": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "unlocked": len(self.core.unlocked_sessions()),
+        }
+
+
+def serve(path: Optional[str] = None) -> None:
+    """Chạy daemon ở tiến trình hiện tại đến khi nhận __shutdown__ hoặc SIGTERM/SIGINT"""
+    import signal
+
+    from wallet_core import WalletCore
+
+    path = path or default_socket_path()
+    if Path(path).parent == _fallback_dir():
+        ensure_private_dir(Path(path).parent)
+    if os.path.exists(path):
+        # Socket cũ còn sót lại: chỉ xóa nếu không có daemon nào đang nghe
+        # (không qua connect(): WALLET_NO_DAEMON không được làm xóa socket của daemon đang chạy)
+        try:
+            client = DaemonClient(path)
+        except PermissionError:
+            raise RuntimeError(f"{path} thuộc user khác, không dùng được") from None
+        except OSError:
+            os.unlink(path)
+        else:
+            client.close()
+            raise RuntimeError(f"Daemon đã chạy tại {path}")
+
+    server = WalletDaemonServer(path, WalletCore())
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.core.lock()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="Daemon WalletCore qua Unix socket")
+    parser.add_argument("--socket", help="Đường dẫn socket (mặc định: WALLET_DAEMON_SOCKET hoặc thư mục runtime)")
+    serve(parser.parse_args().socket)
@@ -0,0 +1,132 @@
+"""
+Client cho kênh WebSocket /api/ws
+Gửi liên tiếp nhiều yêu cầu trên một kết nối, ghép phản hồi (có thể về khác thứ tự) theo id
+"""
+import asyncio
+import itertools
+from typing import Any, Iterable, List, Optional
+
+from ws_protocol import DEFAULT_MAX_IN_FLIGHT, ENCODING_JSON, ENCODING_MSGPACK, ENCODINGS, decode, encode
+
+DEFAULT_URL = "ws://localhost:8000/api/ws"
+
+
+class ChannelError(Exception):
+    """Frame lỗi từ máy chủ; `status` giống mã HTTP của route REST tương ứng"""
+
+    def __init__(self, status: int, detail: Any, retry_after: Optional[int] = None):
+        super().__init__(f"{status}: {detail}")
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class WalletChannel:
+    """
+    Một kết nối WebSocket dùng chung cho nhiều yêu cầu đồng thời.
+
+    Mỗi `request()` gửi một frame có id rồi chờ future của id đó; một task đọc duy nhất trả
+    kết quả về đúng future. `window` giới hạn số yêu cầu đang chờ ở phía client (nên bằng
+    WALLET_WS_MAX_IN_FLIGHT của máy chủ) để không dồn frame vào bộ đệm socket.
+
+        async with WalletChannel("ws://localhost:8000/api/ws") as channel:
+            results = await channel.pipeline([("sign", {...}), ("verify", {...})])
+    """
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        encoding: str = ENCODING_JSON,
+        window: int = DEFAULT_MAX_IN_FLIGHT,
+        session_token: Optional[str] = None,
+    ):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"encoding phải là {' hoặc '.join(ENCODINGS)}")
+        if encoding == ENCODING_MSGPACK:
+            encode({}, encoding)  # Báo lỗi sớm nếu chưa cài msgpack
+        self.url = url
+        self.encoding = encoding
+        # Token từ /api/keystore/unlock, gửi trong X-Wallet-Session khi bắt tay để ký theo `address`
+        self.session_token = session_token
+        self._window = asyncio.Semaphore(window)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._socket = None
+        self._reader = None
+
+    async def connect(self) -> "WalletChannel":
+        import websockets
+
+        headers = {"X-Wallet-Session": self.session_token} if self.session_token else None
+        self._socket = await websockets.connect(self.url, max_size=None, additional_headers=headers)
+        self._reader = asyncio.create_task(self._read())
+        return self
+
+    async def close(self) -> None:
+        if self._socket is not None:
+            await self._socket.close()
+        if self._reader is not None:
+            await self._reader
+        self._socket = self._reader = None
+
+    async def __aenter__(self) -> "WalletChannel":
+        return await self.connect()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def request(self, op: str, params: Optional[dict] = None) -> dict:
+        """
+        Gửi một yêu cầu và chờ kết quả
+
+        Raises:
+            ChannelError: máy chủ trả frame lỗi
+            ConnectionError: kết nối đóng trước khi có phản hồi
+        """
+        if self._socket is None:
+            raise ConnectionError("Chưa kết nối, hãy gọi connect() hoặc dùng `async with`")
+        async with self._window:
+            frame_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[frame_id] = future
+            try:
+                await self._socket.send(encode({"id": frame_id, "op": op, "params": params or {}}, self.encoding))
+                return await future
+            finally:
+                self._pending.pop(frame_id, None)
+
+    async def pipeline(self, requests: Iterable, return_exceptions: bool = False) -> List:
+        """Gửi các (op, params) liên tiếp, trả kết quả theo thứ tự gửi"""
+        return await asyncio.gather(
+            *(self.request(op, params) for op, params in requests), return_exceptions=return_exceptions
+        )
+
+    async def generate(self) -> dict:
+        return await self.request("generate")
+
+    async def sign(self, message: str, private_key: str, personal: bool = True) -> dict:
+        return await self.request("sign", {"message": message, "private_key": private_key, "personal": personal})
+
+    async def verify(self, message: str, signature: str, personal: bool = True, **options) -> dict:
+        return await self.request("verify", {"message": message, "signature": signature, "personal": personal, **options})
+
+    async def _read(self) -> None:
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            async for data in self._socket:
+                frame = decode(data)
+                future = self._pending.get(frame.get("id"))
+                if future is None or future.done():
+                    continue
+                error = frame.get("error")
+                if error is not None:
+                    future.set_exception(ChannelError(error.get("status"), error.get("detail"), error.get("retry_after")))
+                else:
+                    future.set_result(frame.get("result"))
+        except ConnectionClosed:
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Kết nối WebSocket đã đóng"))
@@ -0,0 +1,101 @@
+"""
+Giao thức kênh WebSocket /api/ws: frame có id, gửi liên tiếp không chờ (pipelining)
+Frame văn bản là JSON, frame nhị phân là MessagePack (gói `msgpack` tùy chọn);
+phản hồi dùng cùng kiểu mã hóa với frame yêu cầu và có thể về khác thứ tự gửi
+"""
+import json
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # Tùy chọn: không có msgpack thì chỉ nhận frame JSON
+    msgpack = None
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+ENCODINGS = (ENCODING_JSON, ENCODING_MSGPACK)
+
+# Yêu cầu: {"id", "op", "params"}; phản hồi: {"id", "result"} hoặc {"id", "error": {"status", "detail"}}
+OP_GENERATE = "generate"
+OP_SIGN = "sign"
+OP_VERIFY = "verify"
+OP_SIGN_TYPED = "sign_typed"
+OP_VERIFY_TYPED = "verify_typed"
+OPS = (OP_GENERATE, OP_SIGN, OP_VERIFY, OP_SIGN_TYPED, OP_VERIFY_TYPED)
+
+DEFAULT_MAX_IN_FLIGHT = 32
+
+
+class FrameError(ValueError):
+    """Frame không giải mã được hoặc sai cấu trúc; `id` là id đọc được (nếu có)"""
+
+    def __init__(self, message: str, frame_id: Any = None, status: int = 400):
+        super().__init__(message)
+        self.id = frame_id
+        self.status = status
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def encode(frame: dict, encoding: str = ENCODING_JSON):
+    """Frame thành str (JSON) hoặc bytes (MessagePack)"""
+    if encoding == ENCODING_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Cần cài msgpack để dùng frame MessagePack (pip install msgpack)")
+        return msgpack.packb(frame, use_bin_type=True)
+    return json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode(data) -> dict:
+    """
+    Frame từ str (JSON) hoặc bytes (MessagePack)
+
+    Raises:
+        FrameError: không giải mã được, không phải object hoặc chưa cài msgpack (status 415)
+    """
+    try:
+        if isinstance(data, str):
+            frame = json.loads(data)
+        elif msgpack is None:
+            raise FrameError("Máy chủ chưa cài msgpack, hãy gửi frame JSON dạng văn bản", status=415)
+        else:
+            frame = msgpack.unpackb(data, raw=False)
+    except FrameError:
+        raise
+    except Exception as e:
+        raise FrameError(f"Frame không hợp lệ: {e}") from None
+    if not isinstance(frame, dict):
+        raise FrameError("Frame phải là object {id, op, params}")
+    return frame
+
+
+def parse_request(frame: dict):
+    """
+    (id, op, params) từ frame yêu cầu
+
+    Raises:
+        FrameError: thiếu id, op không hỗ trợ hoặc params không phải object
+    """
+    frame_id = frame.get("id")
+    if frame_id is None or isinstance(frame_id, (dict, list)):
+        raise FrameError("Frame cần id (chuỗi hoặc số) để ghép phản hồi")
+    op = frame.get("op")
+    if op not in OPS:
+        raise FrameError(f"op không hỗ trợ: {op} (hỗ trợ {', '.join(OPS)})", frame_id)
+    params = frame.get("params") or {}
+    if not isinstance(params, dict):
+        raise FrameError("params phải là object", frame_id)
+    return frame_id, op, params
+
+
+def result_frame(frame_id: Any, result: dict) -> dict:
+    return {"id": frame_id, "result": result}
+
+
+def error_frame(frame_id: Any, status: int, detail: Any, retry_after: Optional[int] = None) -> dict:
+    error = {"status": status, "detail": detail}
+    if retry_after is not None:
+        error["retry_after"] = retry_after
+    return {"id": frame_id, "error": error}
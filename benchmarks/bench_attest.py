@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark cho ký lô bằng gốc Merkle
+So ký/xác thực từng thông điệp (một phép EC mỗi thông điệp) với ký một lần trên gốc
+và xác thực bằng chứng (theo thứ tự và xáo trộn)
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from wallet_core import WalletCore
+
+
+def measure(fn, count: int) -> float:
+    """Trả về số thông điệp mỗi giây"""
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So ký từng thông điệp với ký lô bằng gốc Merkle")
+    parser.add_argument('--count', type=int, default=20000, help='Số thông điệp mỗi lô')
+    parser.add_argument('--backend', help='Backend EC (coincurve, python)')
+    args = parser.parse_args()
+
+    wallet = WalletCore(ec_backend=args.backend)
+    private_key, _, _ = wallet.generate_keypair()
+    messages = [f"Biên nhận #{i}" for i in range(args.count)]
+
+    signatures = [wallet.sign_message(message, private_key)["signature"] for message in messages]
+    attestation = wallet.attest_messages(messages, private_key)
+    shared = {"count": attestation["count"], "root": attestation["root"], "signature": attestation["signature"]}
+    proofs = [{**proof, **shared} for proof in attestation["proofs"]]
+    shuffled = list(zip(messages, proofs))
+    random.shuffle(shuffled)
+
+    def verify_each():
+        for message, signature in zip(messages, signatures):
+            assert wallet.verify_signature(message, signature)[0]
+
+    def verify_proofs(pairs):
+        def run():
+            for message, proof in pairs:
+                assert wallet.verify_attestation(message, proof)[0]
+        return run
+
+    rates = [
+        ("sign từng thông điệp", measure(lambda: [wallet.sign_message(m, private_key) for m in messages], args.count)),
+        ("attest (một chữ ký)", measure(lambda: wallet.attest_messages(messages, private_key), args.count)),
+        ("verify từng chữ ký", measure(verify_each, args.count)),
+        ("verify bằng chứng, theo thứ tự", measure(verify_proofs(zip(messages, proofs)), args.count)),
+        ("verify bằng chứng, xáo trộn", measure(verify_proofs(shuffled), args.count)),
+    ]
+    print(f"backend {wallet.backend.name}, {args.count:,} thông điệp")
+    for name, rate in rates:
+        print(f"  {name:32s} {rate:12,.0f} msg/s")
+    print(f"  cache gốc: {wallet.attestation_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
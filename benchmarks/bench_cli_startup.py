@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark thời gian khởi động CLI
+Đo `--help`, lỗi tham số và sign/verify chạy tại chỗ so với chuyển tiếp qua daemon
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CLI = str(Path(__file__).parent.parent / "cli" / "wallet_cli.py")
+PRIVATE_KEY = "0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+MESSAGE = "benchmark"
+
+
+def run(args, env, stdin: str = "n\n") -> str:
+    """Chạy CLI (hoặc `python` nếu args bắt đầu bằng "-c"), trả stdout"""
+    command = [sys.executable, *args] if args[0] == "-c" else [sys.executable, CLI, *args]
+    return subprocess.run(command, input=stdin, env=env, capture_output=True, text=True).stdout
+
+
+def timed(args, env, repeat: int) -> float:
+    """Trung vị thời gian (ms) một lần chạy"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(args, env)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thời gian khởi động CLI và daemon")
+    parser.add_argument('--repeat', type=int, default=10, help='Số lần chạy mỗi lệnh')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, WALLET_DAEMON_SOCKET=str(Path(tmp) / "wallet.sock"))
+        local_env = dict(env, WALLET_NO_DAEMON="1")
+
+        output = run(["sign", MESSAGE, "--private-key", PRIVATE_KEY], local_env)
+        signature = next(line.split()[-1] for line in output.splitlines() if line.startswith("Chữ ký"))
+        sign_args = ["sign", MESSAGE, "--private-key", PRIVATE_KEY]
+        verify_args = ["verify", "--message", MESSAGE, "--signature", signature]
+
+        rows = [
+            ("python -c pass", timed(["-c", "pass"], env, args.repeat)),
+            ("wallet --help", timed(["--help"], env, args.repeat)),
+            ("wallet (lỗi tham số)", timed(["sign", "--bad-flag"], env, args.repeat)),
+            ("sign tại chỗ", timed(sign_args, local_env, args.repeat)),
+            ("verify tại chỗ", timed(verify_args, local_env, args.repeat)),
+        ]
+
+        start = time.perf_counter()
+        run(["daemon", "start"], env)
+        daemon_start = (time.perf_counter() - start) * 1000
+        try:
+            rows += [
+                ("daemon start", daemon_start),
+                ("sign qua daemon", timed(sign_args, env, args.repeat)),
+                ("verify qua daemon", timed(verify_args, env, args.repeat)),
+            ]
+        finally:
+            run(["daemon", "stop"], env)
+
+    print(f"{'lệnh':<22} {'ms (trung vị)':>14}")
+    for name, elapsed in rows:
+        print(f"{name:<22} {elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark bảng điểm sinh (fixed-base) của backend Python thuần
+So sánh sinh khóa, ký và khôi phục theo độ rộng cửa sổ, kèm thời gian dựng/nạp và dung lượng bảng
+"""
+import argparse
+import secrets
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from ec_backend import PythonBackend
+from fixed_base import GeneratorTable
+
+
+def rate(fn, count: int) -> float:
+    """Số lần gọi mỗi giây"""
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bảng fixed-base theo độ rộng cửa sổ")
+    parser.add_argument('--windows', default="0,4,6,8,10,12",
+                        help='Các độ rộng cửa sổ cần đo, phân tách bằng dấu phẩy (0 = không dùng bảng)')
+    parser.add_argument('--count', type=int, default=300, help='Số lần lặp mỗi thao tác')
+    args = parser.parse_args()
+
+    private_key_bytes = secrets.token_bytes(32)
+    message_hash = secrets.token_bytes(32)
+    baseline = None
+
+    print(f"{'window':>6} {'bảng':>10} {'dựng':>8} {'nạp mmap':>9} "
+          f"{'keygen/s':>10} {'sign/s':>10} {'recover/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for window in (int(w) for w in args.windows.split(",") if w):
+            size = build_time = load_time = 0.0
+            if window:
+                start = time.perf_counter()
+                table = GeneratorTable.build(window)
+                build_time = time.perf_counter() - start
+                path = str(Path(tmp) / f"g{window}.tab")
+                table.save(path)
+                start = time.perf_counter()
+                GeneratorTable.load(path, window)
+                load_time = time.perf_counter() - start
+                size = table.nbytes
+
+            backend = PythonBackend(window=window)
+            private_key = backend.private_key(private_key_bytes)
+            signature = private_key.sign_msg_hash(message_hash)
+            rates = (
+                rate(lambda: backend.public_key_bytes(private_key_bytes), args.count),
+                rate(lambda: private_key.sign_msg_hash(message_hash), args.count),
+                rate(lambda: backend.ecc.ecdsa_recover(message_hash, signature), max(1, args.count // 4)),
+            )
+            if baseline is None:
+                baseline = rates
+            speedups = "  ".join(f"x{r / b:.1f}" for r, b in zip(rates, baseline))
+            print(f"{window:>6} {size / 1024:>8.0f}KB {build_time * 1000:>6.0f}ms {load_time * 1000:>7.1f}ms "
+                  f"{rates[0]:>10.0f} {rates[1]:>10.0f} {rates[2]:>10.0f}  {speedups}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark cho Sign-In with Ethereum
+Đo tốc độ phân tích thông điệp EIP-4361, phát/dùng nonce từ nhiều thread
+(1 shard so với nhiều shard), xác thực đăng nhập trọn vẹn trong một tiến trình và,
+với `--shared`, tốc độ dùng nonce qua file SQLite chung giữa nhiều tiến trình (`--workers N`)
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from wallet_core import WalletCore
+from nonce_store import DEFAULT_SHARDS, NonceStore, SQLiteNoncePersistence
+from siwe import SiweMessage
+
+
+def make_messages(wallet: WalletCore, store: NonceStore, count: int) -> list:
+    """Các cặp (thông điệp, chữ ký) hợp lệ với nonce lấy từ `store`"""
+    private_key, _, address = wallet.generate_keypair()
+    messages = []
+    for _ in range(count):
+        text = SiweMessage(
+            domain="example.com",
+            address=address,
+            uri="https://example.com/login",
+            nonce=store.issue(),
+            issued_at="2026-01-01T00:00:00Z",
+            statement="Đăng nhập vào ví",
+        ).prepare()
+        messages.append((text, wallet.sign_message(text, private_key)["signature"]))
+    return messages
+
+
+def measure_parse(messages: list) -> float:
+    """Trả về số thông điệp phân tích mỗi giây"""
+    start = time.perf_counter()
+    for text, _ in messages:
+        SiweMessage.parse(text)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def measure_nonces(shards: int, threads: int, count: int) -> float:
+    """Trả về số cặp issue+consume mỗi giây khi `threads` thread cùng dùng một kho"""
+    store = NonceStore(shards=shards)
+
+    def worker():
+        for _ in range(count):
+            assert store.consume(store.issue())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * count / (time.perf_counter() - start)
+
+
+def measure_verify(wallet: WalletCore, store: NonceStore, messages: list) -> float:
+    """Trả về số lần đăng nhập xác thực mỗi giây: phân tích, khôi phục, kiểm tra, dùng nonce"""
+    start = time.perf_counter()
+    for text, signature in messages:
+        message = SiweMessage.parse(text)
+        _, address, _ = wallet.verify_signature(text, signature)
+        message.check(address, "example.com")
+        assert store.consume(message.nonce), "Nonce mẫu phải hợp lệ"
+    return len(messages) / (time.perf_counter() - start)
+
+
+def _consume_shared(path: str, nonces: list, barrier) -> tuple:
+    """Một worker dùng các nonce do worker khác phát; trả (bắt đầu, kết thúc) theo đồng hồ hệ thống"""
+    store = NonceStore(persistence=SQLiteNoncePersistence(path, shared=True))
+    barrier.wait()
+    start = time.time()
+    for nonce in nonces:
+        assert store.consume(nonce), "Nonce dùng chung phải hợp lệ"
+    end = time.time()
+    store.close()
+    return start, end
+
+
+def measure_shared(processes: int, count: int) -> tuple:
+    """
+    Trả về (issue+consume/s trong một worker, consume/s tổng của `processes` worker) với kho SQLite chung.
+
+    Số đầu là đường nhanh: nonce dùng trước khi được ghi xuống file. Số sau là trường hợp xấu nhất:
+    mọi nonce do worker khác phát nên mỗi lần dùng là một transaction ghi, các tiến trình xếp hàng trên khóa file.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nonces.db")
+        store = NonceStore(persistence=SQLiteNoncePersistence(path, shared=True))
+        start = time.perf_counter()
+        for _ in range(count):
+            assert store.consume(store.issue())
+        local = count / (time.perf_counter() - start)
+
+        nonces = [store.issue() for _ in range(processes * count)]
+        store.close()
+        context = multiprocessing.get_context("fork")
+        barrier = context.Manager().Barrier(processes)
+        with context.Pool(processes) as pool:
+            spans = pool.starmap(
+                _consume_shared,
+                [(path, nonces[i * count:(i + 1) * count], barrier) for i in range(processes)],
+            )
+        elapsed = max(end for _, end in spans) - min(start for start, _ in spans)
+        return local, processes * count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo tốc độ phân tích SIWE, kho nonce và xác thực đăng nhập")
+    parser.add_argument('--count', type=int, default=2000, help='Số thông điệp mỗi lần đo')
+    parser.add_argument('--threads', type=int, default=4, help='Số thread cùng phát/dùng nonce')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS, help='Số shard của kho nonce để so với 1 shard')
+    parser.add_argument('--shared', type=int, default=0, metavar='N',
+                        help='Đo thêm kho nonce SQLite dùng chung giữa N tiến trình (như --workers N)')
+    args = parser.parse_args()
+
+    wallet = WalletCore()
+    store = NonceStore()
+    messages = make_messages(wallet, store, args.count)
+
+    print(f"parse:                     {measure_parse(messages):10.1f} msg/s")
+    for shards in (1, args.shards):
+        rate = measure_nonces(shards, args.threads, args.count)
+        print(f"nonce ({shards:2d} shard, {args.threads} thread): {rate:10.1f} issue+consume/s")
+    print(f"verify ({wallet.backend.name}):        {measure_verify(wallet, store, messages):10.1f} login/s")
+    if args.shared:
+        local, shared = measure_shared(args.shared, args.count)
+        print(f"shared (1 worker, chưa ghi):  {local:10.1f} issue+consume/s")
+        print(f"shared ({args.shared} worker, qua file): {shared:10.1f} consume/s")
+
+
+if __name__ == "__main__":
+    main()
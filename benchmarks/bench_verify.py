@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark cho verify_signature
+So sánh chế độ chỉ khôi phục (mặc định) với chế độ strict và khôi phục hàng loạt
+(`recover_batch`) trên từng EC backend
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from wallet_core import WalletCore
+from ec_backend import available_backends
+
+
+def measure(wallet: WalletCore, signatures: list, strict: bool) -> float:
+    """Trả về số lần xác thực mỗi giây"""
+    start = time.perf_counter()
+    for message, signature in signatures:
+        is_valid, _, _ = wallet.verify_signature(message, signature, strict=strict)
+        assert is_valid, "Chữ ký mẫu phải hợp lệ"
+    elapsed = time.perf_counter() - start
+    return len(signatures) / elapsed
+
+
+def measure_batch(wallet: WalletCore, signatures: list, batch_size: int) -> float:
+    """Trả về số chữ ký khôi phục mỗi giây qua `recover_batch` (tính cả hash thông điệp)"""
+    start = time.perf_counter()
+    for offset in range(0, len(signatures), batch_size):
+        batch = signatures[offset:offset + batch_size]
+        hashes = [wallet.hash_message(message) for message, _ in batch]
+        results = wallet.recover_batch(hashes, [signature for _, signature in batch])
+        assert all(result["address"] for result in results), "Chữ ký mẫu phải hợp lệ"
+    elapsed = time.perf_counter() - start
+    return len(signatures) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh tốc độ verify recover-only, strict và recover_batch")
+    parser.add_argument('--count', type=int, default=200, help='Số chữ ký mỗi lần đo')
+    parser.add_argument('--backend', choices=available_backends(), action='append',
+                        help='Backend cần đo (mặc định: tất cả backend khả dụng)')
+    parser.add_argument('--batch-size', type=int, default=64, help='Số chữ ký mỗi lô cho recover_batch')
+    args = parser.parse_args()
+
+    for name in args.backend or available_backends():
+        wallet = WalletCore(ec_backend=name)
+        private_key, _, _ = wallet.generate_keypair()
+        signatures = []
+        for i in range(args.count):
+            message = f"benchmark message #{i}"
+            signatures.append((message, wallet.sign_message(message, private_key)["signature"]))
+
+        strict_rate = measure(wallet, signatures, strict=True)
+        recover_rate = measure(wallet, signatures, strict=False)
+        batch_rate = measure_batch(wallet, signatures, args.batch_size)
+        print(f"[{name}] strict:       {strict_rate:10.1f} verify/s")
+        print(f"[{name}] recover-only: {recover_rate:10.1f} verify/s  (x{recover_rate / strict_rate:.2f})")
+        print(f"[{name}] recover_batch:{batch_rate:10.1f} verify/s  (x{batch_rate / strict_rate:.2f})")
+
+
+if __name__ == "__main__":
+    main()
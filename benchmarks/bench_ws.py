@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark kênh WebSocket /api/ws so với REST
+Chạy API bằng uvicorn trong cùng tiến trình (thread riêng) rồi đo số yêu cầu ký/xác thực mỗi giây:
+REST tuần tự (keep-alive), REST đồng thời và WebSocket gửi liên tiếp (JSON, MessagePack nếu có)
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import httpx
+import uvicorn
+
+from app import app
+from wallet_core import WalletCore
+from ws_client import WalletChannel
+from ws_protocol import ENCODING_JSON, ENCODING_MSGPACK, msgpack_available
+
+
+def start_server() -> tuple:
+    """Khởi động uvicorn trên cổng trống, trả (server, cổng)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, port
+
+
+def make_requests(count: int) -> list:
+    """(op, params) xen kẽ ký và xác thực"""
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    requests = []
+    for i in range(count):
+        message = f"Thông điệp #{i}"
+        if i % 2:
+            signature = wallet.sign_message(message, private_key)["signature"]
+            requests.append(("verify", {"message": message, "signature": signature, "address": address}))
+        else:
+            requests.append(("sign", {"message": message, "private_key": private_key}))
+    return requests
+
+
+ROUTES = {"sign": "/api/wallet/sign", "verify": "/api/wallet/verify"}
+
+
+def rest_sequential(base: str, requests: list) -> float:
+    with httpx.Client(base_url=base) as client:
+        start = time.perf_counter()
+        for op, params in requests:
+            client.post(ROUTES[op], json=params).raise_for_status()
+        return len(requests) / (time.perf_counter() - start)
+
+
+async def rest_concurrent(base: str, requests: list, concurrency: int) -> float:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits) as client:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def post(op, params):
+            async with slots:
+                (await client.post(ROUTES[op], json=params)).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(post(op, params) for op, params in requests))
+        return len(requests) / (time.perf_counter() - start)
+
+
+async def websocket(url: str, requests: list, encoding: str, window: int) -> float:
+    async with WalletChannel(url, encoding=encoding, window=window) as channel:
+        start = time.perf_counter()
+        await channel.pipeline(requests)
+        return len(requests) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So kênh WebSocket gửi liên tiếp với REST")
+    parser.add_argument('--count', type=int, default=2000, help='Số yêu cầu mỗi lần đo')
+    parser.add_argument('--concurrency', type=int, default=32, help='Số yêu cầu đồng thời (REST) / cửa sổ (WebSocket)')
+    args = parser.parse_args()
+
+    server, port = start_server()
+    base, url = f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}/api/ws"
+    requests = make_requests(args.count)
+    # Khởi động nóng (cache khóa, kết nối)
+    rest_sequential(base, requests[:50])
+
+    rates = [
+        ("REST tuần tự", rest_sequential(base, requests)),
+        (f"REST {args.concurrency} đồng thời", asyncio.run(rest_concurrent(base, requests, args.concurrency))),
+        ("WebSocket JSON", asyncio.run(websocket(url, requests, ENCODING_JSON, args.concurrency))),
+    ]
+    if msgpack_available():
+        rates.append(("WebSocket MessagePack", asyncio.run(websocket(url, requests, ENCODING_MSGPACK, args.concurrency))))
+    server.should_exit = True
+
+    print(f"{args.count:,} yêu cầu (ký/xác thực xen kẽ)")
+    for name, rate in rates:
+        print(f"  {name:28s} {rate:10,.0f} req/s")
+    if not msgpack_available():
+        print("  (cài msgpack để đo thêm frame MessagePack)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Kiểm thử tải HTTP cho API ví
+Gửi /api/wallet/generate, /sign, /verify theo tỉ lệ trộn với số kết nối đồng thời cố định
+(vòng kín: mỗi worker gửi yêu cầu kế tiếp ngay khi nhận phản hồi), tới API chạy trong cùng
+tiến trình hoặc một URL; báo throughput, độ trễ p50/p95/p99 và tỉ lệ lỗi dạng JSON,
+kèm profile gộp phía máy chủ khi dùng --profile-rate
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import httpx
+
+from wallet_bench import percentile
+from wallet_core import WalletCore
+
+ROUTES = {
+    "generate": "/api/wallet/generate",
+    "sign": "/api/wallet/sign",
+    "verify": "/api/wallet/verify",
+}
+DEFAULT_MIX = "generate=1,sign=4,verify=5"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Tỉ lệ trộn từ "generate=1,sign=4,verify=5" (trọng số tương đối)"""
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        op, _, weight = part.partition("=")
+        op = op.strip()
+        if op not in ROUTES:
+            raise ValueError(f"op không hỗ trợ: {op} (hỗ trợ {', '.join(ROUTES)})")
+        mix[op] = float(weight or 1)
+    if not mix or any(weight < 0 for weight in mix.values()) or not sum(mix.values()):
+        raise ValueError(f"Tỉ lệ trộn không hợp lệ: {text}")
+    return {op: weight for op, weight in mix.items() if weight}
+
+
+def start_server(profiling: bool) -> tuple:
+    """Chạy API bằng uvicorn trong thread riêng trên cổng trống, trả (server, URL)"""
+    if profiling:
+        os.environ.setdefault("WALLET_PROFILING", "1")
+    import uvicorn
+    from app import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def make_payloads(count: int) -> Dict[str, List[dict]]:
+    """Payload dựng sẵn cho mỗi op (ký/xác thực dùng một khóa, thông điệp khác nhau)"""
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    signs, verifies = [], []
+    for i in range(count):
+        message = f"Kiểm thử tải #{i}"
+        signs.append({"message": message, "private_key": private_key})
+        signature = wallet.sign_message(message, private_key)["signature"]
+        verifies.append({"message": message, "signature": signature, "address": address})
+    return {"generate": [None], "sign": signs, "verify": verifies}
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> dict:
+    """Thống kê một nhóm yêu cầu; lỗi là mọi status ≥ 400 hoặc lỗi kết nối"""
+    requests = sum(statuses.values())
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400)
+    latencies = sorted(latencies)
+    summary = {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(requests / elapsed, 2),
+    }
+    if latencies:
+        summary.update({
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3),
+        })
+    return summary
+
+
+async def run_load(
+    url: str,
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    max_requests: int,
+    warmup: float,
+    profile_rate: float,
+    seed: int,
+) -> dict:
+    payloads = make_payloads(256)
+    ops, weights = list(mix), list(mix.values())
+    samples = {op: ([], {}) for op in ops}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    sent = 0
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        async def worker(index: int, deadline: float, record: bool):
+            nonlocal sent
+            rng = random.Random(seed * 1000 + index)
+            while time.perf_counter() < deadline and (not record or not max_requests or sent < max_requests):
+                op = rng.choices(ops, weights)[0]
+                payload = rng.choice(payloads[op])
+                headers = {"X-Wallet-Profile": "1"} if record and rng.random() < profile_rate else None
+                if record:
+                    sent += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.post(ROUTES[op], json=payload, headers=headers)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if record:
+                    latencies, statuses = samples[op]
+                    latencies.append(time.perf_counter() - start)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(i, deadline, False) for i in range(concurrency)))
+        if profile_rate > 0:
+            # Bỏ profile của lần chạy trước/khởi động nóng (404 nếu máy chủ chưa bật profiling)
+            await client.post("/api/admin/profile", json={"reset": True})
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i, start + duration, True) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "target": url,
+            "concurrency": concurrency,
+            "duration_s": round(elapsed, 3),
+            "mix": mix,
+            "total": summarize(
+                [latency for latencies, _ in samples.values() for latency in latencies],
+                {status: sum(statuses.get(status, 0) for _, statuses in samples.values())
+                 for status in {s for _, statuses in samples.values() for s in statuses}},
+                elapsed,
+            ),
+            "ops": {op: summarize(latencies, statuses, elapsed) for op, (latencies, statuses) in samples.items()},
+        }
+        if profile_rate > 0:
+            response = await client.get("/api/admin/profile", params={"limit": 25})
+            report["profile"] = response.json() if response.status_code == 200 else {
+                "error": f"{response.status_code}: {response.text}"
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kiểm thử tải HTTP cho API ví (generate/sign/verify)")
+    parser.add_argument('--url', help='URL API đang chạy (mặc định: chạy API trong tiến trình này)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Số yêu cầu đồng thời (vòng kín)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Thời gian đo (giây)')
+    parser.add_argument('--requests', type=int, default=0, help='Dừng sau số yêu cầu này (0 = theo thời gian)')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Thời gian khởi động nóng không tính (giây)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Tỉ lệ trộn op=trọng số (mặc định {DEFAULT_MIX})')
+    parser.add_argument('--profile-rate', type=float, default=0.0,
+                        help='Tỉ lệ yêu cầu gửi kèm X-Wallet-Profile; máy chủ cần WALLET_PROFILING=1 '
+                             '(tự bật khi chạy trong tiến trình)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed chọn op/payload')
+    parser.add_argument('--json', dest='json_out', help='Ghi kết quả JSON ra file ("-" cho stdout)')
+    parser.add_argument('--max-error-rate', type=float,
+                        help='Thoát mã 1 nếu tỉ lệ lỗi tổng vượt ngưỡng này (%%)')
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if not 0.0 <= args.profile_rate <= 1.0:
+        parser.error("--profile-rate phải nằm trong [0, 1]")
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server(args.profile_rate > 0)
+    try:
+        report = asyncio.run(run_load(
+            url.rstrip("/"), mix, args.concurrency, args.duration, args.requests,
+            args.warmup, args.profile_rate, args.seed,
+        ))
+    finally:
+        if server is not None:
+            server.should_exit = True
+    report["in_process"] = server is not None
+
+    if args.json_out != "-":
+        for name, summary in [("tổng", report["total"]), *report["ops"].items()]:
+            print(f"{name:<10} {summary['throughput_rps']:>10,.1f} req/s  "
+                  f"p50 {summary.get('p50_ms', 0):>8,.2f}ms  p95 {summary.get('p95_ms', 0):>8,.2f}ms  "
+                  f"p99 {summary.get('p99_ms', 0):>8,.2f}ms  lỗi {summary['error_rate'] * 100:.2f}%")
+        for function in report.get("profile", {}).get("functions", [])[:10]:
+            print(f"  {function['cumtime']:>10.3f}s  {function['calls']:>8}  {function['function']} "
+                  f"({Path(function['file']).name}:{function['line']})")
+    if args.json_out == "-":
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    elif args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    error_rate = report["total"]["error_rate"] * 100
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        print(f"\n✗ Tỉ lệ lỗi {error_rate:.2f}% vượt ngưỡng {args.max_error_rate}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Bộ benchmark cho các thao tác WalletCore
+Đo ops/giây và độ trễ p50/p95/p99, xuất JSON và so sánh với baseline đã lưu
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Thêm backend vào path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from wallet_core import WalletCore
+from ec_backend import available_backends
+from fixed_base import WINDOW_ENV_VAR
+
+DEFAULT_SIZES = (32, 1024, 65536)
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Phân vị theo nội suy tuyến tính trên mẫu đã sắp xếp"""
+    if len(sorted_samples) == 1:
+        return sorted_samples[0]
+    position = (len(sorted_samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    weight = position - lower
+    return sorted_samples[lower] * (1 - weight) + sorted_samples[upper] * weight
+
+
+def run_case(fn: Callable[[], object], min_time: float, max_iterations: int, warmup: int) -> Dict[str, float]:
+    """Chạy một thao tác đến khi đủ thời gian hoặc số lần, trả ops/giây và độ trễ (µs)"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    while len(samples) < max_iterations:
+        t0 = clock()
+        fn()
+        samples.append(clock() - t0)
+        if clock() - start >= min_time:
+            break
+    total = clock() - start
+
+    samples.sort()
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / total, 2),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(percentile(samples, 0.50) * 1e6, 2),
+        "p95_us": round(percentile(samples, 0.95) * 1e6, 2),
+        "p99_us": round(percentile(samples, 0.99) * 1e6, 2),
+    }
+
+
+def build_cases(wallet: WalletCore, sizes) -> Dict[str, Callable[[], object]]:
+    """Danh sách thao tác cần đo, đặt tên ổn định để so sánh với baseline"""
+    private_key, public_key, _ = wallet.generate_keypair()
+    # Bản không cache để đo chi phí parse khóa + dẫn xuất địa chỉ thực sự
+    cold_wallet = WalletCore(key_cache_size=0, ec_backend=wallet.backend.name)
+    cases = {
+        "generate_keypair": wallet.generate_keypair,
+        "private_key_to_address": lambda: wallet.private_key_to_address(private_key),
+        "private_key_to_address[cold]": lambda: cold_wallet.private_key_to_address(private_key),
+    }
+    for size in sizes:
+        message = "x" * size
+        signature = wallet.sign_message(message, private_key)["signature"]
+        cases[f"_hash_message[personal,{size}B]"] = lambda m=message: wallet._hash_message(m, True)
+        cases[f"_hash_message[raw,{size}B]"] = lambda m=message: wallet._hash_message(m, False)
+        cases[f"sign_message[personal,{size}B]"] = lambda m=message: wallet.sign_message(m, private_key, True)
+        cases[f"sign_message[raw,{size}B]"] = lambda m=message: wallet.sign_message(m, private_key, False)
+        cases[f"verify_signature[{size}B]"] = lambda m=message, s=signature: wallet.verify_signature(m, s)
+        cases[f"verify_signature_with_public_key[{size}B]"] = (
+            lambda m=message, s=signature: wallet.verify_signature_with_public_key(m, s, public_key)
+        )
+    return cases
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Trả về danh sách thao tác có ops/giây giảm quá ngưỡng so với baseline"""
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        change = (current["ops_per_sec"] - base["ops_per_sec"]) / base["ops_per_sec"]
+        current["baseline_ops_per_sec"] = base["ops_per_sec"]
+        current["change_pct"] = round(change * 100, 1)
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các thao tác WalletCore")
+    parser.add_argument('--backend', choices=available_backends(), help='EC backend (mặc định: tự chọn)')
+    parser.add_argument('--window', type=int,
+                        help='Độ rộng cửa sổ bảng fixed-base cho backend python (0 = tắt; mặc định WALLET_EC_WINDOW hoặc 8)')
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help='Kích thước thông điệp (byte), phân tách bằng dấu phẩy')
+    parser.add_argument('--filter', help='Chỉ chạy thao tác có tên chứa chuỗi này')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Thời gian đo tối thiểu mỗi thao tác (giây)')
+    parser.add_argument('--max-iterations', type=int, default=20000, help='Số lần tối đa mỗi thao tác')
+    parser.add_argument('--warmup', type=int, default=3, help='Số lần chạy khởi động không tính')
+    parser.add_argument('--json', dest='json_out', help='Ghi kết quả JSON ra file ("-" cho stdout)')
+    parser.add_argument('--baseline', help='File JSON baseline để so sánh')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Mức giảm ops/giây tối đa cho phép so với baseline (%%)')
+    args = parser.parse_args()
+
+    if args.window is not None:
+        os.environ[WINDOW_ENV_VAR] = str(args.window)
+    wallet = WalletCore(ec_backend=args.backend)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    cases = build_cases(wallet, sizes)
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+
+    results = {}
+    for name, fn in cases.items():
+        results[name] = run_case(fn, args.min_time, args.max_iterations, args.warmup)
+        if args.json_out != "-":
+            r = results[name]
+            print(f"{name:<48} {r['ops_per_sec']:>12,.1f} ops/s  "
+                  f"p50 {r['p50_us']:>10,.1f}µs  p95 {r['p95_us']:>10,.1f}µs  p99 {r['p99_us']:>10,.1f}µs")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("backend") != wallet.backend.name:
+            print(f"⚠️  Baseline đo trên backend '{baseline.get('backend')}', "
+                  f"lần chạy này dùng '{wallet.backend.name}'", file=sys.stderr)
+        elif baseline.get("window") != getattr(wallet.backend, "window", None):
+            print(f"⚠️  Baseline đo với cửa sổ fixed-base {baseline.get('window')}, "
+                  f"lần chạy này dùng {getattr(wallet.backend, 'window', None)}", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold / 100)
+
+    report = {
+        "backend": wallet.backend.name,
+        "window": getattr(wallet.backend, "window", None),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.json_out == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"\n✗ Hồi quy hiệu năng vượt {args.threshold}%: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+    if args.baseline:
+        print(f"\n✓ Không có hồi quy vượt {args.threshold}% so với baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,40 @@ Giao diện dòng lệnh cho các thao tác ví
 """
 import sys
 import argparse
+import gzip
+import io
 import json
+import os
+import time
 from pathlib import Path
 
 # Thêm thư mục cha vào path để import wallet_core
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
-from wallet_core import WalletCore  # type: ignore
+# wallet_core (eth_keys, eth_utils) chỉ được import trong lệnh cần dùng,
+# để `--help` và lỗi tham số trả về ngay
+
+
+def _wallet_core():
+    """WalletCore chạy tại chỗ"""
+    from wallet_core import WalletCore  # type: ignore
+    
+    return WalletCore()
+
+
+def _wallet():
+    """Proxy tới daemon nếu đang chạy, ngược lại WalletCore tại chỗ"""
+    import wallet_daemon  # type: ignore
+    
+    client = wallet_daemon.connect()
+    if client is not None:
+        return wallet_daemon.WalletProxy(client)
+    return _wallet_core()
 
 
 def generate_wallet():
     """Tạo ví mới"""
-    wallet = WalletCore()
+    wallet = _wallet_core()
     private_key, public_key, address = wallet.generate_keypair()
     
     print("\n" + "="*60)
@@ -32,28 +54,246 @@ def generate_wallet():
     # Tùy chọn lưu ra file
     save = input("Lưu ví ra file? (y/n): ").strip().lower()
     if save == 'y':
-        filename = input("Tên file (mặc định: wallet.json): ").strip() or "wallet.json"
-        wallet_data = {
-            "private_key": private_key,
-            "public_key": public_key,
-            "address": address
-        }
-        with open(filename, 'w') as f:
-            json.dump(wallet_data, f, indent=2)
+        encrypt = input("Mã hóa bằng mật khẩu (keystore V3)? (Y/n): ").strip().lower() != 'n'
+        if encrypt:
+            filename = input("Tên file (mặc định: keystore.json): ").strip() or "keystore.json"
+            wallet_data = wallet.create_keystore(private_key, _read_password(confirm=True))
+        else:
+            filename = input("Tên file (mặc định: wallet.json): ").strip() or "wallet.json"
+            wallet_data = {
+                "private_key": private_key,
+                "public_key": public_key,
+                "address": address
+            }
+        _write_private_json(filename, wallet_data)
         print(f"Đã lưu ví vào {filename}\n")
 
 
-def sign_message(message: str, private_key: str = None, personal: bool = True):
-    """Ký thông điệp"""
-    wallet = WalletCore()
+def _read_password(confirm: bool = False) -> str:
+    """Đọc mật khẩu keystore từ WALLET_KEYSTORE_PASSWORD hoặc hỏi (không hiện ký tự)"""
+    import getpass
     
-    # Nếu chưa nhập khóa riêng, thử đọc từ file
+    password = os.environ.get("WALLET_KEYSTORE_PASSWORD")
+    if password is not None:
+        return password
+    password = getpass.getpass("Mật khẩu keystore: ")
+    if confirm and getpass.getpass("Nhập lại mật khẩu: ") != password:
+        print("✗ Mật khẩu không khớp", file=sys.stderr)
+        sys.exit(1)
+    return password
+
+
+def _write_private_json(path: str, data: dict):
+    """Ghi JSON chứa khóa (thô hoặc đã mã hóa) với quyền 0600"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def _unlock_keystore(wallet, keystore: dict, ttl: float = None):
+    """
+    Mở khóa keystore V3 (chạy KDF một lần).
+    
+    Returns:
+        tuple: (địa chỉ, True nếu phiên mới mở cần khóa lại sau khi ký)
+    """
+    unlocked = {session["address"] for session in wallet.unlocked_sessions()}
+    if ttl is None:
+        address = wallet.unlock_keystore(keystore, _read_password())
+    else:
+        address = wallet.unlock_keystore(keystore, _read_password(), ttl)
+    return address, address not in unlocked
+
+
+def _read_keystore_file(path: str) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def keystore_create(out: str, private_key: str = None, kdf: str = 'scrypt'):
+    """Tạo file keystore V3 từ khóa riêng có sẵn hoặc khóa mới sinh"""
+    wallet = _wallet_core()
     if not private_key:
+        private_key, _, _ = wallet.generate_keypair()
+    try:
+        keystore = wallet.create_keystore(private_key, _read_password(confirm=True), kdf)
+    except ValueError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    _write_private_json(out, keystore)
+    print(f"✓ Đã ghi keystore cho {wallet.private_key_to_address(private_key)} vào {out}")
+
+
+def _open_output(path: str, compress: bool):
+    """Mở file đầu ra ghi văn bản có bộ đệm lớn, quyền 0600 vì chứa khóa riêng"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    raw = os.fdopen(fd, 'wb')
+    if compress:
+        raw = gzip.GzipFile(fileobj=raw, mode='wb')
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=1 << 20), encoding='utf-8', newline='')
+
+
+def generate_bulk(count: int, out: str, output_format: str = None, compress: bool = False,
+                  workers: int = None, chunk_size: int = 1000):
+    """Sinh hàng loạt ví song song và ghi dạng luồng ra file NDJSON/CSV"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from parallel import default_workers, generate_chunk, ordered_imap  # type: ignore
+    
+    compress = compress or out.endswith('.gz')
+    if output_format is None:
+        base = out[:-3] if out.endswith('.gz') else out
+        output_format = 'csv' if base.endswith('.csv') else 'ndjson'
+    workers = workers or default_workers()
+    
+    # Chia số lượng thành các lô; worker định dạng sẵn để tiến trình chính chỉ việc ghi
+    tasks = (
+        (min(chunk_size, count - offset), output_format)
+        for offset in range(0, count, chunk_size)
+    )
+    
+    written = 0
+    start = time.perf_counter()
+    with _open_output(out, compress) as f, ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        if output_format == 'csv':
+            f.write("private_key,public_key,address\n")
+        for block in ordered_imap(pool, generate_chunk, tasks, max_pending=workers * 2):
+            f.write(block)
+            written += block.count("\n")
+            elapsed = time.perf_counter() - start
+            print(f"\r  {written:,}/{count:,} ví | {written / elapsed:,.0f} ví/giây   ",
+                  end="", file=sys.stderr, flush=True)
+    
+    elapsed = time.perf_counter() - start
+    print(f"\nĐã ghi {written:,} ví vào {out} trong {elapsed:.1f} giây "
+          f"({written / elapsed:,.0f} ví/giây, {workers} worker)")
+    print("⚠️  CẢNH BÁO: File chứa khóa riêng dạng rõ, hãy bảo mật!\n")
+
+
+def _read_seed(seed_hex: str = None) -> bytes:
+    """Seed HD từ --seed, hoặc từ cụm từ BIP-39 trong WALLET_MNEMONIC (hỏi nếu không có)"""
+    import getpass
+    from hd import mnemonic_to_seed  # type: ignore
+    
+    if seed_hex:
+        return bytes.fromhex(seed_hex[2:] if seed_hex.startswith('0x') else seed_hex)
+    mnemonic = os.environ.get("WALLET_MNEMONIC")
+    if mnemonic is None:
+        mnemonic = getpass.getpass("Cụm từ ghi nhớ BIP-39: ")
+    return mnemonic_to_seed(mnemonic, os.environ.get("WALLET_MNEMONIC_PASSPHRASE", ""))
+
+
+def derive_addresses(path: str, index_range: str = None, out: str = None, output_format: str = None,
+                     compress: bool = False, workers: int = None, chunk_size: int = 1000,
+                     include_private_key: bool = False, seed_hex: str = None):
+    """
+    Dẫn xuất địa chỉ HD (BIP-32/44).
+    
+    Không có `index_range`: `path` là đường dẫn đầy đủ của một khóa. Có `index_range`:
+    `path` là nút cha, dải chỉ số được chia lô cho nhiều tiến trình và ghi dạng luồng.
+    """
+    from hd import parse_range  # type: ignore
+    from parallel import default_workers, derive_chunk, derive_items, derive_tasks, ordered_imap  # type: ignore
+    
+    try:
+        seed = _read_seed(seed_hex)
+        if index_range is None:
+            private_key, public_key, address = _wallet_core().derive_raw_keypair(seed, path).to_tuple()
+            print(f"Đường dẫn:   {path}")
+            print(f"Địa chỉ:     {address}")
+            print(f"Khóa công:   {public_key}")
+            if include_private_key:
+                print(f"Khóa riêng:  {private_key}")
+            return
+        indices = parse_range(index_range)
+    except ValueError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if out:
+        compress = compress or out.endswith('.gz')
+        if output_format is None:
+            base = out[:-3] if out.endswith('.gz') else out
+            output_format = 'csv' if base.endswith('.csv') else 'ndjson'
+    output_format = output_format or 'ndjson'
+    workers = workers or default_workers()
+    tasks = derive_tasks(seed, path, indices, output_format, include_private_key, chunk_size)
+    
+    written = 0
+    start = time.perf_counter()
+    f = _open_output(out, compress) if out else sys.stdout
+    try:
+        if output_format == 'csv':
+            f.write("index,path,address,public_key" + (",private_key\n" if include_private_key else "\n"))
+        if len(indices) <= chunk_size or workers == 1:
+            # Dải nhỏ: dẫn xuất tại chỗ, không tốn thời gian khởi động process pool
+            core = _wallet_core()
+            blocks = (derive_items(core, task) for task in tasks)
+            pool = None
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            blocks = ordered_imap(pool, derive_chunk, tasks, max_pending=workers * 2)
+        try:
+            for block in blocks:
+                f.write(block)
+                written += block.count("\n")
+                if out:
+                    elapsed = time.perf_counter() - start
+                    print(f"\r  {written:,}/{len(indices):,} địa chỉ | {written / elapsed:,.0f} địa chỉ/giây   ",
+                          end="", file=sys.stderr, flush=True)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        if out:
+            f.close()
+    
+    if out:
+        elapsed = time.perf_counter() - start
+        print(f"\nĐã ghi {written:,} địa chỉ vào {out} trong {elapsed:.1f} giây "
+              f"({written / elapsed:,.0f} địa chỉ/giây)", file=sys.stderr)
+        if include_private_key:
+            print("⚠️  CẢNH BÁO: File chứa khóa riêng dạng rõ, hãy bảo mật!\n", file=sys.stderr)
+
+
+def _read_typed_data(path: str) -> dict:
+    """Đọc typed data EIP-712 {types, primaryType, domain, message} từ file JSON"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Lỗi đọc typed data: {e}\n")
+        sys.exit(1)
+
+
+def sign_message(message: str, private_key: str = None, personal: bool = True, file_path: str = None,
+                 keystore_path: str = None, address: str = None, typed_data_path: str = None):
+    """Ký thông điệp, nội dung file (băm dạng luồng qua mmap) hoặc typed data EIP-712, qua daemon nếu đang chạy"""
+    wallet = _wallet()
+    keystore = None
+    typed_data = _read_typed_data(typed_data_path) if typed_data_path else None
+    
+    # Nếu chưa nhập khóa riêng hay địa chỉ đã mở khóa, thử đọc từ file (ví thô hoặc keystore V3)
+    if keystore_path:
+        try:
+            keystore = _read_keystore_file(keystore_path)
+        except Exception as e:
+            print(f"Lỗi đọc keystore: {e}\n")
+            sys.exit(1)
+    elif not private_key and not address:
         wallet_file = input("Nhập đường dẫn file ví (Enter để nhập thủ công): ").strip()
         if wallet_file:
             try:
                 with open(wallet_file, 'r') as f:
                     wallet_data = json.load(f)
+                if 'crypto' in wallet_data or 'Crypto' in wallet_data:
+                    keystore = wallet_data
+                else:
                     private_key = wallet_data.get('private_key')
             except Exception as e:
                 print(f"Lỗi đọc file ví: {e}")
@@ -61,13 +301,46 @@ def sign_message(message: str, private_key: str = None, personal: bool = True):
         else:
             private_key = input("Nhập khóa riêng: ").strip()
     
+    # Phiên mở khóa chỉ cho lần ký này thì khóa lại ngay, kể cả khi chạy trong daemon
+    relock = False
+    if keystore is not None:
+        try:
+            address, relock = _unlock_keystore(wallet, keystore)
+        except Exception as e:
+            print(f"Lỗi mở khóa keystore: {e}\n")
+            sys.exit(1)
+    
     try:
-        result = wallet.sign_message(message, private_key, personal)
+        try:
+            if file_path:
+                # Daemon có thể chạy ở thư mục khác nên gửi đường dẫn tuyệt đối
+                file_hash = wallet.hash_file(os.path.abspath(file_path), personal)
+                if address:
+                    result = wallet.sign_message_hash_with_address(file_hash, address)
+                else:
+                    result = wallet.sign_message_hash(file_hash, private_key)
+            elif typed_data is not None:
+                if address:
+                    result = wallet.sign_typed_data_with_address(typed_data, address)
+                else:
+                    result = wallet.sign_typed_data(typed_data, private_key)
+            elif address:
+                result = wallet.sign_message_with_address(message, address, personal)
+            else:
+                result = wallet.sign_message(message, private_key, personal)
+        finally:
+            if relock:
+                wallet.lock(address)
         
         print("\n" + "="*60)
         print("ĐÃ KÝ THÔNG ĐIỆP")
         print("="*60)
-        print(f"Thông điệp: {message}")
+        if file_path:
+            print(f"File:       {file_path} ({os.path.getsize(file_path):,} byte)")
+        elif typed_data is not None:
+            print(f"EIP-712:    {typed_data.get('primaryType')} ({typed_data_path})")
+        else:
+            print(f"Thông điệp: {message}")
         print(f"Địa chỉ:    {result['address']}")
         print(f"Hash:       {result['message_hash']}")
         print(f"r:          {result['r']}")
@@ -81,10 +354,17 @@ def sign_message(message: str, private_key: str = None, personal: bool = True):
         if save == 'y':
             filename = input("Tên file (mặc định: signature.json): ").strip() or "signature.json"
             signature_data = {
-                "message": message,
                 "signature": result["signature"],
                 "address": result["address"]
             }
+            if file_path:
+                signature_data["file"] = file_path
+                signature_data["message_hash"] = result["message_hash"]
+            elif typed_data is not None:
+                signature_data["typed_data"] = typed_data
+                signature_data["message_hash"] = result["message_hash"]
+            else:
+                signature_data["message"] = message
             with open(filename, 'w') as f:
                 json.dump(signature_data, f, indent=2)
             print(f"Đã lưu chữ ký vào {filename}\n")
@@ -93,14 +373,31 @@ def sign_message(message: str, private_key: str = None, personal: bool = True):
         sys.exit(1)
 
 
-def verify_signature(message: str, signature: str, address: str = None, public_key: str = None, personal: bool = True):
-    """Xác thực chữ ký"""
-    wallet = WalletCore()
+def verify_signature(message: str, signature: str, address: str = None, public_key: str = None, personal: bool = True,
+                     strict: bool = False, require_low_s: bool = False, file_path: str = None,
+                     allowlist_path: str = None, typed_data_path: str = None):
+    """Xác thực chữ ký trên thông điệp, nội dung file hoặc typed data EIP-712, tùy chọn đối chiếu allowlist"""
+    wallet = _wallet()
+    
+    if typed_data_path:
+        typed_data = _read_typed_data(typed_data_path)
+        message = f"[EIP-712 {typed_data.get('primaryType')}] {typed_data_path}"
+        recover = lambda: wallet.verify_typed_data(typed_data, signature, strict, require_low_s)  # noqa: E731
+        with_public_key = lambda: wallet.verify_typed_data_with_public_key(typed_data, signature, public_key)  # noqa: E731
+    elif file_path:
+        file_hash = wallet.hash_file(os.path.abspath(file_path), personal)
+        message = f"[file] {file_path}"
+        recover = lambda: wallet.verify_message_hash(file_hash, signature, strict, require_low_s)  # noqa: E731
+        with_public_key = lambda: wallet.verify_message_hash_with_public_key(file_hash, signature, public_key)  # noqa: E731
+    else:
+        recover = lambda: wallet.verify_signature(message, signature, personal, strict, require_low_s)  # noqa: E731
+        with_public_key = lambda: wallet.verify_signature_with_public_key(message, signature, public_key, personal)  # noqa: E731
     
     if address:
-        is_valid, recovered_address, message_hash = wallet.verify_signature(message, signature, personal)
-        normalized_expected = address.lower() if address else None
-        match_expected = recovered_address.lower() == normalized_expected if recovered_address and normalized_expected else False
+        from results import address_matches  # type: ignore
+        
+        is_valid, recovered_address, message_hash = recover()
+        match_expected = address_matches(recovered_address, address)
         print("\n" + "="*60)
         print("KIỂM TRA CHỮ KÝ")
         print("="*60)
@@ -109,10 +406,9 @@ def verify_signature(message: str, signature: str, address: str = None, public_k
         print(f"Địa chỉ khôi phục: {recovered_address}")
         print(f"Hash: {message_hash}")
         print(f"Chữ ký:     {signature}")
-        print(f"Kết quả: {'✓ HỢP LỆ' if is_valid and match_expected else '✗ KHÔNG HỢP LỆ'}")
-        print("="*60 + "\n")
+        is_valid = is_valid and match_expected
     elif public_key:
-        is_valid, recovered_address, message_hash = wallet.verify_signature_with_public_key(message, signature, public_key, personal)
+        is_valid, recovered_address, message_hash = with_public_key()
         print("\n" + "="*60)
         print("KIỂM TRA CHỮ KÝ")
         print("="*60)
@@ -121,10 +417,8 @@ def verify_signature(message: str, signature: str, address: str = None, public_k
         print(f"Hash:              {message_hash}")
         print(f"Chữ ký:            {signature}")
         print(f"Địa chỉ khôi phục: {recovered_address}")
-        print(f"Kết quả: {'✓ HỢP LỆ' if is_valid else '✗ KHÔNG HỢP LỆ'}")
-        print("="*60 + "\n")
     else:
-        is_valid, recovered_address, message_hash = wallet.verify_signature(message, signature, personal)
+        is_valid, recovered_address, message_hash = recover()
         print("\n" + "="*60)
         print("KIỂM TRA CHỮ KÝ")
         print("="*60)
@@ -132,8 +426,476 @@ def verify_signature(message: str, signature: str, address: str = None, public_k
         print(f"Hash:       {message_hash}")
         print(f"Địa chỉ khôi phục: {recovered_address}")
         print(f"Chữ ký:     {signature}")
-        print(f"Kết quả: {'✓ HỢP LỆ' if is_valid else '✗ KHÔNG HỢP LỆ'}")
-        print("="*60 + "\n")
+    
+    if allowlist_path:
+        from allowlist import Allowlist  # type: ignore
+        
+        allowlisted = bool(recovered_address) and recovered_address in Allowlist(allowlist_path)
+        print(f"Allowlist:  {'✓ có trong' if allowlisted else '✗ không có trong'} {allowlist_path}")
+        is_valid = is_valid and allowlisted
+    print(f"Kết quả: {'✓ HỢP LỆ' if is_valid else '✗ KHÔNG HỢP LỆ'}")
+    print("="*60 + "\n")
+
+
+def _read_records(path: str):
+    """Đọc bản ghi JSONL/CSV (có thể nén .gz) dạng luồng: (số dòng, bản ghi, lỗi)"""
+    import csv
+    
+    opener = gzip.open if path.endswith('.gz') else open
+    base = path[:-3] if path.endswith('.gz') else path
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        if base.endswith('.csv'):
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record, None
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_number, None, f"JSON không hợp lệ: {e}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, None, "Bản ghi phải là JSON object"
+                    continue
+                yield line_number, record, None
+
+
+def verify_file(path: str, out: str = None, workers: int = None, chunk_size: int = 500):
+    """Xác thực hàng loạt chữ ký từ file JSONL/CSV trên nhiều tiến trình"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from parallel import chunked, default_workers, ordered_imap, verify_chunk  # type: ignore
+    
+    workers = workers or default_workers()
+    total = valid = invalid = errors = 0
+    start = time.perf_counter()
+    output = open(out, 'w', encoding='utf-8', buffering=1 << 20) if out else sys.stdout
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            # Đọc theo lô có giới hạn nên file nhiều GB không bị nạp hết vào bộ nhớ
+            chunks = chunked(_read_records(path), chunk_size)
+            for results in ordered_imap(pool, verify_chunk, chunks, max_pending=workers * 2):
+                for result in results:
+                    total += 1
+                    if "error" in result:
+                        errors += 1
+                    elif result["valid"]:
+                        valid += 1
+                    else:
+                        invalid += 1
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                if out:
+                    elapsed = time.perf_counter() - start
+                    print(f"\r  {total:,} bản ghi | {total / elapsed:,.0f} bản ghi/giây   ",
+                          end="", file=sys.stderr, flush=True)
+    finally:
+        if out:
+            output.close()
+        else:
+            output.flush()
+    
+    elapsed = time.perf_counter() - start
+    summary = {
+        "total": total,
+        "valid": valid,
+        "invalid": invalid,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+        "workers": workers,
+    }
+    print(("\n" if out else "") + json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    if invalid or errors:
+        sys.exit(2)
+
+
+def _read_sender_key(private_key: str = None, keystore_path: str = None, prompt: str = "Khóa riêng người gửi: ") -> bytes:
+    """Khóa riêng người gửi từ --from-key, keystore V3 (giải mã một lần) hoặc hỏi (không hiện ký tự)"""
+    import getpass
+    
+    if keystore_path:
+        from keystore import decrypt_keystore  # type: ignore
+        
+        return decrypt_keystore(_read_keystore_file(keystore_path), _read_password())
+    if not private_key:
+        private_key = getpass.getpass(prompt).strip()
+    return bytes.fromhex(private_key[2:] if private_key.startswith('0x') else private_key)
+
+
+def sign_transactions(input_path: str, start_nonce: int, fee_fields: dict, private_key: str = None,
+                      keystore_path: str = None, out: str = None, output_format: str = None,
+                      compress: bool = False, workers: int = None, chunk_size: int = 1000):
+    """
+    Ký hàng loạt giao dịch chi trả từ file CSV/JSONL {to, value, data?} cùng một người gửi.
+    
+    Toàn bộ file được kiểm tra trước khi ký, nên mục hỏng không để lại lỗ nonce; nonce
+    tăng dần từ `start_nonce` theo thứ tự dòng. Giao dịch đã ký được ghi dạng luồng đúng thứ tự.
+    """
+    from parallel import default_workers, ordered_imap, sign_tx_chunk, sign_tx_items, sign_tx_tasks  # type: ignore
+    from transactions import payment_from_dict, template_from_dict  # type: ignore
+    
+    try:
+        template = template_from_dict(fee_fields)
+        key = _read_sender_key(private_key, keystore_path)
+        core = _wallet_core()
+        sender = core.private_key_to_address(key.hex())
+        payments = []
+        for line, record, error in _read_records(input_path):
+            try:
+                if error is not None:
+                    raise ValueError(error)
+                payments.append(payment_from_dict(record))
+            except ValueError as e:
+                raise ValueError(f"Dòng {line}: {e}") from None
+    except Exception as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if out:
+        compress = compress or out.endswith('.gz')
+        if output_format is None:
+            base = out[:-3] if out.endswith('.gz') else out
+            output_format = 'csv' if base.endswith('.csv') else 'ndjson'
+    output_format = output_format or 'ndjson'
+    workers = workers or default_workers()
+    tasks = sign_tx_tasks(template, key, payments, start_nonce, output_format, chunk_size)
+    
+    written = 0
+    start = time.perf_counter()
+    f = _open_output(out, compress) if out else sys.stdout
+    try:
+        if output_format == 'csv':
+            f.write("index,nonce,from,to,value,hash,raw_transaction\n")
+        if len(payments) <= chunk_size or workers == 1:
+            blocks = (sign_tx_items(core, task) for task in tasks)
+            pool = None
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            blocks = ordered_imap(pool, sign_tx_chunk, tasks, max_pending=workers * 2)
+        try:
+            for block in blocks:
+                f.write(block)
+                written += block.count("\n")
+                if out:
+                    elapsed = time.perf_counter() - start
+                    print(f"\r  {written:,}/{len(payments):,} giao dịch | {written / elapsed:,.0f} giao dịch/giây   ",
+                          end="", file=sys.stderr, flush=True)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        if out:
+            f.close()
+    
+    if out:
+        elapsed = time.perf_counter() - start
+        last_nonce = f", nonce {start_nonce}..{start_nonce + written - 1}" if written else ""
+        print(f"\nĐã ký {written:,} giao dịch từ {sender}{last_nonce} vào {out} trong {elapsed:.1f} giây "
+              f"({written / elapsed:,.0f} giao dịch/giây)", file=sys.stderr)
+
+
+def _read_messages(path: str):
+    """Thông điệp (trường `message`) từ file JSONL/CSV dạng luồng; ValueError kèm số dòng ở bản ghi hỏng"""
+    for line, record, error in _read_records(path):
+        if error is None and not isinstance(record.get("message"), str):
+            error = "Thiếu trường message"
+        if error is not None:
+            raise ValueError(f"Dòng {line}: {error}")
+        yield record["message"]
+
+
+def attest_messages(input_path: str, private_key: str = None, keystore_path: str = None, out: str = None,
+                    personal: bool = True, compress: bool = False):
+    """
+    Ký lô thông điệp từ file JSONL/CSV (trường `message`) bằng một chữ ký trên gốc cây Merkle.
+    
+    File được đọc hai lượt: lượt đầu băm dần vào cây (khoảng 64 byte mỗi thông điệp, không giữ
+    nội dung), lượt sau ghi từng thông điệp kèm bằng chứng; mỗi dòng NDJSON tự xác thực được
+    bằng `verify-attest`.
+    """
+    try:
+        key = _read_sender_key(private_key, keystore_path, "Khóa riêng người ký: ")
+        core = _wallet_core()
+        start = time.perf_counter()
+        message_hashes = (core.hash_message(message, personal) for message in _read_messages(input_path))
+        attestation = core.attest_hashes_bytes(message_hashes, key)
+    except Exception as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    f = _open_output(out, compress or out.endswith('.gz')) if out else sys.stdout
+    try:
+        for message, proof in zip(_read_messages(input_path), attestation.proofs()):
+            record = {"message": message, **proof.to_dict()}
+            if not personal:
+                record["personal"] = False
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            f.close()
+    
+    elapsed = time.perf_counter() - start
+    summary = {
+        "root": f"0x{attestation.root.hex()}",
+        "signature": f"0x{attestation.signature.hex()}",
+        "address": core.private_key_to_address(key.hex()),
+        "count": len(attestation),
+        "seconds": round(elapsed, 3),
+    }
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+
+
+def verify_attestations(path: str, out: str = None, address: str = None, require_low_s: bool = False):
+    """
+    Xác thực các bản ghi bằng chứng lô {message, index, count, proof, root, signature} (đầu ra của `attest`).
+    
+    Chạy trong một tiến trình: mỗi bản ghi chỉ tốn vài phép băm keccak, người ký của mỗi gốc
+    chỉ khôi phục một lần rồi được nhớ.
+    """
+    from parallel import verify_attestation_record  # type: ignore
+    
+    core = _wallet_core()
+    total = valid = invalid = errors = 0
+    start = time.perf_counter()
+    output = open(out, 'w', encoding='utf-8', buffering=1 << 20) if out else sys.stdout
+    try:
+        for line, record, error in _read_records(path):
+            total += 1
+            if error is None:
+                try:
+                    result = verify_attestation_record(core, record, address, require_low_s)
+                except KeyError as e:
+                    error = f"Thiếu trường {e}"
+            if error is not None:
+                result = {"valid": False, "error": error}
+                errors += 1
+            elif result["valid"]:
+                valid += 1
+            else:
+                invalid += 1
+            result["line"] = line
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            output.close()
+        else:
+            output.flush()
+    
+    elapsed = time.perf_counter() - start
+    summary = {
+        "total": total,
+        "valid": valid,
+        "invalid": invalid,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+        "cache": core.attestation_cache_stats(),
+    }
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    if invalid or errors:
+        sys.exit(2)
+
+
+def _read_addresses(path: str):
+    """Đọc địa chỉ từ file văn bản (mỗi dòng một địa chỉ, bỏ dòng trống và `#`), hỗ trợ .gz và `-`"""
+    if path == '-':
+        f = sys.stdin
+    else:
+        opener = gzip.open if path.endswith('.gz') else open
+        f = opener(path, 'rt', encoding='utf-8')
+    try:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def allowlist_build(source: str, out: str, bloom_bits: int):
+    """Biên dịch danh sách địa chỉ thành file allowlist nhị phân"""
+    from allowlist import build_allowlist  # type: ignore
+    
+    start = time.perf_counter()
+    try:
+        count = build_allowlist(_read_addresses(source), out, bloom_bits)
+    except ValueError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Đã ghi {count:,} địa chỉ vào {out} ({os.path.getsize(out):,} byte, {elapsed:.2f}s)")
+
+
+def allowlist_check(path: str, addresses):
+    """Kiểm tra địa chỉ có trong allowlist; mã thoát 2 nếu có địa chỉ không thuộc danh sách"""
+    from allowlist import Allowlist  # type: ignore
+    
+    allowlist = Allowlist(path)
+    missing = 0
+    for address in addresses:
+        found = address in allowlist
+        missing += not found
+        print(f"{'✓' if found else '✗'} {address}")
+    if missing:
+        sys.exit(2)
+
+
+def _connect_daemon(socket_path: str = None):
+    """Kết nối tới daemon; thoát với mã 1 nếu daemon không chạy"""
+    import wallet_daemon  # type: ignore
+    
+    try:
+        return wallet_daemon.DaemonClient(socket_path)
+    except OSError:
+        print(f"✗ Daemon không chạy tại {socket_path or wallet_daemon.default_socket_path()}", file=sys.stderr)
+        sys.exit(1)
+
+
+def daemon_start(socket_path: str = None, foreground: bool = False):
+    """Khởi động daemon giữ WalletCore nóng trên Unix socket (mặc định chạy nền)"""
+    import subprocess
+    import wallet_daemon  # type: ignore
+    
+    socket_path = socket_path or wallet_daemon.default_socket_path()
+    if foreground:
+        print(f"Daemon đang nghe tại {socket_path} (Ctrl+C để dừng)")
+        wallet_daemon.serve(socket_path)
+        return
+    
+    try:
+        wallet_daemon.DaemonClient(socket_path).close()
+        print(f"Daemon đã chạy tại {socket_path}")
+        return
+    except OSError:
+        pass
+    
+    process = subprocess.Popen(
+        [sys.executable, wallet_daemon.__file__, "--socket", socket_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    # Chờ daemon nạp xong WalletCore và bắt đầu nghe
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            print(f"✗ Daemon thoát với mã {process.returncode} (chạy lại với --foreground để xem lỗi)",
+                  file=sys.stderr)
+            sys.exit(1)
+        try:
+            client = wallet_daemon.DaemonClient(socket_path)
+        except OSError:
+            time.sleep(0.05)
+            continue
+        status = client.call("__status__")
+        client.close()
+        print(f"✓ Daemon đã khởi động (pid {status['pid']}, backend {status['backend']}) tại {socket_path}")
+        return
+    print("✗ Daemon không phản hồi sau 15 giây", file=sys.stderr)
+    sys.exit(1)
+
+
+def daemon_stop(socket_path: str = None):
+    """Dừng daemon (các phiên mở khóa trong daemon bị xóa)"""
+    client = _connect_daemon(socket_path)
+    client.call("__shutdown__")
+    client.close()
+    print("✓ Đã dừng daemon")
+
+
+def daemon_status(socket_path: str = None):
+    """In trạng thái daemon"""
+    client = _connect_daemon(socket_path)
+    status = client.call("__status__")
+    sessions = client.call("unlocked_sessions")
+    client.close()
+    print(f"Daemon:     pid {status['pid']} tại {status['socket']}")
+    print(f"Backend:    {status['backend']}")
+    print(f"Uptime:     {_format_duration(status['uptime'])}")
+    print(f"Yêu cầu:    {status['requests']:,}")
+    for session in sessions:
+        print(f"Mở khóa:    {session['address']} (còn {_format_duration(session['expires_in'])})")
+
+
+def daemon_unlock(keystore_path: str, ttl: float, socket_path: str = None):
+    """Mở khóa keystore trong daemon để `wallet sign --address` ký không cần chạy lại KDF"""
+    import wallet_daemon  # type: ignore
+    
+    client = _connect_daemon(socket_path)
+    try:
+        address, _ = _unlock_keystore(wallet_daemon.WalletProxy(client), _read_keystore_file(keystore_path), ttl)
+    except Exception as e:
+        print(f"✗ Lỗi mở khóa keystore: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        client.close()
+    print(f"✓ Đã mở khóa {address} trong {_format_duration(ttl)}")
+
+
+def daemon_lock(address: str = None, socket_path: str = None):
+    """Khóa một địa chỉ (hoặc tất cả) trong daemon"""
+    client = _connect_daemon(socket_path)
+    count = client.call("lock", address)
+    client.close()
+    print(f"✓ Đã khóa {count} phiên")
+
+
+def _format_duration(seconds: float) -> str:
+    """Định dạng số giây thành chuỗi dễ đọc"""
+    if seconds == float('inf'):
+        return "∞"
+    for unit, size in (("ngày", 86400), ("giờ", 3600), ("phút", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f} {unit}"
+    return f"{seconds:.1f} giây"
+
+
+def vanity_search(prefix: str, suffix: str, case_sensitive: bool, workers: int):
+    """Tìm địa chỉ vanity trên nhiều tiến trình"""
+    from vanity import VanityPattern, expected_seconds, search  # type: ignore
+    from parallel import default_workers  # type: ignore
+    
+    try:
+        pattern = VanityPattern(prefix or "", suffix or "", case_sensitive)
+    except ValueError as e:
+        print(f"Lỗi: {e}\n")
+        sys.exit(1)
+    
+    workers = workers or default_workers()
+    print(f"\nĐang tìm địa chỉ 0x{pattern.prefix}…{pattern.suffix} với {workers} worker "
+          f"(độ khó: 1/{pattern.difficulty:,})")
+    
+    def on_progress(attempts: int, rate: float):
+        eta = _format_duration(expected_seconds(pattern, rate))
+        print(f"\r  {attempts:,} khóa | {rate:,.0f} khóa/giây | thời gian kỳ vọng: {eta}   ",
+              end="", file=sys.stderr, flush=True)
+    
+    try:
+        (private_key, public_key, address), attempts, elapsed = search(
+            pattern, workers, on_progress=on_progress
+        )
+    except KeyboardInterrupt:
+        print("\nĐã dừng tìm kiếm.\n")
+        sys.exit(130)
+    
+    print("\n" + "="*60)
+    print("ĐÃ TÌM THẤY ĐỊA CHỈ VANITY")
+    print("="*60)
+    print(f"Khóa riêng:  {private_key}")
+    print(f"Khóa công:   {public_key}")
+    print(f"Địa chỉ:     {address}")
+    print(f"Số lần thử:  {attempts:,} trong {_format_duration(elapsed)} ({attempts / elapsed:,.0f} khóa/giây)")
+    print("="*60)
+    print("\n⚠️  CẢNH BÁO: Hãy bảo mật khóa riêng và không chia sẻ!")
+    print("="*60 + "\n")
 
 
 def main():
@@ -143,30 +905,169 @@ def main():
         epilog="""
 Ví dụ:
   wallet generate
+  wallet generate --count 1000000 --out wallets.ndjson.gz --workers 8
   wallet sign "Chuyển 5 ETH"
   wallet sign "Chuyển 5 ETH" --private-key 0x...
   wallet verify --message "Chuyển 5 ETH" --signature 0x... --address 0x...
+  wallet sign --file release.tar.gz --private-key 0x...
+  wallet verify --file release.tar.gz --signature 0x... --address 0x...
+  wallet verify-file records.jsonl --out results.ndjson --workers 8
+  wallet vanity --prefix 0xdead --suffix beef --workers 8
+  wallet derive --path "m/44'/60'/0'/0/0"
+  wallet derive --path "m/44'/60'/0'/0" --range 0-100000 --out deposits.csv
+  wallet keystore create --out keystore.json
+  wallet sign "Chuyển 5 ETH" --keystore keystore.json
+  wallet allowlist build signers.txt --out signers.allow
+  wallet verify --message "Chuyển 5 ETH" --signature 0x... --allowlist signers.allow
+  wallet daemon start
+  wallet daemon unlock keystore.json --ttl 600
+  wallet sign "Chuyển 5 ETH" --address 0x...
+  wallet sign --typed-data order.json --private-key 0x...
+  wallet verify --typed-data order.json --signature 0x... --address 0x...
+  wallet sign-txs --in payouts.csv --from-key 0x... --start-nonce 42 --chain-id 1 \\
+      --max-fee 30gwei --priority-fee 1gwei --out signed.ndjson
+  wallet attest --in messages.jsonl --keystore keystore.json --out proofs.ndjson
+  wallet verify-attest proofs.ndjson --address 0x...
         """
     )
     
     subparsers = parser.add_subparsers(dest='command', help='Lệnh cần thực thi')
     
     # Generate command
-    subparsers.add_parser('generate', help='Tạo ví mới')
+    generate_parser = subparsers.add_parser('generate', help='Tạo ví mới')
+    generate_parser.add_argument('--count', type=int, help='Số ví cần sinh (chế độ hàng loạt)')
+    generate_parser.add_argument('--out', help='File đầu ra .ndjson/.csv (thêm .gz để nén)')
+    generate_parser.add_argument('--format', choices=['ndjson', 'csv'], help='Định dạng đầu ra (mặc định theo đuôi file)')
+    generate_parser.add_argument('--gzip', action='store_true', help='Nén gzip file đầu ra')
+    generate_parser.add_argument('--workers', type=int, help='Số tiến trình (mặc định: số lõi CPU)')
+    generate_parser.add_argument('--chunk-size', type=int, default=1000, help='Số ví mỗi lô gửi cho worker')
     
     # Sign command
     sign_parser = subparsers.add_parser('sign', help='Ký thông điệp')
-    sign_parser.add_argument('message', help='Thông điệp cần ký')
+    sign_parser.add_argument('message', nargs='?', help='Thông điệp cần ký')
+    sign_parser.add_argument('--file', help='Ký nội dung file (băm dạng luồng, không nạp cả file)')
+    sign_parser.add_argument('--typed-data', help='Ký typed data EIP-712 từ file JSON {types, primaryType, domain, message}')
     sign_parser.add_argument('--private-key', help='Khóa riêng (tùy chọn, sẽ hỏi nếu không cung cấp)')
+    sign_parser.add_argument('--keystore', help='Ký bằng keystore V3 (mật khẩu lấy từ WALLET_KEYSTORE_PASSWORD hoặc hỏi)')
+    sign_parser.add_argument('--address', help='Ký bằng khóa đã mở trong daemon (xem `daemon unlock`)')
     sign_parser.add_argument('--raw', action='store_true', help='Ký dạng raw, không dùng Ethereum Signed Message (EIP-191)')
     
     # Verify command
     verify_parser = subparsers.add_parser('verify', help='Xác thực chữ ký')
-    verify_parser.add_argument('--message', required=True, help='Thông điệp gốc')
+    verify_parser.add_argument('--message', help='Thông điệp gốc')
+    verify_parser.add_argument('--file', help='File gốc (thay cho --message)')
+    verify_parser.add_argument('--typed-data', help='File JSON typed data EIP-712 (thay cho --message)')
     verify_parser.add_argument('--signature', required=True, help='Chữ ký cần kiểm tra')
     verify_parser.add_argument('--address', help='Địa chỉ kỳ vọng')
     verify_parser.add_argument('--public-key', help='Khóa công khai')
     verify_parser.add_argument('--raw', action='store_true', help='Xác thực dạng raw (không dùng tiền tố EIP-191)')
+    verify_parser.add_argument('--strict', action='store_true', help='Chạy thêm xác thực ECDSA đầy đủ sau khi khôi phục khóa')
+    verify_parser.add_argument('--require-low-s', action='store_true', help='Từ chối chữ ký có s cao (EIP-2)')
+    verify_parser.add_argument('--allowlist', help='File allowlist; chữ ký chỉ hợp lệ nếu người ký có trong danh sách')
+    
+    # Verify-file command
+    verify_file_parser = subparsers.add_parser('verify-file', help='Xác thực hàng loạt chữ ký từ file JSONL/CSV')
+    verify_file_parser.add_argument('path', help='File bản ghi .jsonl/.csv (có thể nén .gz)')
+    verify_file_parser.add_argument('--out', help='File kết quả NDJSON (mặc định: stdout)')
+    verify_file_parser.add_argument('--workers', type=int, help='Số tiến trình (mặc định: số lõi CPU)')
+    verify_file_parser.add_argument('--chunk-size', type=int, default=500, help='Số bản ghi mỗi lô gửi cho worker')
+    
+    # Vanity command
+    vanity_parser = subparsers.add_parser('vanity', help='Tìm địa chỉ có tiền tố/hậu tố mong muốn')
+    vanity_parser.add_argument('--prefix', help='Tiền tố hex của địa chỉ (ví dụ 0xdead)')
+    vanity_parser.add_argument('--suffix', help='Hậu tố hex của địa chỉ')
+    vanity_parser.add_argument('--case-sensitive', action='store_true', help='Khớp cả hoa/thường theo checksum EIP-55')
+    vanity_parser.add_argument('--workers', type=int, help='Số tiến trình (mặc định: số lõi CPU)')
+    
+    # Derive command
+    derive_parser = subparsers.add_parser(
+        'derive', help='Dẫn xuất địa chỉ HD (BIP-39/32/44) từ cụm từ trong WALLET_MNEMONIC hoặc --seed'
+    )
+    derive_parser.add_argument('--path', default="m/44'/60'/0'/0",
+                               help="Đường dẫn BIP-32; với --range là nút cha (mặc định m/44'/60'/0'/0)")
+    derive_parser.add_argument('--range', dest='index_range', help='Dải chỉ số con START-END (không gồm END)')
+    derive_parser.add_argument('--seed', help='Seed hex thay cho cụm từ ghi nhớ')
+    derive_parser.add_argument('--include-private-key', action='store_true', help='Xuất cả khóa riêng')
+    derive_parser.add_argument('--out', help='File đầu ra .ndjson/.csv (thêm .gz để nén; mặc định: stdout)')
+    derive_parser.add_argument('--format', choices=['ndjson', 'csv'], help='Định dạng đầu ra (mặc định theo đuôi file)')
+    derive_parser.add_argument('--gzip', action='store_true', help='Nén gzip file đầu ra')
+    derive_parser.add_argument('--workers', type=int, help='Số tiến trình (mặc định: số lõi CPU)')
+    derive_parser.add_argument('--chunk-size', type=int, default=1000, help='Số địa chỉ mỗi lô gửi cho worker')
+    
+    # Sign-txs command
+    sign_txs_parser = subparsers.add_parser(
+        'sign-txs', help='Ký hàng loạt giao dịch chi trả (EIP-1559 hoặc legacy EIP-155) từ file CSV/JSONL'
+    )
+    sign_txs_parser.add_argument('--in', dest='input', required=True,
+                                 help='File chi trả .csv/.jsonl (cột to, value, data tùy chọn; có thể nén .gz)')
+    sign_txs_parser.add_argument('--from-key', help='Khóa riêng người gửi (mặc định: hỏi)')
+    sign_txs_parser.add_argument('--keystore', help='Keystore V3 của người gửi (mật khẩu lấy từ WALLET_KEYSTORE_PASSWORD hoặc hỏi)')
+    sign_txs_parser.add_argument('--start-nonce', type=int, required=True, help='Nonce của giao dịch đầu tiên')
+    sign_txs_parser.add_argument('--chain-id', type=int, default=1, help='Chain ID (mặc định 1)')
+    sign_txs_parser.add_argument('--type', dest='tx_type', choices=['eip1559', 'legacy'],
+                                 help='Loại giao dịch (mặc định eip1559, legacy nếu chỉ có --gas-price)')
+    sign_txs_parser.add_argument('--gas', default='21000', help='Gas limit mỗi giao dịch (mặc định 21000)')
+    sign_txs_parser.add_argument('--max-fee', help='maxFeePerGas, ví dụ 30gwei (EIP-1559)')
+    sign_txs_parser.add_argument('--priority-fee', help='maxPriorityFeePerGas, ví dụ 1gwei (EIP-1559)')
+    sign_txs_parser.add_argument('--gas-price', help='gasPrice cho giao dịch legacy, ví dụ 20gwei')
+    sign_txs_parser.add_argument('--out', help='File đầu ra .ndjson/.csv (thêm .gz để nén; mặc định: stdout)')
+    sign_txs_parser.add_argument('--format', choices=['ndjson', 'csv'], help='Định dạng đầu ra (mặc định theo đuôi file)')
+    sign_txs_parser.add_argument('--gzip', action='store_true', help='Nén gzip file đầu ra')
+    sign_txs_parser.add_argument('--workers', type=int, help='Số tiến trình (mặc định: số lõi CPU)')
+    sign_txs_parser.add_argument('--chunk-size', type=int, default=1000, help='Số giao dịch mỗi lô gửi cho worker')
+    
+    # Attest command
+    attest_parser = subparsers.add_parser(
+        'attest', help='Ký lô thông điệp bằng một chữ ký trên gốc Merkle, kèm bằng chứng cho từng thông điệp'
+    )
+    attest_parser.add_argument('--in', dest='input', required=True,
+                               help='File thông điệp .jsonl/.csv (trường message; có thể nén .gz)')
+    attest_parser.add_argument('--private-key', help='Khóa riêng người ký (mặc định: hỏi)')
+    attest_parser.add_argument('--keystore', help='Keystore V3 của người ký (mật khẩu lấy từ WALLET_KEYSTORE_PASSWORD hoặc hỏi)')
+    attest_parser.add_argument('--out', help='File bằng chứng NDJSON (thêm .gz để nén; mặc định: stdout)')
+    attest_parser.add_argument('--gzip', action='store_true', help='Nén gzip file đầu ra')
+    attest_parser.add_argument('--raw', action='store_true', help='Băm thông điệp dạng raw, không dùng tiền tố EIP-191')
+    
+    # Verify-attest command
+    verify_attest_parser = subparsers.add_parser('verify-attest', help='Xác thực bằng chứng lô (đầu ra của attest)')
+    verify_attest_parser.add_argument('path', help='File bằng chứng .jsonl/.csv (có thể nén .gz)')
+    verify_attest_parser.add_argument('--address', help='Người ký gốc mong đợi')
+    verify_attest_parser.add_argument('--out', help='File kết quả NDJSON (mặc định: stdout)')
+    verify_attest_parser.add_argument('--require-low-s', action='store_true', help='Từ chối chữ ký gốc có s cao (EIP-2)')
+    
+    # Keystore command
+    keystore_parser = subparsers.add_parser('keystore', help='Quản lý keystore V3 mã hóa bằng mật khẩu')
+    keystore_subparsers = keystore_parser.add_subparsers(dest='keystore_command', required=True)
+    keystore_create_parser = keystore_subparsers.add_parser('create', help='Tạo keystore từ khóa riêng hoặc khóa mới')
+    keystore_create_parser.add_argument('--out', required=True, help='File keystore đầu ra')
+    keystore_create_parser.add_argument('--private-key', help='Khóa riêng cần mã hóa (mặc định: sinh khóa mới)')
+    keystore_create_parser.add_argument('--kdf', choices=['scrypt', 'pbkdf2'], default='scrypt', help='Hàm dẫn xuất khóa')
+    
+    # Allowlist command
+    allowlist_parser = subparsers.add_parser('allowlist', help='Quản lý allowlist địa chỉ người ký')
+    allowlist_subparsers = allowlist_parser.add_subparsers(dest='allowlist_command', required=True)
+    allowlist_build_parser = allowlist_subparsers.add_parser('build', help='Biên dịch danh sách địa chỉ thành file nhị phân')
+    allowlist_build_parser.add_argument('source', help='File địa chỉ, mỗi dòng một địa chỉ (.gz hoặc - cho stdin)')
+    allowlist_build_parser.add_argument('--out', required=True, help='File allowlist đầu ra')
+    allowlist_build_parser.add_argument('--bloom-bits', type=int, default=10,
+                                        help='Số bit Bloom filter mỗi địa chỉ (0 để tắt)')
+    allowlist_check_parser = allowlist_subparsers.add_parser('check', help='Kiểm tra địa chỉ có trong allowlist')
+    allowlist_check_parser.add_argument('path', help='File allowlist')
+    allowlist_check_parser.add_argument('addresses', nargs='+', help='Địa chỉ cần kiểm tra')
+    
+    # Daemon command
+    daemon_parser = subparsers.add_parser('daemon', help='Daemon giữ WalletCore nóng; sign/verify tự chuyển tiếp khi daemon chạy')
+    daemon_parser.add_argument('--socket', help='Đường dẫn Unix socket (mặc định: WALLET_DAEMON_SOCKET hoặc thư mục runtime)')
+    daemon_subparsers = daemon_parser.add_subparsers(dest='daemon_command', required=True)
+    daemon_start_parser = daemon_subparsers.add_parser('start', help='Khởi động daemon')
+    daemon_start_parser.add_argument('--foreground', action='store_true', help='Chạy ở tiền cảnh thay vì chạy nền')
+    daemon_subparsers.add_parser('stop', help='Dừng daemon')
+    daemon_subparsers.add_parser('status', help='Trạng thái daemon và các phiên mở khóa')
+    daemon_unlock_parser = daemon_subparsers.add_parser('unlock', help='Mở khóa keystore trong daemon')
+    daemon_unlock_parser.add_argument('keystore', help='File keystore V3')
+    daemon_unlock_parser.add_argument('--ttl', type=float, default=300, help='Thời gian giữ khóa (giây)')
+    daemon_lock_parser = daemon_subparsers.add_parser('lock', help='Khóa địa chỉ đã mở (mặc định: tất cả)')
+    daemon_lock_parser.add_argument('address', nargs='?', help='Địa chỉ cần khóa')
     
     args = parser.parse_args()
     
@@ -175,13 +1076,87 @@ Ví dụ:
         sys.exit(1)
     
     if args.command == 'generate':
-        generate_wallet()
+        if args.count is not None or args.out:
+            if not args.out:
+                parser.error("generate --count cần --out")
+            count = args.count if args.count is not None else 1
+            if count < 1 or args.chunk_size < 1:
+                parser.error("--count và --chunk-size phải lớn hơn 0")
+            generate_bulk(count, args.out, args.format, args.gzip, args.workers, args.chunk_size)
+        else:
+            generate_wallet()
     elif args.command == 'sign':
+        if sum(source is not None for source in (args.message, args.file, args.typed_data)) != 1:
+            parser.error("sign cần đúng một trong: message, --file hoặc --typed-data")
+        if sum(bool(option) for option in (args.private_key, args.keystore, args.address)) > 1:
+            parser.error("Chỉ dùng một trong: --private-key, --keystore hoặc --address")
         use_personal = not args.raw
-        sign_message(args.message, args.private_key, use_personal)
+        sign_message(args.message, args.private_key, use_personal, args.file, args.keystore, args.address,
+                     args.typed_data)
     elif args.command == 'verify':
+        if sum(source is not None for source in (args.message, args.file, args.typed_data)) != 1:
+            parser.error("verify cần đúng một trong: --message, --file hoặc --typed-data")
         use_personal = not args.raw
-        verify_signature(args.message, args.signature, args.address, args.public_key, use_personal)
+        verify_signature(args.message, args.signature, args.address, args.public_key, use_personal,
+                         args.strict, args.require_low_s, args.file, args.allowlist, args.typed_data)
+    elif args.command == 'verify-file':
+        if args.chunk_size < 1:
+            parser.error("--chunk-size phải lớn hơn 0")
+        verify_file(args.path, args.out, args.workers, args.chunk_size)
+    elif args.command == 'vanity':
+        if not args.prefix and not args.suffix:
+            parser.error("vanity cần --prefix hoặc --suffix")
+        vanity_search(args.prefix, args.suffix, args.case_sensitive, args.workers)
+    elif args.command == 'derive':
+        if args.chunk_size < 1:
+            parser.error("--chunk-size phải lớn hơn 0")
+        derive_addresses(args.path, args.index_range, args.out, args.format, args.gzip, args.workers,
+                         args.chunk_size, args.include_private_key, args.seed)
+    elif args.command == 'sign-txs':
+        if args.chunk_size < 1:
+            parser.error("--chunk-size phải lớn hơn 0")
+        if args.start_nonce < 0:
+            parser.error("--start-nonce không được âm")
+        if args.from_key and args.keystore:
+            parser.error("Chỉ dùng một trong: --from-key hoặc --keystore")
+        fee_fields = {
+            "chain_id": args.chain_id,
+            "type": args.tx_type,
+            "gas": args.gas,
+            "max_fee_per_gas": args.max_fee,
+            "max_priority_fee_per_gas": args.priority_fee,
+            "gas_price": args.gas_price,
+        }
+        sign_transactions(args.input, args.start_nonce, fee_fields, args.from_key, args.keystore, args.out,
+                          args.format, args.gzip, args.workers, args.chunk_size)
+    elif args.command == 'attest':
+        if args.private_key and args.keystore:
+            parser.error("Chỉ dùng một trong: --private-key hoặc --keystore")
+        attest_messages(args.input, args.private_key, args.keystore, args.out, not args.raw, args.gzip)
+    elif args.command == 'verify-attest':
+        verify_attestations(args.path, args.out, args.address, args.require_low_s)
+    elif args.command == 'keystore':
+        keystore_create(args.out, args.private_key, args.kdf)
+    elif args.command == 'allowlist':
+        if args.allowlist_command == 'build':
+            if args.bloom_bits < 0:
+                parser.error("--bloom-bits không được âm")
+            allowlist_build(args.source, args.out, args.bloom_bits)
+        else:
+            allowlist_check(args.path, args.addresses)
+    elif args.command == 'daemon':
+        if args.daemon_command == 'start':
+            daemon_start(args.socket, args.foreground)
+        elif args.daemon_command == 'stop':
+            daemon_stop(args.socket)
+        elif args.daemon_command == 'status':
+            daemon_status(args.socket)
+        elif args.daemon_command == 'unlock':
+            if args.ttl <= 0:
+                parser.error("--ttl phải lớn hơn 0")
+            daemon_unlock(args.keystore, args.ttl, args.socket)
+        else:
+            daemon_lock(args.address, args.socket)
 
 
 if __name__ == "__main__":
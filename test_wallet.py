@@ -2,13 +2,42 @@
 """
 Script kiểm thử đơn giản cho ví
 """
+import json
+import os
 import sys
+import tempfile
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
 # Thêm backend vào path
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
+from eth_hash.auto import keccak
+from eth_keys import KeyAPI
+from eth_keys.backends import NativeECCBackend
+from eth_keys.constants import SECPK1_N
+
 from wallet_core import WalletCore
+from ec_backend import PythonBackend, available_backends
+from fixed_base import GeneratorTable
+from batch_recover import glv_split, LAMBDA
+from vanity import VanityPattern
+from allowlist import Allowlist, build_allowlist
+from keystore import SessionLocked, UnlockSessions, decrypt_keystore
+import wallet_daemon
+from wallet_daemon import DaemonClient, WalletDaemonServer, WalletProxy
+from typed_data import TypedDataEncoder
+from results import Keypair, address_matches, checksum_address, encode_checksum
+from hd import format_path, mnemonic_to_seed, parse_path, parse_range
+from nonce_store import NonceStore, SQLiteNoncePersistence
+from siwe import SiweError, SiweMessage, parse_domains
+from parallel import (
+    chunked, derive_items, generate_chunk, sign_chunk, sign_items, sign_tx_items, sign_tx_tasks, verify_chunk,
+)
+from transactions import TransactionTemplate, parse_address, parse_quantity, rlp_encode
+from keypair_pool import KeypairPool
+from merkle import MerkleTree, compute_root, leaf_hash, node_hash, seal_root
 
 
 def test_wallet():
@@ -74,9 +103,1045 @@ def test_wallet():
     print("=" * 60)
 
 
+def test_key_cache():
+    """Kiểm tra cache khóa riêng đã parse"""
+    print("\nĐang kiểm thử cache khóa...")
+    wallet = WalletCore(key_cache_size=2)
+    private_key, _, address = wallet.generate_keypair()
+    
+    first = wallet.sign_message("a", private_key)
+    second = wallet.sign_message("b", private_key[2:])
+    assert first["address"] == second["address"] == address, "Sai địa chỉ khi dùng cache!"
+    stats = wallet.key_cache_stats()
+    print(f"   ✓ Thống kê: {stats}")
+    assert stats["hits"] == 1 and stats["misses"] == 1, "Cache không được dùng lại!"
+    
+    for _ in range(3):
+        wallet.private_key_to_address(wallet.generate_keypair()[0])
+    stats = wallet.key_cache_stats()
+    assert stats["size"] == 2 and stats["evictions"] == 2, "Cache không giới hạn kích thước!"
+    
+    wallet.clear_key_cache()
+    assert wallet.key_cache_stats()["size"] == 0, "Không xóa được cache!"
+    
+    # Khóa công khai bắt đầu bằng byte 0x04 vẫn là 64 byte x ‖ y, không phải tiền tố
+    address = wallet.private_key_to_address("0x3a08a44e3d33e70206586be2f0d0c2673d02c24e32ae1ff83b7a14513cf0b7dd")
+    assert address == "0x523891Fbad8fba1a0133a42133C449E483214020", "Sai địa chỉ khi x bắt đầu bằng 0x04!"
+    print("   ✓ LRU giới hạn kích thước và xóa được cache")
+
+
+def test_ec_backends():
+    """Các EC backend phải cho chữ ký và địa chỉ giống hệt nhau"""
+    print("\nĐang kiểm thử EC backend...")
+    backends = available_backends()
+    print(f"   ✓ Backend khả dụng: {', '.join(backends)}")
+    wallets = [WalletCore(ec_backend=name) for name in backends]
+    private_key, _, address = wallets[0].generate_keypair()
+    
+    results = [wallet.sign_message("Chuyển 5 ETH", private_key) for wallet in wallets]
+    assert all(result == results[0] for result in results), "Chữ ký khác nhau giữa các backend!"
+    for wallet in wallets:
+        assert wallet.private_key_to_address(private_key) == address, "Địa chỉ khác nhau giữa các backend!"
+        is_valid, recovered_address, _ = wallet.verify_signature("Chuyển 5 ETH", results[0]["signature"])
+        assert is_valid and recovered_address == address, "Xác thực khác nhau giữa các backend!"
+    print("   ✓ Chữ ký và địa chỉ trùng khớp")
+
+
+def test_verify_modes():
+    """Kiểm tra chế độ recover-only, strict và chính sách low-s"""
+    print("\nĐang kiểm thử các chế độ xác thực...")
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    message = "Chuyển 5 ETH"
+    result = wallet.sign_message(message, private_key)
+    
+    for strict in (False, True):
+        is_valid, recovered_address, _ = wallet.verify_signature(message, result["signature"], strict=strict)
+        assert is_valid and recovered_address == address, f"Xác thực thất bại (strict={strict})!"
+    print("   ✓ recover-only và strict cho cùng kết quả")
+    
+    # Chữ ký tương đương với s cao: s' = n - s, đảo bit v
+    high_s = SECPK1_N - int(result["s"], 16)
+    high_s_signature = result["r"] + f"{high_s:064x}" + f"{1 - result['v']:02x}"
+    is_valid, recovered_address, _ = wallet.verify_signature(message, high_s_signature)
+    assert is_valid and recovered_address == address, "Chữ ký s cao vẫn phải khôi phục được!"
+    is_valid, _, _ = wallet.verify_signature(message, high_s_signature, require_low_s=True)
+    assert not is_valid, "Lẽ ra phải từ chối chữ ký s cao!"
+    print("   ✓ require_low_s từ chối chữ ký s cao")
+    
+    zero_r_signature = "0x" + "00" * 32 + result["s"][2:] + "00"
+    is_valid, _, _ = wallet.verify_signature(message, zero_r_signature)
+    assert not is_valid, "Lẽ ra phải từ chối r = 0!"
+    print("   ✓ Từ chối r ngoài khoảng hợp lệ")
+
+
+def test_vanity_pattern():
+    """Kiểm tra so khớp mẫu vanity trên bytes địa chỉ"""
+    print("\nĐang kiểm thử mẫu vanity...")
+    address_bytes = bytes.fromhex("dead0000000000000000000000000000000beef5")
+    assert VanityPattern("0xdea", "eef5").matches(address_bytes), "Lẽ ra phải khớp tiền tố/hậu tố lẻ!"
+    assert VanityPattern("DEAD").matches(address_bytes), "Không phân biệt hoa/thường khi mặc định!"
+    assert not VanityPattern("deb").matches(address_bytes), "Lẽ ra không khớp nửa byte tiền tố!"
+    assert not VanityPattern(suffix="aef5").matches(address_bytes), "Lẽ ra không khớp nửa byte hậu tố!"
+    assert VanityPattern("de", "Af", case_sensitive=True).difficulty == 16 ** 4 * 2 ** 4
+    print("   ✓ So khớp nửa byte và độ khó đúng")
+
+
+def test_hash_file():
+    """Kiểm tra băm file dạng luồng cho cùng hash với băm thông điệp"""
+    print("\nĐang kiểm thử băm file...")
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    for content in (b"", "Chuyển 5 ETH".encode("utf-8") * 1000):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(content)
+            f.flush()
+            for personal in (True, False):
+                expected = wallet._hash_message(content.decode("utf-8"), personal)
+                assert wallet.hash_file(f.name, personal) == expected, "Hash file khác hash thông điệp!"
+                chunks = (content[i:i + 7] for i in range(0, len(content), 7))
+                assert wallet.hash_stream(chunks, len(content), personal) == expected, "Hash luồng sai!"
+            
+            result = wallet.sign_message_hash(wallet.hash_file(f.name), private_key)
+            is_valid, recovered_address, _ = wallet.verify_message_hash(wallet.hash_file(f.name), result["signature"])
+            assert is_valid and recovered_address == address, "Xác thực chữ ký file thất bại!"
+    print("   ✓ hash_file/hash_stream khớp _hash_message, ký và xác thực file đúng")
+
+
+def test_allowlist():
+    """Kiểm tra biên dịch, tra cứu và nạp lại allowlist"""
+    print("\nĐang kiểm thử allowlist...")
+    wallet = WalletCore()
+    addresses = [wallet.generate_keypair()[2] for _ in range(50)]
+    outsider = wallet.generate_keypair()[2]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "signers.allow")
+        for bloom_bits in (10, 0):
+            assert build_allowlist(addresses + [addresses[0].lower()], path, bloom_bits) == 50
+            allowlist = Allowlist(path)
+            assert len(allowlist) == 50 and allowlist.has_bloom == bool(bloom_bits)
+            assert all(address in allowlist for address in addresses), "Thiếu địa chỉ trong allowlist!"
+            assert addresses[3].lower()[2:] in allowlist, "Lẽ ra không phân biệt hoa/thường và tiền tố 0x!"
+            assert outsider not in allowlist, "Địa chỉ ngoài danh sách lại được chấp nhận!"
+        print("   ✓ Tra cứu đúng, có và không có Bloom filter")
+        
+        allowlist.reload_interval = 0
+        build_allowlist([outsider], path)
+        assert outsider in allowlist and addresses[0] not in allowlist, "Không nạp lại khi file đổi!"
+        print("   ✓ Tự nạp lại khi file thay đổi")
+        
+        previous = allowlist._snapshot
+        for broken in (b"", b"WALLOW01" + bytes(40)):
+            # Thay nguyên file như build_allowlist (ghi đè tại chỗ file đang mmap sẽ gây SIGBUS)
+            with open(path + ".tmp", "wb") as f:
+                f.write(broken)
+            os.replace(path + ".tmp", path)
+            assert not allowlist.maybe_reload() and outsider in allowlist and len(allowlist) == 1, \
+                "File hỏng phải giữ snapshot cũ!"
+        assert not previous.data.closed
+        build_allowlist(addresses, path)
+        assert allowlist.maybe_reload() and len(allowlist) == 50 and addresses[0] in allowlist
+        assert previous.data.closed, "mmap của snapshot cũ phải được đóng!"
+        stale = allowlist._snapshot
+        build_allowlist([outsider], path)
+        assert allowlist.maybe_reload() and stale.data.closed and outsider in allowlist
+        print("   ✓ File hỏng giữ snapshot cũ, snapshot bị thay được đóng mmap")
+
+
+def test_keystore():
+    """Kiểm tra keystore V3 (vector chuẩn Web3 Secret Storage) và phiên mở khóa"""
+    print("\nĐang kiểm thử keystore...")
+    # Vector scrypt trong đặc tả Web3 Secret Storage, mật khẩu "testpassword"
+    keystore = {
+        "version": 3,
+        "crypto": {
+            "cipher": "aes-128-ctr",
+            "cipherparams": {"iv": "83dbcc02d8ccb40e466191a123791e0e"},
+            "ciphertext": "d172bf743a674da9cdad04534d56926ef8358534d458fffccd4e6ad2fbde479c",
+            "kdf": "scrypt",
+            "kdfparams": {
+                "dklen": 32, "n": 262144, "r": 1, "p": 8,
+                "salt": "ab0c7876052600dd703518d6fc3fe8984592145b591fc8fb5c6d43190334ba19",
+            },
+            "mac": "2103ac29920d71da29f15d75b4a16dbe95cfd7ff8faea1056c33131d846e3097",
+        },
+    }
+    expected_key = "7a28b5ba57c53603b0b07b56bba752f7784bf506fa95edc395f5cf6c7514fe9d"
+    assert decrypt_keystore(keystore, "testpassword").hex() == expected_key, "Giải mã vector chuẩn sai!"
+    print("   ✓ Giải mã đúng vector chuẩn (scrypt)")
+    
+    start = time.perf_counter()
+    for kdf, override in (("scrypt", {"n": 1 << 24}), ("scrypt", {"r": 64}), ("scrypt", {"p": 1 << 10}),
+                          ("scrypt", {"n": 3 << 10}), ("scrypt", {"dklen": 64}), ("pbkdf2", {"c": 1 << 31}),
+                          ("pbkdf2", {"c": "1000"})):
+        hostile = json.loads(json.dumps(keystore))
+        hostile["crypto"]["kdf"] = kdf
+        hostile["crypto"]["kdfparams"].update(override)
+        try:
+            decrypt_keystore(hostile, "testpassword")
+            assert False, f"Lẽ ra phải từ chối tham số KDF {override}!"
+        except ValueError:
+            pass
+    assert time.perf_counter() - start < 1, "Tham số KDF vượt trần phải bị từ chối trước khi chạy KDF!"
+    print("   ✓ Từ chối tham số KDF vượt trần trước khi chạy KDF")
+    
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    for kdf, params in (("scrypt", {"n": 1 << 10}), ("pbkdf2", {"c": 1000})):
+        created = wallet.create_keystore(private_key, "mật khẩu", kdf, params)
+        assert wallet.unlock_keystore(created, "mật khẩu") == address, f"Mở khóa {kdf} thất bại!"
+        try:
+            wallet.unlock_keystore(created, "sai")
+            assert False, "Lẽ ra phải từ chối mật khẩu sai!"
+        except ValueError:
+            pass
+    signed = wallet.sign_message_with_address("Chuyển 5 ETH", address.lower())
+    assert signed == wallet.sign_message("Chuyển 5 ETH", private_key), "Ký theo địa chỉ khác ký bằng khóa!"
+    assert wallet.lock(address) == 1
+    try:
+        wallet.sign_message_with_address("Chuyển 5 ETH", address)
+        assert False, "Lẽ ra phải từ chối ký khi đã khóa!"
+    except SessionLocked:
+        pass
+    print("   ✓ Tạo/mở khóa scrypt và pbkdf2, ký theo địa chỉ, khóa lại")
+    
+    now = [0.0]
+    sessions = UnlockSessions(clock=lambda: now[0])
+    sessions.unlock(address, "key", ttl=10)
+    assert sessions.get(address) == "key"
+    now[0] = 10.0
+    try:
+        sessions.get(address)
+        assert False, "Phiên lẽ ra đã hết hạn!"
+    except SessionLocked:
+        pass
+    print("   ✓ Phiên hết hạn theo TTL")
+    
+    # API: ký theo địa chỉ, liệt kê và khóa phiên chỉ dành cho người giữ token trả về khi mở khóa
+    from fastapi.testclient import TestClient
+    import app as api
+    
+    created = wallet.create_keystore(private_key, "mật khẩu", "pbkdf2", {"c": 1000})
+    payload = {"message": "Chuyển 5 ETH", "address": address}
+    with TestClient(api.app) as client:
+        unlocked = client.post("/api/keystore/unlock", json={"keystore": created, "password": "mật khẩu"}).json()
+        token = unlocked["session_token"]
+        owner, stranger = {"X-Wallet-Session": token}, {"X-Wallet-Session": "đoán-mò".encode().hex()}
+        assert client.post("/api/wallet/sign", json=payload).status_code == 401
+        assert client.post("/api/wallet/sign", json=payload, headers=stranger).status_code == 403
+        assert client.post("/api/wallet/sign", json=payload, headers=owner).json()["signature"] == signed["signature"]
+        assert client.post("/api/wallet/sign/batch", json={"items": [payload]}, headers=stranger).status_code == 403
+        assert client.get("/api/keystore/sessions").status_code == 401
+        assert client.get("/api/keystore/sessions", headers=stranger).json() == {"sessions": []}
+        assert [item["address"] for item in client.get("/api/keystore/sessions", headers=owner).json()["sessions"]] == [address]
+        with client.websocket_connect("/api/ws") as ws:
+            ws.send_text(json.dumps({"id": 1, "op": "sign", "params": payload}))
+            assert ws.receive_json()["error"]["status"] == 401, "Kênh WebSocket cũng phải cần token!"
+        with client.websocket_connect("/api/ws", headers=owner) as ws:
+            ws.send_text(json.dumps({"id": 1, "op": "sign", "params": payload}))
+            assert ws.receive_json()["result"]["signature"] == signed["signature"]
+        assert client.post("/api/keystore/lock", json={}, headers=stranger).json() == {"locked": 0}
+        assert client.post("/api/keystore/lock", json={}, headers=owner).json() == {"locked": 1}
+        assert client.post("/api/wallet/sign", json=payload, headers=owner).status_code == 403
+    print("   ✓ API: ký theo địa chỉ, sessions, lock cần đúng X-Wallet-Session (REST và WebSocket)")
+
+
+def test_fixed_base():
+    """Kiểm tra bảng fixed-base cho khóa công khai/chữ ký giống hệt eth_keys gốc"""
+    print("\nĐang kiểm thử bảng fixed-base...")
+    reference = KeyAPI(backend=NativeECCBackend())
+    wallet = WalletCore()
+    for window in (3, 8):
+        backend = PythonBackend(window=window)
+        for private_key_int in (1, 2, SECPK1_N - 1, int(wallet.generate_keypair()[0], 16)):
+            private_key_bytes = private_key_int.to_bytes(32, 'big')
+            message_hash = wallet._hash_message(f"fixed-base #{private_key_int}", True)
+            expected = reference.PrivateKey(private_key_bytes)
+            private_key = backend.private_key(private_key_bytes)
+            
+            assert backend.public_key_bytes(private_key_bytes) == expected.public_key.to_bytes(), "Khóa công khai sai!"
+            signature = private_key.sign_msg_hash(message_hash)
+            assert signature.to_bytes() == expected.sign_msg_hash(message_hash).to_bytes(), "Chữ ký khác eth_keys!"
+            assert signature.recover_public_key_from_msg_hash(message_hash) == expected.public_key, "Khôi phục sai!"
+            assert backend.ecc.ecdsa_verify(message_hash, signature, private_key.public_key), "Xác thực sai!"
+    print("   ✓ Khóa công khai, chữ ký, khôi phục giống hệt NativeECCBackend")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "g4.tab")
+        table = GeneratorTable.build(4)
+        table.save(path)
+        loaded = GeneratorTable.load(path, 4)
+        assert loaded.multiply(SECPK1_N - 2) == table.multiply(SECPK1_N - 2), "Bảng nạp từ file sai!"
+        try:
+            GeneratorTable.load(path, 5)
+            assert False, "Lẽ ra phải từ chối bảng khác cửa sổ!"
+        except ValueError:
+            pass
+    print("   ✓ Lưu/nạp bảng qua mmap")
+
+
+MAIL_TYPED_DATA = {
+    "types": {
+        "EIP712Domain": [
+            {"name": "name", "type": "string"},
+            {"name": "version", "type": "string"},
+            {"name": "chainId", "type": "uint256"},
+            {"name": "verifyingContract", "type": "address"},
+        ],
+        "Person": [{"name": "name", "type": "string"}, {"name": "wallet", "type": "address"}],
+        "Mail": [
+            {"name": "from", "type": "Person"},
+            {"name": "to", "type": "Person"},
+            {"name": "contents", "type": "string"},
+        ],
+    },
+    "primaryType": "Mail",
+    "domain": {
+        "name": "Ether Mail",
+        "version": "1",
+        "chainId": 1,
+        "verifyingContract": "0xCcCCccccCCCCcCCCCCCcCcCccCcCCCcCcccccccC",
+    },
+    "message": {
+        "from": {"name": "Cow", "wallet": "0xCD2a3d9F938E13CD947Ec05AbC7FE734Df8DD826"},
+        "to": {"name": "Bob", "wallet": "0xbBbBBBBbbBBBbbbBbbBbbbbBBbBbbbbBbBbbBBbB"},
+        "contents": "Hello, Bob!",
+    },
+}
+
+
+def test_typed_data():
+    """Kiểm tra EIP-712 theo ví dụ Mail trong đặc tả và cache schema/domain"""
+    print("\nĐang kiểm thử EIP-712...")
+    encoder = TypedDataEncoder()
+    assert encoder.domain_separator(MAIL_TYPED_DATA["domain"]).hex() == \
+        "f2cee375fa42b42143804025fc449deafd50cc031ca257e0b194a650a912090f", "Domain separator sai!"
+    schema = encoder.schema({"Person": MAIL_TYPED_DATA["types"]["Person"], "Mail": MAIL_TYPED_DATA["types"]["Mail"]})
+    assert schema.encoded_types["Mail"] == "Mail(Person from,Person to,string contents)Person(string name,address wallet)"
+    
+    wallet = WalletCore()
+    # Khóa riêng keccak("cow") trong ví dụ của EIP-712
+    private_key = "0xc85ef7d79691fe79573b1a7064c19c1a9819ebdbd1faaab1a8ec92344438aaf4"
+    signed = wallet.sign_typed_data(MAIL_TYPED_DATA, private_key)
+    assert signed["message_hash"] == "0xbe609aee343fb3c4b28e1df9e632fca64fcfaede20f02e86244efddf30957bd2", "Digest sai!"
+    assert signed["r"] == "0x4355c47d63924e8a72e509b65029052eb6c299d53a04e167c5775fd466751c9d"
+    assert signed["s"] == "0x07299936d304c153f6443dfa05f40ff007d72911b6f72307f996231605b91562"
+    is_valid, recovered, _ = wallet.verify_typed_data(MAIL_TYPED_DATA, signed["signature"])
+    assert is_valid and recovered == "0xCD2a3d9F938E13CD947Ec05AbC7FE734Df8DD826"
+    print("   ✓ Digest và chữ ký khớp ví dụ Mail của EIP-712")
+    
+    for contents in ("Hi, Bob!", "Hello again"):
+        message = dict(MAIL_TYPED_DATA["message"], contents=contents)
+        wallet.sign_typed_data(dict(MAIL_TYPED_DATA, message=message), private_key)
+    stats = wallet.typed_data_cache_stats()
+    # Một schema cho thông điệp, một cho EIP712Domain (chỉ biên dịch khi domain chưa có trong cache)
+    assert stats["schemas"]["misses"] == 2 and stats["schemas"]["hits"] == 3, stats
+    assert stats["domains"]["misses"] == 1 and stats["domains"]["hits"] == 3, stats
+    print("   ✓ Thông điệp lặp lại dùng lại schema và domain separator đã cache")
+    
+    order = {
+        "types": {"Order": [{"name": "amounts", "type": "uint8[2]"}, {"name": "delta", "type": "int256"}]},
+        "primaryType": "Order",
+        "domain": {"chainId": "0x1"},
+        "message": {"amounts": [1, "255"], "delta": -1},
+    }
+    wallet.hash_typed_data(order)
+    for bad in ({"amounts": [1, 256], "delta": 0}, {"amounts": [1], "delta": 0}, {"amounts": [1, 2]}):
+        try:
+            wallet.hash_typed_data(dict(order, message=bad))
+            assert False, f"Lẽ ra phải từ chối {bad}!"
+        except ValueError:
+            pass
+    print("   ✓ Mảng cố định, số âm và kiểm tra phạm vi/độ dài/trường thiếu")
+
+
+def test_daemon():
+    """Kiểm tra daemon: kết quả qua socket giống chạy tại chỗ, bytes và lỗi được chuyển nguyên vẹn"""
+    import threading
+    
+    print("\nĐang kiểm thử daemon...")
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = str(Path(tmp) / "wallet.sock")
+        server = WalletDaemonServer(socket_path, WalletCore())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        client = DaemonClient(socket_path)
+        try:
+            assert os.stat(socket_path).st_mode & 0o077 == 0, "Socket không được mở cho người khác!"
+            proxy = WalletProxy(client)
+            signed = proxy.sign_message("Chuyển 5 ETH", private_key)
+            assert signed == wallet.sign_message("Chuyển 5 ETH", private_key), "Chữ ký qua daemon khác tại chỗ!"
+            is_valid, recovered, _ = proxy.verify_signature("Chuyển 5 ETH", signed["signature"])
+            assert is_valid and recovered == address
+            
+            path = Path(tmp) / "data.bin"
+            path.write_bytes(b"noi dung file" * 1000)
+            file_hash = proxy.hash_file(str(path))
+            assert file_hash == wallet.hash_file(str(path)), "bytes không được chuyển nguyên vẹn!"
+            assert proxy.sign_message_hash(file_hash, private_key) == wallet.sign_message_hash(file_hash, private_key)
+            print("   ✓ Ký, xác thực và băm file qua socket giống chạy tại chỗ")
+            
+            for call, expected in ((lambda: proxy.sign_message("x", "0xzz"), ValueError),
+                                   (lambda: proxy.sign_message_with_address("x", address), LookupError),
+                                   (lambda: client.call("create_keystore", private_key, "pw"), ValueError)):
+                try:
+                    call()
+                    assert False, "Lẽ ra phải ném lỗi!"
+                except expected:
+                    pass
+            assert client.call("__status__")["requests"] == 4
+            print("   ✓ Lỗi được ném lại đúng loại, phương thức ngoài danh sách bị từ chối")
+            
+            # Daemon của user khác không bao giờ nhận lệnh (khóa riêng đi qua socket)
+            real_getuid = wallet_daemon.os.getuid
+            wallet_daemon.os.getuid = lambda: real_getuid() + 1
+            try:
+                try:
+                    DaemonClient(socket_path)
+                    assert False, "Lẽ ra phải từ chối socket của user khác!"
+                except PermissionError:
+                    pass
+                assert wallet_daemon.connect(socket_path) is None, "CLI phải chạy tại chỗ thay vì gửi khóa đi!"
+            finally:
+                wallet_daemon.os.getuid = real_getuid
+            shared = Path(tmp) / "shared"
+            shared.mkdir(mode=0o755)
+            os.chmod(shared, 0o755)
+            try:
+                wallet_daemon.ensure_private_dir(shared)
+                assert False, "Thư mục người khác đọc được phải bị từ chối!"
+            except PermissionError:
+                pass
+            wallet_daemon.ensure_private_dir(Path(tmp) / "private")
+            assert os.stat(Path(tmp) / "private").st_mode & 0o777 == 0o700
+            print("   ✓ Chỉ chuyển tiếp tới daemon cùng user, thư mục socket phải là 0700")
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+
+def test_recover_batch():
+    """Kiểm tra khôi phục hàng loạt: giống từng chữ ký, lỗi riêng từng mục, giữ thứ tự"""
+    print("\nĐang kiểm thử recover_batch...")
+    for k in (1, LAMBDA, SECPK1_N - 1, SECPK1_N // 3):
+        k1, k2 = glv_split(k)
+        assert (k1 + k2 * LAMBDA) % SECPK1_N == k and max(abs(k1), abs(k2)).bit_length() <= 128, "Tách GLV sai!"
+    
+    for name in available_backends():
+        wallet = WalletCore(ec_backend=name)
+        hashes, signatures, expected = [], [], []
+        for i in range(12):
+            private_key, _, address = wallet.generate_keypair()
+            hashes.append(wallet.hash_message(f"batch #{i}"))
+            signatures.append(wallet.sign_message(f"batch #{i}", private_key)["signature"])
+            expected.append(address)
+        for i in range(12):
+            assert wallet.verify_signature(f"batch #{i}", signatures[i])[1] == expected[i]
+        
+        signatures[2] = "0xzz"
+        signatures[5] = signatures[5][:-2] + "1b"
+        signatures[7] = bytes.fromhex(signatures[7][2:])
+        hashes[9] = hashes[9][:31]
+        results = wallet.recover_batch(hashes, signatures)
+        for i, result in enumerate(results):
+            if i in (2, 5, 9):
+                assert result["address"] is None and result["error"], f"Mục {i} lẽ ra phải lỗi ({name})"
+            else:
+                assert result == {"address": expected[i]}, f"Mục {i} khôi phục sai ({name})"
+        
+        high_s = bytearray(bytes.fromhex(signatures[0][2:]))
+        high_s[32:64] = (SECPK1_N - int.from_bytes(high_s[32:64], 'big')).to_bytes(32, 'big')
+        high_s[64] ^= 1
+        assert wallet.recover_batch(hashes[:1], [bytes(high_s)])[0]["address"] == expected[0]
+        assert "error" in wallet.recover_batch(hashes[:1], [bytes(high_s)], require_low_s=True)[0]
+        assert wallet.recover_batch([], []) == []
+    print(f"   ✓ Khớp từng chữ ký trên {', '.join(available_backends())}, lỗi riêng từng mục")
+
+
+def test_result_types():
+    """Kiểm tra API dạng bytes: kết quả giống hệt hàm trả chuỗi, checksum đúng EIP-55"""
+    print("\nĐang kiểm thử kiểu kết quả dạng bytes...")
+    from eth_utils import to_checksum_address
+    for address_bytes in (bytes(20), b"\xff" * 20, os.urandom(20), os.urandom(20)):
+        assert encode_checksum(address_bytes) == to_checksum_address(address_bytes.hex()), "Checksum sai!"
+        assert checksum_address(address_bytes) == encode_checksum(address_bytes)
+    
+    wallet = WalletCore()
+    keypair = wallet.generate_raw_keypair()
+    assert isinstance(keypair, Keypair) and len(keypair.address) == 20 and len(keypair.public_key) == 64
+    private_key, public_key, address = keypair.to_tuple()
+    assert wallet.format_keypair(*keypair) == (private_key, public_key, address)
+    assert wallet.private_key_to_address(private_key) == address
+    
+    message_hash = wallet.hash_message("bytes-first")
+    signed = wallet.sign_hash_bytes(message_hash, keypair.private_key)
+    assert len(signed.signature) == 65 and signed.address == keypair.address
+    assert signed.to_dict() == wallet.sign_message("bytes-first", private_key), "to_dict khác sign_message!"
+    
+    verification = wallet.verify_hash_bytes(message_hash, signed.signature, strict=True)
+    assert verification.valid and verification.address == keypair.address
+    assert verification.to_tuple() == wallet.verify_message_hash(message_hash, "0x" + signed.signature.hex())
+    by_public_key = wallet.verify_hash_bytes_with_public_key(message_hash, signed.signature, keypair.public_key)
+    assert by_public_key.valid and by_public_key.address == keypair.address
+    assert not wallet.verify_hash_bytes(message_hash, signed.signature[:64] + b"\x05").valid
+    assert wallet.verify_message_hash(message_hash, "0xzz") == (False, None, "0x" + message_hash.hex())
+    
+    (recovery,) = wallet.recover_batch_bytes([message_hash], [signed.signature])
+    assert recovery.address == keypair.address and recovery.error is None
+    assert address_matches(address, address.lower()[2:]) and address_matches(address, address.upper().replace("0X", "0x"))
+    assert not address_matches(None, address) and not address_matches(address, encode_checksum(bytes(20)))
+    print("   ✓ sign/verify/recover dạng bytes khớp API chuỗi, chỉ định dạng khi xuất")
+
+
+def test_hd_derive():
+    """Kiểm tra dẫn xuất HD theo vector BIP-32/BIP-44 và cache nút cha"""
+    print("\nĐang kiểm thử dẫn xuất HD...")
+    mnemonic = " ".join(["abandon"] * 11 + ["about"])
+    seed = mnemonic_to_seed(mnemonic)
+    assert seed.hex().startswith("5eb00bbddcf069084889a8ab9155568165f5c453"), "Seed BIP-39 sai!"
+    assert parse_path("m/44'/60h/0'/0") == (0x8000002C, 0x8000003C, 0x80000000, 0)
+    assert format_path(parse_path("m/44h/60'/0'/0")) == "m/44'/60'/0'/0"
+    assert parse_range("0-100000") == range(0, 100000) and parse_range("7") == range(7, 8)
+    for bad in ("44'/60'", "m/x", "m/2147483648"):
+        try:
+            parse_path(bad)
+            assert False, f"Lẽ ra phải từ chối {bad}!"
+        except ValueError:
+            pass
+    
+    for name in available_backends():
+        wallet = WalletCore(ec_backend=name)
+        # Vector 1 của BIP-32: m/0H/1/2H
+        node = wallet._hd.node(bytes(range(16)), parse_path("m/0'/1/2'"))
+        assert node.private_key.hex() == "cbce0d719ecf7431d88e6a89fa1483e02e35092af60c042b1df2ff59fa424dca"
+        assert node.chain_code.hex() == "04466b9cc8e161e966409ca52986c584f07e9dc81f735db683c3ff6ec7b1503f"
+        
+        assert wallet.derive_keypair(mnemonic)[2] == "0x9858EfFD232B4033E47d90003D41EC34EcaEda94"
+        keypairs = list(wallet.derive_raw_keypairs(seed, "m/44'/60'/0'/0", range(3)))
+        assert encode_checksum(keypairs[1].address) == "0x6Fac4D18c912343BF86fa7049364Dd4E424Ab9C0"
+        stats = wallet.hd_cache_stats()
+        assert stats["misses"] == 2 and stats["hits"] == 1, f"Nút cha phải lấy từ cache: {stats}"
+    
+    lines = derive_items(wallet, (seed, "m/44'/60'/0'/0", 1, 3, "csv", True)).splitlines()
+    private_key, public_key, address = wallet.derive_keypair(mnemonic, "m/44'/60'/0'/0/1")
+    assert len(lines) == 2
+    assert lines[0] == f"1,m/44'/60'/0'/0/1,{address},{public_key},{private_key}", "Dòng CSV sai!"
+    print("   ✓ Vector BIP-32/BIP-44 đúng, nút cha được cache giữa các lần dẫn xuất")
+
+
+def test_siwe():
+    """Kiểm tra phân tích/xác thực Sign-In with Ethereum và kho nonce dùng một lần"""
+    print("\nĐang kiểm thử Sign-In with Ethereum...")
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    store = NonceStore(ttl=60)
+    message = SiweMessage(
+        domain="example.com",
+        address=address,
+        uri="https://example.com/login",
+        nonce=store.issue(),
+        issued_at="2026-01-01T00:00:00Z",
+        statement="Đăng nhập vào ví",
+        expiration_time="2999-01-01T00:00:00Z",
+        resources=["ipfs://bafybeiemxf5abjwjbikoz4mc3a3dla6ual3jsgpdr4cjr3oz3evfyavhwq/"],
+    )
+    text = message.prepare()
+    assert SiweMessage.parse(text).prepare() == text, "Phân tích rồi dựng lại phải ra đúng văn bản!"
+    for bad in (text.replace(address, address.lower()), text.replace("Version: 1", "Version: 2"), text + "\n"):
+        try:
+            SiweMessage.parse(bad)
+            assert False, "Lẽ ra phải từ chối thông điệp sai cú pháp!"
+        except SiweError:
+            pass
+    
+    signature = wallet.sign_message(text, private_key)["signature"]
+    _, recovered, _ = wallet.verify_signature(text, signature)
+    parsed = SiweMessage.parse(text)
+    parsed.check(recovered, "example.com")
+    parsed.check(recovered, parse_domains("app.example.com, example.com"))
+    assert store.consume(parsed.nonce) and not store.consume(parsed.nonce), "Nonce chỉ được dùng một lần!"
+    for args in (("evil.com",), ((),), ("example.com", datetime(3000, 1, 1, tzinfo=timezone.utc))):
+        try:
+            parsed.check(recovered, *args)
+            assert False, f"Lẽ ra phải từ chối {args}!"
+        except SiweError:
+            pass
+    
+    # TTL và giới hạn kích thước với đồng hồ giả
+    now = [1000.0]
+    store = NonceStore(ttl=10, max_size=4, shards=1, clock=lambda: now[0])
+    nonces = [store.issue() for _ in range(5)]
+    assert nonces[0] not in store and len(store) == 4, "Nonce cũ nhất phải bị loại khi đầy!"
+    now[0] += 11
+    assert not store.consume(nonces[1]), "Nonce hết hạn không được chấp nhận!"
+    stats = store.stats()
+    assert stats["evicted"] == 1 and stats["expired"] == 1, stats
+    
+    # Nonce đã dùng vẫn là đã dùng sau khi khởi động lại
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nonces.db")
+        store = NonceStore(ttl=60, persistence=SQLiteNoncePersistence(path))
+        used, kept = store.issue(), store.issue()
+        assert store.consume(used)
+        store.close()
+        store = NonceStore(ttl=60, persistence=SQLiteNoncePersistence(path, flush_interval=0))
+        assert kept in store and used not in store, "Nonce nạp lại từ SQLite sai!"
+        store.close()
+        
+        # Hai worker dùng chung một file: nonce phát ở worker này dùng được ở worker kia, đúng một lần
+        first = NonceStore(ttl=60, persistence=SQLiteNoncePersistence(path, shared=True))
+        second = NonceStore(ttl=60, persistence=SQLiteNoncePersistence(path, shared=True))
+        nonce = first.issue()
+        first.persistence.flush()
+        assert second.consume(nonce), "Nonce do worker khác phát phải dùng được!"
+        assert not first.consume(nonce) and not second.consume(nonce), "Nonce dùng chung chỉ được dùng một lần!"
+        
+        # Nonce còn chờ ghi được dùng ngay trong bộ nhớ và không bao giờ xuống file
+        local = first.issue()
+        assert first.consume(local), "Nonce chưa ghi phải dùng được ở worker phát ra nó!"
+        first.persistence.flush()
+        assert not second.consume(local) and not first.consume(local), "Nonce chưa ghi bị dùng hai lần!"
+        first.close()
+        second.close()
+    
+    # API so domain với cấu hình máy chủ, không theo domain client gửi kèm
+    from fastapi.testclient import TestClient
+    import app as api
+    
+    def login(domain: str) -> dict:
+        text = SiweMessage(domain=domain, address=address, uri=f"https://{domain}/login",
+                           nonce=api.nonce_store.issue(), issued_at="2026-01-01T00:00:00Z").prepare()
+        return {"message": text, "signature": wallet.sign_message(text, private_key)["signature"], "domain": domain}
+    
+    configured = api.SIWE_DOMAINS
+    try:
+        with TestClient(api.app) as client:
+            api.SIWE_DOMAINS = frozenset()
+            assert client.post("/api/siwe/verify", json=login("example.com")).status_code == 503, \
+                "Chưa cấu hình domain thì phải từ chối!"
+            api.SIWE_DOMAINS = parse_domains("example.com")
+            assert client.post("/api/siwe/verify", json=login("example.com")).json()["valid"]
+            result = client.post("/api/siwe/verify", json=login("evil.com")).json()
+            assert not result["valid"] and "Domain" in result["error"], "Domain do client chọn không được chấp nhận!"
+    finally:
+        api.SIWE_DOMAINS = configured
+    print("   ✓ Thông điệp EIP-4361 đúng cú pháp, nonce dùng một lần, hết hạn và lưu qua SQLite, domain theo máy chủ")
+
+
+def test_transactions():
+    """Kiểm tra mã hóa RLP, ký giao dịch EIP-155/EIP-1559 và ký hàng loạt theo nonce"""
+    print("\nĐang kiểm thử ký giao dịch...")
+    assert rlp_encode(b"dog") == b"\x83dog" and rlp_encode([]) == b"\xc0" and rlp_encode(0) == b"\x80"
+    assert rlp_encode([[], [[]], [[], [[]]]]) == bytes.fromhex("c7c0c1c0c3c0c1c0")
+    assert rlp_encode(b"a" * 56)[:2] == b"\xb8\x38"
+    assert parse_quantity("1.5 ether") == 15 * 10 ** 17 and parse_quantity("30gwei") == 30 * 10 ** 9
+    assert parse_quantity("0x10") == 16 and parse_quantity(7) == 7
+    for bad in ("0.5 wei", "-1", "abc"):
+        try:
+            parse_quantity(bad)
+            assert False, f"Lẽ ra phải từ chối {bad}!"
+        except ValueError:
+            pass
+    try:
+        parse_address("0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed".replace("A", "a", 1))
+        assert False, "Lẽ ra phải từ chối địa chỉ sai checksum!"
+    except ValueError:
+        pass
+    
+    private_key = "0x" + "46" * 32
+    # Vector trong đặc tả EIP-155
+    legacy = {"chain_id": 1, "nonce": 9, "gas_price": "20 gwei", "gas": 21000,
+              "to": "0x" + "35" * 20, "value": "1 ether"}
+    expected = (
+        "0xf86c098504a817c800825208943535353535353535353535353535353535353535880de0b6b3a7640000"
+        "8025a028ef61340bd939bc2195fe537567866003e1a15d3c71ff63e1590620aa636276a067cbe9d8997f761a"
+        "ecb703304b3800ccf555c9f3dc64214b297fb1966a3b6d83"
+    )
+    for name in available_backends():
+        wallet = WalletCore(ec_backend=name)
+        result = wallet.sign_transaction(legacy, private_key)
+        assert result["raw_transaction"] == expected, f"Giao dịch EIP-155 sai với backend {name}!"
+        assert result["hash"] == "0x" + keccak(bytes.fromhex(expected[2:])).hex()
+    
+    # EIP-1559: các đoạn RLP dựng sẵn phải khớp với mã hóa đầy đủ từng trường
+    template = TransactionTemplate(5, max_fee_per_gas=30 * 10 ** 9, max_priority_fee_per_gas=10 ** 9,
+                                   access_list=[("0x" + "11" * 20, ["0x" + "00" * 32])])
+    payments = [(bytes([i + 1]) * 20, 10 ** 15 * (i + 1), b"\xde\xad" if i % 2 else b"") for i in range(5)]
+    tasks = list(sign_tx_tasks(template, bytes.fromhex(private_key[2:]), payments, 42, "ndjson", 2))
+    records = [json.loads(line) for task in tasks for line in sign_tx_items(wallet, task).splitlines()]
+    assert [(r["index"], r["nonce"]) for r in records] == [(i, 42 + i) for i in range(5)], "Nonce phải liền mạch!"
+    to, value, data = payments[3]
+    fields = [5, 45, 10 ** 9, 30 * 10 ** 9, 21000, to, value, data, [[b"\x11" * 20, [b"\x00" * 32]]]]
+    signed = wallet.sign_hash_bytes(keccak(b"\x02" + rlp_encode(fields)), bytes.fromhex(private_key[2:]))
+    raw = b"\x02" + rlp_encode(fields + [signed.v, signed.r, signed.s])
+    assert records[3]["raw_transaction"] == "0x" + raw.hex(), "Giao dịch EIP-1559 sai!"
+    assert records[3]["from"] == wallet.private_key_to_address(private_key)
+    print("   ✓ Vector EIP-155 đúng trên mọi backend, giao dịch EIP-1559 và nonce hàng loạt đúng")
+
+
+def test_attestation():
+    """Kiểm tra ký lô bằng gốc Merkle: bằng chứng từng thông điệp và cache người ký theo gốc"""
+    print("\nĐang kiểm thử ký lô Merkle...")
+    hashes = [keccak(bytes([i])) for i in range(7)]
+    # Nút lẻ cuối tầng được đưa lên thẳng, không nhân đôi
+    leaves = [leaf_hash(h) for h in hashes]
+    left = node_hash(node_hash(leaves[0], leaves[1]), node_hash(leaves[2], leaves[3]))
+    right = node_hash(node_hash(leaves[4], leaves[5]), leaves[6])
+    tree = MerkleTree(iter(hashes))
+    assert tree.root() == seal_root(node_hash(left, right), 7), "Gốc Merkle sai!"
+    for count in (1, 2, 3, 5, 8, 33):
+        tree = MerkleTree(hashes[:count] if count <= 7 else [keccak(bytes([i, 1])) for i in range(count)])
+        for index, message_hash, path in tree.proofs():
+            assert compute_root(message_hash, index, count, path) == tree.root()
+    
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    messages = [f"Biên nhận #{i}" for i in range(10)]
+    attestation = wallet.attest_messages(messages, private_key)
+    assert attestation["address"] == address and attestation["count"] == 10
+    shared = {"count": 10, "root": attestation["root"], "signature": attestation["signature"]}
+    for message, proof in zip(messages, attestation["proofs"]):
+        valid, recovered, _ = wallet.verify_attestation(message, {**proof, **shared})
+        assert valid and recovered == address, "Bằng chứng hợp lệ bị từ chối!"
+    stats = wallet.attestation_cache_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 9, "Mỗi gốc chỉ được khôi phục người ký một lần!"
+    
+    # Đổi thông điệp, vị trí, hash anh em hoặc chữ ký gốc đều phải bị từ chối
+    proof = {**attestation["proofs"][3], **shared}
+    tampered_path = "0x" + ("00" * 32) + proof["proof"][66:]
+    tampered_signature = attestation["signature"][:-4] + ("11" if attestation["signature"][-4:-2] != "11" else "22") \
+        + attestation["signature"][-2:]
+    for message, changes in ((messages[4], {}), (messages[3], {"index": 2}), (messages[3], {"proof": tampered_path}),
+                             (messages[3], {"count": 11}), (messages[3], {"proof": proof["proof"] + "00" * 32})):
+        assert not wallet.verify_attestation(message, {**proof, **changes})[0], f"Lẽ ra phải từ chối {changes}!"
+    valid, recovered, _ = wallet.verify_attestation(messages[3], {**proof, "signature": tampered_signature})
+    assert not valid or recovered != address, "Chữ ký gốc bị sửa không được khớp người ký!"
+    print("   ✓ Gốc Merkle đúng, bằng chứng hợp lệ được chấp nhận, bằng chứng/chữ ký sửa đổi bị từ chối")
+
+
+def test_keypair_pool():
+    """Kiểm tra pool cặp khóa sinh sẵn: trao đúng một lần, cạn thì trả None, xóa khi dừng"""
+    print("\nĐang kiểm thử pool cặp khóa...")
+    wallet = WalletCore()
+    pool = KeypairPool(wallet.generate_raw_keypair, high=20, low=5, workers=2)
+    pool.start()
+    deadline = time.time() + 5
+    while len(pool) < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(pool) >= 20, "Pool chưa được nạp đầy!"
+    
+    taken = [pool.take() for _ in range(40)]
+    addresses = [keypair[2] for keypair in taken if keypair is not None]
+    assert len(addresses) == len(set(addresses)), "Một cặp khóa bị trao hai lần!"
+    for private_key, _, address in filter(None, taken):
+        assert wallet.private_key_to_address(private_key) == address
+    stats = pool.stats()
+    assert stats["served"] == len(addresses) and stats["served"] + stats["misses"] == 40
+    
+    held = [entry[0] for entry in pool._entries]
+    pool.close()
+    assert len(pool) == 0 and all(not any(private_key) for private_key in held), "Khóa chưa trao phải bị xóa khi dừng!"
+    assert pool.take() is None, "Pool đã dừng và cạn phải trả None"
+    print(f"   ✓ {len(addresses)} cặp khóa khác nhau, khóa còn lại bị ghi đè 0 khi dừng")
+
+
+def test_ws_channel():
+    """Kiểm tra kênh WebSocket: frame gửi liên tiếp được trả lời đủ, ghép đúng theo id"""
+    print("\nĐang kiểm thử kênh WebSocket...")
+    from fastapi.testclient import TestClient
+    import app as api
+    from ws_protocol import msgpack_available
+    
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    messages = [f"Thông điệp #{i}" for i in range(20)]
+    with TestClient(api.app) as client, client.websocket_connect("/api/ws") as ws:
+        for i, message in enumerate(messages):
+            ws.send_text(json.dumps({"id": f"s{i}", "op": "sign", "params": {"message": message, "private_key": private_key}}))
+        ws.send_text(json.dumps({"id": "g", "op": "generate"}))
+        ws.send_text(json.dumps({"id": "x", "op": "transfer"}))
+        ws.send_text(json.dumps({"id": "k", "op": "sign", "params": {"message": "a", "private_key": "0x12"}}))
+        ws.send_text(json.dumps({"id": "m", "op": "verify", "params": {"message": "a"}}))
+        ws.send_text("không phải JSON")
+        replies = {}
+        for _ in range(len(messages) + 5):
+            frame = ws.receive_json()
+            replies[frame["id"]] = frame
+        assert sorted(replies, key=str) == sorted([f"s{i}" for i in range(20)] + ["g", "x", "k", "m", None], key=str)
+        for i, message in enumerate(messages):
+            result = replies[f"s{i}"]["result"]
+            assert result["message"] == message and result["address"] == address
+            assert wallet.verify_signature(message, result["signature"])[1] == address, "Phản hồi bị ghép sai id!"
+        assert wallet.private_key_to_address(replies["g"]["result"]["private_key"]) == replies["g"]["result"]["address"]
+        assert replies["x"]["error"]["status"] == 400 and replies[None]["error"]["status"] == 400
+        assert replies["k"]["error"]["status"] == 400, "Lỗi phải giống hệt route REST!"
+        assert replies["m"]["error"]["status"] == 422
+        
+        ws.send_text(json.dumps({"id": 7, "op": "verify", "params": {
+            "message": messages[0], "signature": replies["s0"]["result"]["signature"], "address": address,
+        }}))
+        assert ws.receive_json() == {"id": 7, "result": {
+            "valid": True, "address": address, "message_hash": replies["s0"]["result"]["message_hash"],
+            "match_expected": True, "allowlisted": None,
+        }}
+        if not msgpack_available():
+            ws.send_bytes(b"\x81\xa2id\x01")
+            assert ws.receive_json()["error"]["status"] == 415, "Thiếu msgpack phải báo 415 bằng JSON!"
+    print(f"   ✓ {len(replies)} phản hồi ghép đúng id, lỗi trả theo từng frame như REST")
+
+
+def test_profiling():
+    """Kiểm tra profile theo yêu cầu: chỉ yêu cầu được chọn bị profile, route quản trị tắt mặc định"""
+    print("\nĐang kiểm thử profile theo yêu cầu...")
+    import marshal
+    from fastapi.testclient import TestClient
+    import app as api
+    
+    wallet = WalletCore()
+    private_key, _, _ = wallet.generate_keypair()
+    payload = {"message": "Đo hiệu năng", "private_key": private_key}
+    with TestClient(api.app) as client:
+        assert not api.profiler.enabled and client.get("/api/admin/profile").status_code == 404, \
+            "Profiling phải tắt nếu không đặt WALLET_PROFILING=1!"
+        api.profiler.enabled = True
+        try:
+            client.post("/api/admin/profile", json={"reset": True})
+            assert client.post("/api/wallet/sign", json=payload).status_code == 200
+            assert client.post("/api/wallet/sign", json=payload, headers={"X-Wallet-Profile": "1"}).status_code == 200
+            report = client.get("/api/admin/profile", params={"sort": "tottime"}).json()
+            assert report["requests"] == 1, "Chỉ yêu cầu có header mới được profile!"
+            assert report["routes"]["POST /api/wallet/sign"]["executor_seconds"] > 0
+            assert any(item["function"] == "sign_message" for item in
+                       client.get("/api/admin/profile", params={"limit": 100}).json()["functions"])
+            assert "sign_message" in client.get("/api/admin/profile", params={"format": "text", "limit": 100}).text
+            stats = marshal.loads(client.get("/api/admin/profile", params={"format": "pstats"}).content)
+            assert any(name == "sign_message" for _, _, name in stats)
+            assert client.get("/api/admin/profile", params={"sort": "bogus"}).status_code == 400
+            
+            assert client.post("/api/admin/profile", json={"sample_rate": 1.0}).json()["sample_rate"] == 1.0
+            client.post("/api/wallet/sign", json=payload)
+            client.get("/metrics")
+            assert client.get("/api/admin/profile").json()["requests"] == 2, "Lấy mẫu 100% phải profile mọi yêu cầu API!"
+            assert client.post("/api/admin/profile", json={"sample_rate": 2}).status_code == 400
+        finally:
+            api.profiler.enabled = False
+            api.profiler.sample_rate = 0.0
+            api.profiler.reset()
+    print("   ✓ Chỉ yêu cầu được chọn bị profile, kết quả gộp xuất JSON/văn bản/.prof")
+
+
+def test_executor_saturation():
+    """Kiểm tra route lô ký tại chỗ đi qua crypto executor: executor đầy thì trả 503 kèm Retry-After"""
+    print("\nĐang kiểm thử executor đầy với route lô...")
+    import threading
+    from fastapi.testclient import TestClient
+    import app as api
+    from executor import CryptoExecutor
+    
+    wallet = WalletCore()
+    private_key, _, address = wallet.generate_keypair()
+    keystore = wallet.create_keystore(private_key, "mật khẩu", "pbkdf2", {"c": 1000})
+    api.wallet_core.unlock_keystore(keystore, "mật khẩu", token="saturation-test")
+    release = threading.Event()
+    saturated = CryptoExecutor(api.wallet_core, workers=1, queue_size=0, retry_after=3)
+    requests = [
+        ("/api/wallet/sign/batch", {"items": [{"message": "a", "address": address}]}),
+        ("/api/wallet/sign/typed/batch", {"items": [{"typed_data": {"primaryType": "Mail"}, "address": address}]}),
+        ("/api/wallet/sign/tx/batch", {"chain_id": 1, "private_key": private_key, "start_nonce": 0,
+                                       "gas_price": 10 ** 9, "items": [{"to": address, "value": 1}]}),
+        ("/api/wallet/attest", {"messages": ["a", "b"], "private_key": private_key}),
+        ("/api/wallet/sign", {"message": "a", "private_key": private_key}),
+        ("/api/wallet/derive", {"seed": "00" * 32, "count": 3}),
+        ("/api/wallet/derive", {"mnemonic": "abandon " * 11 + "about", "count": 3}),
+    ]
+    original = api.crypto_executor
+    api.crypto_executor = saturated
+    try:
+        with TestClient(api.app) as client:
+            busy = saturated.submit_local(lambda core: release.wait(10))
+            for route, payload in requests:
+                response = client.post(route, json=payload, headers={"X-Wallet-Session": "saturation-test"})
+                assert response.status_code == 503, f"{route} phải trả 503 khi executor đầy!"
+                assert response.headers["Retry-After"] == "3"
+            release.set()
+            busy.result(timeout=10)
+            route, payload = requests[2]
+            response = client.post(route, json=payload)
+            assert response.status_code == 200
+            assert json.loads(response.text.splitlines()[0])["from"] == address
+            route, payload = requests[-1]
+            derived = [json.loads(line) for line in client.post(route, json=payload).text.splitlines()]
+            assert [row["index"] for row in derived] == [0, 1, 2]
+            assert derived[0]["address"] == wallet.derive_keypair("abandon " * 11 + "about")[2]
+            assert saturated.rejected == len(requests) and saturated.in_flight == 0
+    finally:
+        release.set()
+        api.crypto_executor = original
+        api.wallet_core.lock(address)
+        saturated.shutdown()
+    print(f"   ✓ {len(requests)} route trả 503 + Retry-After khi executor đầy, chạy lại bình thường khi rảnh")
+
+
+def test_process_executor_metrics():
+    """Kiểm tra executor dạng process vẫn báo thời gian từng bước trong worker cho observer của tiến trình API"""
+    print("\nĐang kiểm thử metrics của executor dạng process...")
+    import asyncio
+    from executor import CryptoExecutor
+    
+    spans = []
+    core = WalletCore(observer=lambda operation, seconds: spans.append((operation, seconds)))
+    private_key, _, address = core.generate_keypair()
+    spans.clear()
+    executor = CryptoExecutor(core, kind="process", workers=1)
+    try:
+        result = asyncio.run(executor.run_core("sign_message", "Đo trong worker", private_key))
+        assert core.verify_signature("Đo trong worker", result["signature"])[1] == address
+        operations = {operation for operation, _ in spans}
+        assert {"key_parse", "sign"} <= operations, f"Thiếu bước đo trong worker: {operations}"
+        assert all(seconds >= 0 for _, seconds in spans)
+        assert executor.in_flight == 0
+    finally:
+        executor.shutdown()
+    print(f"   ✓ {len(spans)} bước đo trong worker được ghi ở tiến trình API: {sorted(operations)}")
+
+
+def test_batch_sign():
+    """Kiểm tra ký lô: giữ thứ tự đầu vào, mục hỏng trả lỗi riêng, chữ ký giống ký từng cái"""
+    print("\nĐang kiểm thử ký lô...")
+    wallet = WalletCore()
+    keys = [wallet.generate_keypair()[0] for _ in range(3)]
+    items = [(index, f"Thông điệp #{index}", keys[index % 3], index % 2 == 0, None) for index in range(7)]
+    items.insert(3, (99, "Khóa hỏng", "0x12", True, None))
+    items.append((100, "Thiếu khóa", None, True, None))
+    
+    for results in (sign_items(wallet, items), sign_chunk(items)):
+        assert [result["index"] for result in results] == [item[0] for item in items], "Phải giữ thứ tự đầu vào!"
+        for (index, message, private_key, personal, _), result in zip(items, results):
+            if index >= 99:
+                assert set(result) == {"index", "error"} and result["error"], "Mục hỏng phải trả {index, error}!"
+                continue
+            assert result == {**wallet.sign_message(message, private_key, personal), "index": index, "message": message}
+    print(f"   ✓ {len(items)} mục giữ thứ tự, 2 mục hỏng trả lỗi riêng, chữ ký khớp sign_message")
+
+
+def test_generate_bulk():
+    """Kiểm tra sinh ví hàng loạt: mỗi dòng CSV/NDJSON có khóa riêng suy ra đúng khóa công khai và địa chỉ"""
+    print("\nĐang kiểm thử sinh ví hàng loạt...")
+    wallet = WalletCore()
+    
+    rows = [json.loads(line) for line in generate_chunk((5, "ndjson")).splitlines()]
+    rows += [dict(zip(("private_key", "public_key", "address"), line.split(",")))
+             for line in generate_chunk((5, "csv")).splitlines()]
+    assert len(rows) == 10 and len({row["private_key"] for row in rows}) == 10
+    for row in rows:
+        assert wallet.private_key_to_address(row["private_key"]) == row["address"], "Địa chỉ không khớp khóa riêng!"
+        public_key = KeyAPI.PrivateKey(bytes.fromhex(row["private_key"][2:])).public_key
+        assert public_key.to_hex() == row["public_key"] and public_key.to_checksum_address() == row["address"]
+    print(f"   ✓ {len(rows)} ví (NDJSON + CSV) suy ra đúng địa chỉ")
+
+
+def test_verify_file():
+    """Kiểm tra xác thực hàng loạt từ file: đếm đúng hợp lệ / không hợp lệ / sai địa chỉ / bản ghi hỏng"""
+    print("\nĐang kiểm thử xác thực hàng loạt từ file...")
+    sys.path.insert(0, str(Path(__file__).parent / "cli"))
+    from wallet_cli import _read_records
+    
+    wallet = WalletCore()
+    private_key, public_key, address = wallet.generate_keypair()
+    _, _, other_address = wallet.generate_keypair()
+    signed = wallet.sign_message("Xin chào", private_key)["signature"]
+    raw = wallet.sign_message("Không tiền tố", private_key, False)["signature"]
+    records = [
+        {"message": "Xin chào", "signature": signed, "address": address},
+        {"message": "Xin chào", "signature": signed, "public_key": public_key},
+        {"message": "Không tiền tố", "signature": raw, "address": address.lower(), "personal": False},
+        {"message": "Xin chào", "signature": signed, "address": other_address},
+        {"message": "Bị sửa", "signature": signed, "public_key": public_key},
+        {"message": "Xin chào", "signature": "0x" + "00" * 65, "address": address},
+        {"message": "Thiếu chữ ký"},
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "signatures.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+            f.write("không phải JSON\n\n[1, 2]\n")
+        results = [result for chunk in chunked(_read_records(path), 3) for result in verify_chunk(chunk)]
+    
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5, 6, 7, 8, 10], "Phải giữ số dòng theo thứ tự!"
+    valid = [result["line"] for result in results if result.get("valid")]
+    mismatch = [result["line"] for result in results if result.get("match_expected") is False]
+    errors = [result["line"] for result in results if "error" in result]
+    invalid = [result["line"] for result in results if not result["valid"] and "error" not in result]
+    assert valid == [1, 2, 3], f"Hợp lệ sai: {valid}"
+    assert invalid == [4, 5, 6] and mismatch == [4, 6], f"Không hợp lệ sai: {invalid}, sai địa chỉ: {mismatch}"
+    assert errors == [7, 8, 10], f"Bản ghi hỏng sai: {errors}"
+    assert results[3]["address"] == address and results[5]["address"] is None
+    print(f"   ✓ {len(results)} bản ghi: {len(valid)} hợp lệ, {len(invalid)} không hợp lệ "
+          f"({len(mismatch)} sai địa chỉ), {len(errors)} hỏng")
+
+
+def test_metrics():
+    """Kiểm tra metrics Prometheus: counter và bucket histogram xuất ra sau một lời gọi được đo"""
+    print("\nĐang kiểm thử metrics...")
+    import threading
+    from metrics import LATENCY_BUCKETS, Registry
+    
+    registry = Registry()
+    calls = registry.counter("wallet_test_calls", "Số lời gọi", ("operation",))
+    latency = registry.histogram("wallet_test_duration_seconds", "Thời gian", ("operation",))
+    observe = lambda operation, seconds: (calls.inc((operation,)), latency.observe((operation,), seconds))
+    wallet = WalletCore(observer=observe)
+    private_key, _, _ = wallet.generate_keypair()
+    thread = threading.Thread(target=wallet.sign_message, args=("Đo metrics", private_key))
+    thread.start()
+    thread.join()
+    observe("sign", 60.0)
+    
+    lines = registry.render().splitlines()
+    assert "# TYPE wallet_test_calls counter" in lines and "# TYPE wallet_test_duration_seconds histogram" in lines
+    assert 'wallet_test_calls_total{operation="sign"} 2' in lines, "Counter phải gộp các thread!"
+    buckets = [line for line in lines if line.startswith('wallet_test_duration_seconds_bucket{operation="sign"')]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[-1] == 'wallet_test_duration_seconds_bucket{operation="sign",le="+Inf"} 2'
+    assert 'wallet_test_duration_seconds_bucket{operation="sign",le="10.0"} 1' in lines
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts), "Bucket phải cộng dồn!"
+    assert 'wallet_test_duration_seconds_count{operation="sign"} 2' in lines
+    assert any(line.startswith('wallet_test_duration_seconds_sum{operation="key_parse"}') for line in lines)
+    print(f"   ✓ {len(lines)} dòng Prometheus, counter và bucket histogram đúng")
+
+
 if __name__ == "__main__":
     try:
         test_wallet()
+        test_key_cache()
+        test_ec_backends()
+        test_verify_modes()
+        test_vanity_pattern()
+        test_hash_file()
+        test_allowlist()
+        test_keystore()
+        test_fixed_base()
+        test_typed_data()
+        test_daemon()
+        test_recover_batch()
+        test_result_types()
+        test_hd_derive()
+        test_siwe()
+        test_transactions()
+        test_attestation()
+        test_keypair_pool()
+        test_ws_channel()
+        test_profiling()
+        test_executor_saturation()
+        test_process_executor_metrics()
+        test_batch_sign()
+        test_generate_bulk()
+        test_verify_file()
+        test_metrics()
     except Exception as e:
         print(f"\n✗ Test failed: {e}")
         import traceback